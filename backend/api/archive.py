@@ -0,0 +1,307 @@
+"""Carbon-Trace: Batch audits of zip / tar archives of CSVs.
+
+`POST /upload-archive` takes one archive of per-site CSVs and audits them
+as a single fleet:
+
+    1. The archive is saved to the job directory as it streams in.
+    2. `audit_archive` (on the API's event loop) reads its members one at a
+       time — each is decompressed into memory, never extracted to disk —
+       and hands each to a pool worker as soon as it is read. At most one
+       member more than there are workers is held at once, so reading the
+       next file overlaps with cleaning the others.
+    3. `clean_member` (in a worker) cleans one member with
+       `web_pipeline.clean_frame` and spills its rows to ``members/`` —
+       as Parquet when pyarrow is installed (several times faster to write
+       and read back than CSV), else as CSV.
+    4. `api.pipeline.run_archive` (in a worker) merges the cleaned members
+       (`merge_members`), audits the fleet and writes the usual outputs.
+
+A member that fails validation is reported with its error and left out;
+the job fails only if no member is valid. When the same (factory_id,
+[year,] month) appears in several files, the later file in the archive
+wins, as a later row does within one file.
+
+Configuration (environment):
+    CARBON_TRACE_ARCHIVE_MAX_MEMBERS  CSV files per archive (default: 10,000)
+    CARBON_TRACE_ARCHIVE_MAX_BYTES    Decompressed bytes per archive
+                                      (default: 16 GiB)
+"""
+
+import asyncio
+import io
+import os
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MAX_MEMBERS = int(os.environ.get("CARBON_TRACE_ARCHIVE_MAX_MEMBERS", 10_000))
+MAX_ARCHIVE_BYTES = int(os.environ.get("CARBON_TRACE_ARCHIVE_MAX_BYTES", 16 * 1024**3))
+
+MEMBERS_DIR = "members"
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Upload file name suffix → archive format
+ARCHIVE_SUFFIXES = {
+    ".zip": "zip",
+    ".tar": "tar",
+    ".tar.gz": "tar",
+    ".tgz": "tar",
+    ".tar.bz2": "tar",
+    ".tbz2": "tar",
+    ".tar.xz": "tar",
+    ".txz": "tar",
+}
+
+
+def archive_format(filename: str) -> Optional[str]:
+    """``"zip"`` or ``"tar"`` from an upload's file name, or None."""
+    name = filename.lower()
+    for suffix, fmt in ARCHIVE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return fmt
+    return None
+
+
+def is_csv_member(name: str) -> bool:
+    """Whether an archive member is an uploaded CSV (not macOS or hidden metadata)."""
+    path = PurePosixPath(name)
+    return (
+        path.suffix.lower() == ".csv"
+        and not path.name.startswith(".")
+        and "__MACOSX" not in path.parts
+    )
+
+
+# ── Reading ──
+
+def iter_members(
+    path: str, fmt: str, max_member_bytes: int
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield (name, decompressed bytes) for each CSV member, in archive order.
+
+    Members are decompressed one at a time while iterating; tar archives
+    (compressed or not) are read as a single forward stream.
+
+    Raises
+    ------
+    ValueError
+        If the archive is corrupt, has no CSV members, or exceeds a size
+        or member-count limit.
+    """
+    count = 0
+    total = 0
+    try:
+        for name, f in _open_members(path, fmt):
+            count += 1
+            if count > MAX_MEMBERS:
+                raise ValueError(f"Archive has more than {MAX_MEMBERS} CSV files.")
+            data = _read_limited(f, name, min(max_member_bytes, MAX_ARCHIVE_BYTES - total))
+            total += len(data)
+            yield name, data
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError, NotImplementedError,
+            RuntimeError) as e:  # Corrupt, truncated, encrypted or unsupported
+        raise ValueError(f"Could not read the {fmt} archive: {e}") from e
+    if count == 0:
+        raise ValueError("Archive contains no .csv files.")
+
+
+def _open_members(path: str, fmt: str) -> Iterator[Tuple[str, Any]]:
+    """(name, binary file object) of each CSV member, opened one at a time."""
+    if fmt == "zip":
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and is_csv_member(info.filename):
+                    with archive.open(info) as f:
+                        yield info.filename, f
+    else:
+        with tarfile.open(path, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile() and is_csv_member(member.name):
+                    yield member.name, archive.extractfile(member)
+
+
+def _read_limited(f: Any, name: str, limit: int) -> bytes:
+    """Read a member, refusing to inflate it past ``limit`` bytes."""
+    parts = []
+    size = 0
+    while True:
+        chunk = f.read(READ_CHUNK_BYTES)
+        if not chunk:
+            return b"".join(parts)
+        size += len(chunk)
+        if size > limit:
+            raise ValueError(f"{name}: decompressed size exceeds the archive limits.")
+        parts.append(chunk)
+
+
+# ── Cleaning (pool workers) ──
+
+def member_path(job_dir: Path, index: int) -> Path:
+    """Where member ``index``'s cleaned rows are spilled."""
+    from src import export
+
+    suffix = "parquet" if export.AVAILABLE else "csv"
+    return Path(job_dir) / MEMBERS_DIR / f"{index:05d}.{suffix}"
+
+
+def _read_member(path: Path) -> Any:
+    import pandas as pd
+    from web_pipeline import CLEANED_DTYPES
+    from src.vectorized import read_audit_csv
+
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return read_audit_csv(str(path)).astype(CLEANED_DTYPES)
+
+
+def clean_member(job_dir: str, index: int, name: str, data: bytes) -> Dict[str, Any]:
+    """
+    Clean one archive member and spill its rows to `member_path`.
+
+    Returns ``{"file", "cleaning_report"}``, or ``{"file", "error"}`` if
+    the member fails validation.
+    """
+    from web_pipeline import clean_frame
+
+    try:
+        df, report = clean_frame(io.BytesIO(data))
+    except ValueError as e:
+        return {"file": name, "error": str(e)}
+    path = member_path(Path(job_dir), index)
+    path.parent.mkdir(exist_ok=True)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return {"file": name, "cleaning_report": report}
+
+
+def merge_members(job_dir: Path, members: List[Dict[str, Any]]) -> Tuple[Any, dict]:
+    """
+    The cleaned rows of every valid member as one frame, plus its report.
+
+    Rows are merged in archive order and deduplicated on (factory_id,
+    [year,] month) keeping the last file's row, then sorted like
+    `web_pipeline.clean_frame`. Files without a ``year`` column are
+    `DEFAULT_YEAR` when others have one.
+
+    Raises
+    ------
+    ValueError
+        If no member is valid.
+    """
+    import pandas as pd
+    from web_pipeline import YEAR_COLUMN, key_columns, output_columns
+    from src.config import DEFAULT_YEAR
+
+    frames = [
+        _read_member(member_path(job_dir, i))
+        for i, member in enumerate(members) if "cleaning_report" in member
+    ]
+    if not frames:
+        raise ValueError(
+            "No valid CSV files in the archive. "
+            + "; ".join(f"{m['file']}: {m['error']}" for m in members[:5])
+        )
+    if any(YEAR_COLUMN in f for f in frames):
+        frames = [f if YEAR_COLUMN in f else f.assign(year=DEFAULT_YEAR) for f in frames]
+    df = pd.concat(frames, ignore_index=True)
+    del frames
+
+    keys = key_columns(df.columns)
+    before = len(df)
+    df = df.drop_duplicates(subset=keys, keep="last")
+    repeated = before - len(df)
+    df = df.sort_values(keys).reset_index(drop=True)
+    df = df[output_columns(df.columns)]
+
+    reports = [m["cleaning_report"] for m in members if "cleaning_report" in m]
+    failed = len(members) - len(reports)
+    original_rows = sum(r["original_rows"] for r in reports)
+    actions = [f"Cleaned {len(reports)} of {len(members)} CSV files"]
+    if failed:
+        actions.append(f"Skipped {failed} invalid file(s) (see members)")
+    if repeated:
+        actions.append(f"Removed {repeated} rows repeated in a later file")
+
+    report = {
+        "original_rows": original_rows,
+        "actions": actions,
+        "cleaned_rows": len(df),
+        "rows_removed": original_rows - len(df),
+        "factories_found": int(df["factory_id"].nunique()),
+        "sectors_found": sorted(df["sector"].unique().tolist()),
+    }
+    if YEAR_COLUMN in df:
+        report["years_found"] = sorted(int(y) for y in df[YEAR_COLUMN].unique())
+    return df, report
+
+
+# ── Orchestration (API event loop) ──
+
+async def audit_archive(
+    jobs: Any,
+    job_id: str,
+    job_dir: Path,
+    archive_path: Path,
+    fmt: str,
+    config_path: str,
+    keep_cleaned: bool,
+    max_member_bytes: int,
+) -> Dict[str, Any]:
+    """
+    Clean an archive's members concurrently in ``jobs``' pool, then audit them.
+
+    Returns the `/upload-archive` response; failures are recorded in
+    status.json like any job's (see `api.pipeline.record_failure`).
+    """
+    from api.pipeline import StageTimer, record_failure, run_archive
+
+    timer = StageTimer(job_dir, job_id)
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(jobs.max_workers + 1)
+    cleaned: List[asyncio.Future] = []
+    progress = {"rows": 0, "files": 0}
+
+    def member_done(future: asyncio.Future) -> None:
+        slots.release()
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        progress["files"] += 1
+        progress["rows"] += result.get("cleaning_report", {}).get("original_rows", 0)
+        timer.events.emit("progress", stage="clean", file=result["file"], **progress)
+
+    members = iter_members(str(archive_path), fmt, max_member_bytes)
+    try:
+        timer.stage("clean")
+        while True:
+            await slots.acquire()
+            # Decompression runs in a thread, off the event loop
+            item = await asyncio.to_thread(next, members, None)
+            if item is None:
+                slots.release()
+                break
+            name, data = item
+            future = jobs.submit(
+                f"{job_id}/{len(cleaned)}", clean_member, str(job_dir), len(cleaned), name, data,
+            )
+            del item, data
+            member = asyncio.wrap_future(future, loop=loop)
+            member.add_done_callback(member_done)
+            cleaned.append(member)
+        results = await asyncio.gather(*cleaned)
+        clean_seconds = timer.stop()["clean"]
+    except Exception as e:
+        for member in cleaned:
+            member.cancel()
+        record_failure(timer, e)
+        raise
+    finally:
+        members.close()
+
+    return await jobs.run(
+        job_id, run_archive, job_id, str(job_dir), config_path, results, clean_seconds, keep_cleaned,
+    )
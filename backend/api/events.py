@@ -0,0 +1,115 @@
+"""Carbon-Trace: Job progress events for the Server-Sent Events stream.
+
+A job's worker appends one JSON line per event to `events.ndjson` in the
+job directory, and `GET /jobs/{job_id}/events` tails that file and relays
+each line as an SSE message. Like status.json this needs no channel
+between the worker process and the API process serving the stream; an
+event's id is its line number, so a client that reconnects with
+``Last-Event-ID`` resumes right after the last event it saw.
+
+Events (every one also carries ``time``, seconds since the epoch):
+    stage      {stage, progress}        a stage started (see `STAGE_PROGRESS`)
+    progress   {stage, rows[, total]}   rows cleaned / audited so far
+    alert      {year, factory_id, sector, month, total_emissions_kg,
+                carbon_cap_kg, alert}   a factory's running total crossed its cap
+    results    {year, summary, sector_breakdown, violators}
+                                        a year's results, as soon as it is audited
+    completed  {status_url, timings, rows}
+    failed     {status_code, error}
+
+`completed` and `failed` are always the last event of a job.
+
+Configuration (environment):
+    CARBON_TRACE_MAX_ALERT_EVENTS  Alert events sent per job; later breaches
+                                   only show up in `results` (default: 1,000)
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+EVENTS_FILE = "events.ndjson"
+TERMINAL_EVENTS = ("completed", "failed")
+MAX_ALERT_EVENTS = int(os.environ.get("CARBON_TRACE_MAX_ALERT_EVENTS", 1000))
+
+
+class EventLog:
+    """Appends a job's events to its `events.ndjson`."""
+
+    def __init__(self, job_dir: Path):
+        self.path = Path(job_dir) / EVENTS_FILE
+        self.alerts = 0
+
+    def emit(self, event: str, **fields: Any) -> None:
+        """Append one event; it is visible to readers once the call returns."""
+        self._write([{"event": event, "time": time.time(), **fields}])
+
+    def alert(self, year: int, factory: Any, record: Dict[str, Any]) -> None:
+        """
+        Report ``factory``'s first ALERT month (``record``) in ``year``.
+
+        Shaped as an `Industry` auditor callback (see `src.runner`); only
+        the first `MAX_ALERT_EVENTS` alerts of a job are written.
+        """
+        self.alerts += 1
+        if self.alerts > MAX_ALERT_EVENTS:
+            return
+        self.emit(
+            "alert",
+            year=year,
+            factory_id=factory.factory_id,
+            sector=factory.sector,
+            month=record["month"],
+            total_emissions_kg=record["total_emissions_kg"],
+            carbon_cap_kg=factory.carbon_cap_kg,
+            alert=record["alert"],
+        )
+
+    def _write(self, events: List[Dict[str, Any]]) -> None:
+        # One write per call: a reader never sees half an event line
+        # unless the worker dies mid-write, and partial lines are not read
+        data = "".join(json.dumps(e) + "\n" for e in events)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+
+
+class EventTail:
+    """
+    Reads a job's events incrementally, from the byte after the last one read.
+
+    ``after`` skips the first events (a reconnecting client's
+    ``Last-Event-ID``). A trailing line without its newline is left for
+    the next `read`.
+    """
+
+    def __init__(self, job_dir: Path, after: int = 0):
+        self.path = Path(job_dir) / EVENTS_FILE
+        self.last_id = 0
+        self._after = after
+        self._offset = 0
+
+    def read(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """New complete events as (id, event), oldest first."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+
+        events = []
+        for line in data[:end].splitlines():
+            self.last_id += 1
+            if self.last_id > self._after:
+                events.append((self.last_id, json.loads(line)))
+        return events
+
+
+def format_event(event_id: int, event: Dict[str, Any]) -> str:
+    """One SSE message: ``id``, ``event`` type and the JSON ``data``."""
+    fields = {k: v for k, v in event.items() if k != "event"}
+    return f"id: {event_id}\nevent: {event['event']}\ndata: {json.dumps(fields)}\n\n"
@@ -0,0 +1,232 @@
+"""Carbon-Trace: Per-factory results of a finished job, paged and streamed.
+
+The pipeline saves one row per factory and calendar year — with its
+year-end projection and expected breach month (see `src.forecast`) — as
+`factories.json`, stored column-wise (one list per field) so it stays
+compact and loads quickly. `GET /jobs/{job_id}/factories` serves it a page
+at a time — sorted and filtered by sector / status / year — or streams
+every matching row as NDJSON.
+
+A job's results never change once it has completed, so a cursor is simply
+the position after the last row returned, bound to the sort and filters it
+was issued for. Loaded tables are kept in a small LRU cache (keyed by path
+and mtime) together with the sort orders computed for them, so paging
+through a large fleet loads and sorts it once.
+
+Configuration (environment):
+    CARBON_TRACE_FACTORY_TABLES   Job tables kept in memory (default: 8)
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from src.config import DEFAULT_YEAR
+
+FACTORIES_FILE = "factories.json"
+
+FIELDS = (
+    "factory_id",
+    "sector",
+    "year",
+    "total_emissions_kg",
+    "max_monthly_kg",
+    "avg_monthly_kg",
+    "alerts",
+    "status",
+    "projected_total_kg",
+    "projected_breach_month",
+)
+# Fields added after tables were first saved, filled with null when loading old ones
+_LATER_FIELDS = ("projected_total_kg", "projected_breach_month")
+STATUSES = ("COMPLIANT", "EXCEEDED")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NDJSON_BATCH_ROWS = 1000
+
+CACHED_TABLES = int(os.environ.get("CARBON_TRACE_FACTORY_TABLES", 8))
+
+
+# ── Writing (pool worker) ──
+
+def factory_columns(years: Mapping[int, Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """One list per field of `FIELDS`: each year's factories in audit order."""
+    from src.forecast import forecast_years
+
+    columns: Dict[str, List[Any]] = {name: [] for name in FIELDS}
+    projection = forecast_years(years)
+    columns["projected_total_kg"] = np.round(projection.projected_total_kg, 2).tolist()
+    columns["projected_breach_month"] = [
+        int(m) if m else None for m in projection.breach_month
+    ]
+    for year, factories in years.items():
+        for factory in factories.values():
+            has_data = factory.months_recorded > 0
+            columns["factory_id"].append(factory.factory_id)
+            columns["sector"].append(factory.sector)
+            columns["year"].append(year)
+            columns["total_emissions_kg"].append(round(factory.total_emissions, 2))
+            columns["max_monthly_kg"].append(
+                round(factory.max_monthly_emissions, 2) if has_data else 0
+            )
+            columns["avg_monthly_kg"].append(
+                round(factory.avg_monthly_emissions, 2) if has_data else 0
+            )
+            columns["alerts"].append(factory.alerts_count)
+            columns["status"].append("EXCEEDED" if factory.is_over_cap else "COMPLIANT")
+    return columns
+
+
+def write_factories(years: Mapping[int, Dict[str, Any]], path: str) -> None:
+    """Save per-factory results of every year as column-wise JSON (atomically)."""
+    target = Path(path)
+    tmp = target.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(factory_columns(years), f, separators=(",", ":"))
+    tmp.replace(target)
+
+
+# ── Reading (API process) ──
+
+class FactoryTable:
+    """A job's per-factory results with cached sort orders."""
+
+    def __init__(self, columns: Dict[str, List[Any]]):
+        self.columns = columns
+        self.size = len(columns["factory_id"])
+        # Saved before results were kept per year / forecast
+        columns.setdefault("year", [DEFAULT_YEAR] * self.size)
+        for name in _LATER_FIELDS:
+            columns.setdefault(name, [None] * self.size)
+        self._orders: Dict[str, np.ndarray] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def array(self, field: str) -> np.ndarray:
+        """``field`` as a NumPy array (converted once)."""
+        array = self._arrays.get(field)
+        if array is None:
+            values = self.columns[field]
+            array = np.asarray(values)
+            if array.dtype == object:
+                # A numeric column with nulls: NaN sorts them last
+                array = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            self._arrays[field] = array
+        return array
+
+    def order(self, field: str) -> np.ndarray:
+        """Row indices sorted by ``field`` ascending, ties by factory_id."""
+        with self._lock:
+            order = self._orders.get(field)
+            if order is None:
+                by_id = self._orders.get("factory_id")
+                if by_id is None:
+                    by_id = np.argsort(self.array("factory_id"), kind="stable")
+                    self._orders["factory_id"] = by_id
+                if field == "factory_id":
+                    order = by_id
+                else:
+                    values = self.array(field)[by_id]
+                    order = by_id[np.argsort(values, kind="stable")]
+                self._orders[field] = order
+            return order
+
+    def select(
+        self,
+        sort: str = "factory_id",
+        descending: bool = False,
+        sectors: Optional[Sequence[str]] = None,
+        statuses: Optional[Sequence[str]] = None,
+        years: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        """Indices of the rows matching the filters, in sort order (nulls last)."""
+        order = self.order(sort)
+        if descending:
+            order = order[::-1]
+            values = self.array(sort)
+            if values.dtype.kind == "f":
+                # Reversing moved the nulls (NaN) first: put them back last
+                null = np.isnan(values[order])
+                if null.any():
+                    order = np.concatenate([order[~null], order[null]])
+        mask = None
+        if sectors:
+            mask = np.isin(self.array("sector"), list(sectors))
+        if statuses:
+            match = np.isin(self.array("status"), list(statuses))
+            mask = match if mask is None else mask & match
+        if years:
+            match = np.isin(self.array("year"), list(years))
+            mask = match if mask is None else mask & match
+        return order if mask is None else order[mask[order]]
+
+    def rows(self, indices: Sequence[int]) -> List[Dict[str, Any]]:
+        """The rows at ``indices`` as dicts."""
+        columns = [(name, self.columns[name]) for name in FIELDS]
+        return [{name: column[i] for name, column in columns} for i in indices]
+
+    def iter_ndjson(self, indices: np.ndarray) -> Iterator[bytes]:
+        """NDJSON lines for ``indices``, ``NDJSON_BATCH_ROWS`` rows per chunk."""
+        for start in range(0, len(indices), NDJSON_BATCH_ROWS):
+            rows = self.rows(indices[start:start + NDJSON_BATCH_ROWS].tolist())
+            yield "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+
+
+@lru_cache(maxsize=CACHED_TABLES)
+def _load(path: str, mtime_ns: int) -> FactoryTable:
+    with open(path, encoding="utf-8") as f:
+        return FactoryTable(json.load(f))
+
+
+def load_factories(job_dir: Path) -> Optional[FactoryTable]:
+    """A job's per-factory results, or None if it has none saved."""
+    path = Path(job_dir) / FACTORIES_FILE
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load(str(path), mtime_ns)
+
+
+# ── Cursors ──
+
+def query_digest(
+    sort: str,
+    descending: bool,
+    sectors: Sequence[str],
+    statuses: Sequence[str],
+    years: Sequence[int] = (),
+) -> str:
+    """Short digest of the sort and filters a cursor belongs to."""
+    key = json.dumps([sort, descending, sorted(sectors), sorted(statuses), sorted(years)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(offset: int, digest: str) -> str:
+    raw = json.dumps({"offset": offset, "query": digest}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, digest: str) -> int:
+    """Offset stored in ``cursor``; ValueError if malformed or for another query."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(data["offset"])
+        query = data["query"]
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor.")
+    if query != digest:
+        raise ValueError("Cursor does not match this query's sort and filters.")
+    if offset < 0:
+        raise ValueError("Invalid cursor.")
+    return offset
@@ -0,0 +1,391 @@
+"""Carbon-Trace: SQLite index of jobs and garbage collection of their outputs.
+
+Every job directory under `data/outputs/` has a row in `data/jobs.sqlite3`
+holding its metadata (kind, config, tenant, upload name, status, input
+rows), timestamps and size on disk, so `GET /jobs` and the disk-usage
+metric never walk the filesystem. Rows are written by the API process when
+a job is created, when it finishes and when its outputs are read, and by
+the pool worker that picks a job up (`start`, from the job's first
+`api.pipeline.StageTimer` stage), so a job is listed as running only while
+it actually runs.
+
+A background collector (`collect`) deletes job directories:
+
+1. whose TTL ran out — a job expires ``ttl_s`` seconds after it was last
+   used (created, polled or downloaded); each job may set its own TTL
+2. least recently used first, while the jobs' total size is over the quota
+
+Queued and running jobs are never collected. `sync` reconciles the index
+with the directory at startup: job directories written before the index
+existed are indexed with a fresh TTL, rows of directories removed by hand
+are dropped, and jobs still queued or running whose API process is gone —
+interrupted by a crash or restart — are marked failed, so their TTL
+applies. Each row records the process that created it (its pid and a
+random boot id), so several API processes on one host can share the index
+and the output directory: one starting up never fails another's live jobs.
+
+Every deletion of a job directory (collection, `DELETE /outputs/{job_id}`,
+result-cache eviction) goes through `delete`, so sizes and listings never
+count outputs that are gone.
+
+Configuration (environment):
+    CARBON_TRACE_JOB_TTL_S          Default idle time before a job's outputs
+                                    are deleted (default: 24 h)
+    CARBON_TRACE_OUTPUT_MAX_BYTES   Disk quota for all job outputs (default: 10 GiB;
+                                    0 disables the quota)
+    CARBON_TRACE_GC_INTERVAL_S      Seconds between collector runs (default: 300;
+                                    0 disables the collector)
+"""
+
+import base64
+import binascii
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from api.pipeline import read_status, write_status
+from api.result_cache import dir_size
+
+DEFAULT_TTL_S = float(os.environ.get("CARBON_TRACE_JOB_TTL_S", 24 * 3600))
+DEFAULT_MAX_BYTES = int(os.environ.get("CARBON_TRACE_OUTPUT_MAX_BYTES", 10 * 1024**3))
+GC_INTERVAL_S = float(os.environ.get("CARBON_TRACE_GC_INTERVAL_S", 300))
+
+FINISHED = ("completed", "failed")
+# Jobs the collector never deletes
+ACTIVE = ("queued", "running")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id        TEXT PRIMARY KEY,
+    kind          TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    config        TEXT,
+    tenant        TEXT,
+    filename      TEXT,
+    created_at    REAL NOT NULL,
+    finished_at   REAL,
+    last_used_at  REAL NOT NULL,
+    ttl_s         REAL NOT NULL,
+    size_bytes    INTEGER NOT NULL DEFAULT 0,
+    rows          INTEGER,
+    error         TEXT,
+    owner_pid     INTEGER,
+    owner_boot    TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at DESC, job_id DESC);
+CREATE INDEX IF NOT EXISTS jobs_last_used ON jobs (last_used_at);
+"""
+
+# Added after the first release; older index files get them on open
+_MIGRATIONS = (
+    ("owner_pid", "INTEGER"),
+    ("owner_boot", "TEXT"),
+)
+
+_COLUMNS = (
+    "job_id", "kind", "status", "config", "tenant", "filename", "created_at",
+    "finished_at", "last_used_at", "ttl_s", "size_bytes", "rows", "error",
+)
+
+
+class JobIndex:
+    """Job metadata in SQLite, plus TTL / quota eviction of job directories."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        output_dir: Path,
+        ttl_s: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self._db_path = Path(db_path)
+        self._output_dir = Path(output_dir)
+        self.ttl_s = ttl_s if ttl_s is not None else DEFAULT_TTL_S
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_MAX_BYTES
+        self._local = threading.local()
+        self._collect_lock = threading.Lock()
+        # Tells this process's rows from a dead process's that had the same pid
+        self._boot = uuid.uuid4().hex
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+            existing = {row["name"] for row in db.execute("PRAGMA table_info(jobs)")}
+            for name, sql_type in _MIGRATIONS:
+                if name not in existing:
+                    db.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+
+    def __reduce__(self):
+        # Pool workers reopen the same file (see `api.pipeline.warm_worker`)
+        return (JobIndex, (self._db_path, self._output_dir, self.ttl_s, self.max_bytes))
+
+    # ── Connection (one per thread; WAL lets processes share the file) ──
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self._db_path, timeout=10.0, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        yield db
+
+    # ── Writes ──
+
+    def add(
+        self,
+        job_id: str,
+        kind: str,
+        config: Optional[str] = None,
+        tenant: Optional[str] = None,
+        filename: Optional[str] = None,
+        ttl_s: Optional[float] = None,
+        status: str = "queued",
+    ) -> None:
+        """Register a new job, owned by this process."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, kind, status, config, tenant, filename,"
+                " created_at, last_used_at, ttl_s, owner_pid, owner_boot)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, status, config, tenant, filename, now, now,
+                 ttl_s if ttl_s is not None else self.ttl_s, os.getpid(), self._boot),
+            )
+
+    def start(self, job_id: str) -> None:
+        """Mark a queued job as running."""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'running' WHERE job_id = ? AND status = 'queued'",
+                (job_id,),
+            )
+
+    def finish(self, job_id: str) -> None:
+        """Record a job's final status, row count and size from its directory."""
+        job_dir = self._output_dir / job_id
+        status = read_status(job_dir)
+        if not status or status.get("status") not in FINISHED:
+            return
+        now = time.time()
+        with self._connect() as db:
+            # Its TTL runs from when the results became available
+            db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, last_used_at = ?, size_bytes = ?,"
+                " rows = ?, error = ? WHERE job_id = ?",
+                (status["status"], status.get("updated_at", now), now, dir_size(job_dir),
+                 (status.get("rows") or {}).get("input"), status.get("error"), job_id),
+            )
+
+    def refresh_size(self, job_id: str) -> None:
+        """Re-measure a job directory after files were added to it."""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET size_bytes = ? WHERE job_id = ?",
+                (dir_size(self._output_dir / job_id), job_id),
+            )
+
+    def touch(self, job_id: str) -> None:
+        """Mark a job as just used (restarts its TTL)."""
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET last_used_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def remove(self, job_id: str) -> None:
+        """Forget a job (its directory is the caller's to delete)."""
+        with self._connect() as db:
+            db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def delete(self, job_id: str) -> None:
+        """Delete a job's directory and forget it."""
+        shutil.rmtree(self._output_dir / job_id, ignore_errors=True)
+        self.remove(job_id)
+
+    # ── Reads ──
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _record(row) if row else None
+
+    def list(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        tenant: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Jobs, newest first, with a cursor for the next page.
+
+        Raises
+        ------
+        ValueError
+            If ``cursor`` is malformed.
+        """
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if tenant:
+            where.append("tenant = ?")
+            params.append(tenant)
+        if cursor:
+            created_at, job_id = _decode_cursor(cursor)
+            where.append("(created_at < ? OR (created_at = ? AND job_id < ?))")
+            params.extend([created_at, created_at, job_id])
+        sql = "SELECT * FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, job_id DESC LIMIT ?"
+        with self._connect() as db:
+            rows = db.execute(sql, (*params, limit + 1)).fetchall()
+        records = [_record(r) for r in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = records[-1]
+            next_cursor = _encode_cursor(last["created_at"], last["job_id"])
+        return records, next_cursor
+
+    def total_bytes(self) -> int:
+        """Disk used by all indexed job directories."""
+        with self._connect() as db:
+            return db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM jobs").fetchone()[0]
+
+    # ── Maintenance ──
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Reconcile the index with the output directory.
+
+        Indexes job directories it does not know, drops rows whose
+        directory is gone, picks up jobs that finished unrecorded and fails
+        jobs left queued or running by an API process that is gone.
+        """
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT job_id, status, owner_pid, owner_boot FROM jobs"
+            ).fetchall()
+        known = {row["job_id"] for row in rows}
+        for job_id, status, owner_pid, owner_boot in rows:
+            if status in ACTIVE and self._orphaned(owner_pid, owner_boot):
+                self._settle(job_id)
+        on_disk = set()
+        added = 0
+        if self._output_dir.exists():
+            for entry in os.scandir(self._output_dir):
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                on_disk.add(entry.name)
+                if entry.name in known:
+                    continue
+                job_dir = Path(entry.path)
+                status = read_status(job_dir) or {}
+                mtime = entry.stat().st_mtime
+                # A full TTL from now, so upgrading never mass-deletes old outputs
+                with self._connect() as db:
+                    db.execute(
+                        "INSERT OR IGNORE INTO jobs (job_id, kind, status, created_at,"
+                        " finished_at, last_used_at, ttl_s, size_bytes, rows, error)"
+                        " VALUES (?, 'unknown', ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (entry.name, status.get("status", "unknown"), mtime,
+                         status.get("updated_at"), time.time(), self.ttl_s, dir_size(job_dir),
+                         (status.get("rows") or {}).get("input"), status.get("error")),
+                    )
+                added += 1
+        removed = known - on_disk
+        with self._connect() as db:
+            db.executemany("DELETE FROM jobs WHERE job_id = ?", [(j,) for j in removed])
+        return {"added": added, "removed": len(removed)}
+
+    def collect(self, now: Optional[float] = None) -> List[str]:
+        """Delete expired jobs, then LRU jobs over the quota; return their ids."""
+        with self._collect_lock:
+            now = time.time() if now is None else now
+            with self._connect() as db:
+                candidates = db.execute(
+                    "SELECT job_id, size_bytes, last_used_at + ttl_s FROM jobs"
+                    " WHERE status NOT IN (?, ?) ORDER BY last_used_at",
+                    ACTIVE,
+                ).fetchall()
+            expired = [job_id for job_id, _, expires_at in candidates if expires_at < now]
+            evicted = list(expired)
+            if self.max_bytes > 0:
+                gone = set(expired)
+                used = self.total_bytes() - sum(
+                    size for job_id, size, _ in candidates if job_id in gone
+                )
+                for job_id, size, _ in candidates:
+                    if used <= self.max_bytes:
+                        break
+                    if job_id not in gone:
+                        evicted.append(job_id)
+                        used -= size
+            for job_id in evicted:
+                self.delete(job_id)
+            return evicted
+
+    def _orphaned(self, owner_pid: Optional[int], owner_boot: Optional[str]) -> bool:
+        """Whether the process that created a job can no longer run it."""
+        if owner_boot == self._boot:
+            return False
+        # Our pid under another boot id is a previous run of this server
+        return owner_pid is None or owner_pid == os.getpid() or not _pid_alive(owner_pid)
+
+    def _settle(self, job_id: str) -> None:
+        """Record an active job's final status, failing it if it has none."""
+        job_dir = self._output_dir / job_id
+        status = read_status(job_dir)
+        if job_dir.is_dir() and (not status or status.get("status") not in FINISHED):
+            write_status(
+                job_dir, job_id, "failed",
+                status_code=500,
+                error="The server stopped before the job finished.",
+            )
+        self.finish(job_id)
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a process with this id is running on this host."""
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+def _record(row: sqlite3.Row) -> Dict[str, Any]:
+    record = {name: row[name] for name in _COLUMNS}
+    record["expires_at"] = record["last_used_at"] + record["ttl_s"]
+    return record
+
+
+def _encode_cursor(created_at: float, job_id: str) -> str:
+    raw = json.dumps([created_at, job_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(created_at), str(job_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
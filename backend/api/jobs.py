@@ -0,0 +1,89 @@
+"""Carbon-Trace: Warm process pool for audit jobs.
+
+Keeps CPU-bound pipeline work (pandas cleaning, audit, matplotlib) off the
+FastAPI event loop. Workers are started and warmed with `api.pipeline.warm_worker`
+at application startup, so the first upload does not pay for importing
+pandas/matplotlib.
+
+Configuration (environment):
+    CARBON_TRACE_WORKERS   Number of worker processes (default: CPU count)
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from api.pipeline import warm_worker
+
+
+def _default_workers() -> int:
+    return int(os.environ.get("CARBON_TRACE_WORKERS", os.cpu_count() or 1))
+
+
+class JobManager:
+    """
+    Owns the worker pool and the futures of jobs submitted by this process.
+
+    Job status itself lives on disk (`status.json`, written by the worker),
+    so futures are only needed to await synchronous uploads. Workers are
+    given ``job_index`` (an `api.job_index.JobIndex`) and mark each job
+    running in it as they start it.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, job_index: Optional[Any] = None):
+        self._max_workers = max_workers or _default_workers()
+        self._job_index = job_index
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+
+    @property
+    def max_workers(self) -> int:
+        """Configured pool size."""
+        return self._max_workers
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Pool tasks submitted by this process that have not finished yet.
+
+        Counts every task — archive members, charts, scenario and
+        uncertainty runs — not only audit jobs.
+        """
+        return sum(1 for f in self._futures.values() if not f.done())
+
+    def start(self) -> None:
+        """Create the pool and pre-warm every worker (idempotent)."""
+        if self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_worker,
+            initargs=(self._job_index,),
+        )
+        # Force every worker to spawn now instead of on the first uploads
+        warmups = [self._pool.submit(os.getpid) for _ in range(self._max_workers)]
+        for f in warmups:
+            f.result()
+
+    def shutdown(self) -> None:
+        """Stop the pool, waiting for running jobs."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        self._futures.clear()
+
+    def submit(self, job_id: str, fn: Callable[..., Any], *args: Any) -> Future:
+        """Run ``fn(*args)`` in the pool and track it under ``job_id``."""
+        if self._pool is None:
+            self.start()
+        future = self._pool.submit(fn, *args)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job_id, None))
+        return future
+
+    async def run(self, job_id: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Submit a job and await its result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(job_id, fn, *args))
@@ -1,8 +1,8 @@
 """Carbon-Trace: FastAPI Backend API.
 
-Provides a single POST endpoint that accepts a CSV file upload,
-cleans it, runs the full Carbon-Trace audit pipeline, and returns
-structured JSON results.
+Provides a POST endpoint that accepts a CSV file upload, cleans it,
+runs the full Carbon-Trace audit pipeline in a warm worker process pool,
+and returns structured JSON results (or a job_id to poll).
 
 Run:
     uvicorn api.main:app --reload
@@ -14,37 +14,133 @@ Docs:
     http://localhost:8000/docs
 """
 
+import asyncio
+import hashlib
+import json
 import os
 import sys
 import uuid
 import shutil
+import time
 import traceback
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import IO, Any, Callable, Dict, Optional, Set
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import Body, FastAPI, UploadFile, File, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 # ── Ensure project root is importable ──
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from web_pipeline import clean_csv
-from src.runner import run_audit, write_summary_csv, plot_emissions
+from web_pipeline import validate_header
+from src.config import registry as config_registry
+from src.export import iter_records_csv
+from src.scenarios import INPUTS_FILE, run_scenarios
+from src.uncertainty import DEFAULT_DRAWS, DEFAULT_PERCENTILES, run_uncertainty
+from api import metrics
+from api.archive import archive_format, audit_archive
+from api.events import TERMINAL_EVENTS, EventLog, EventTail, format_event
+from api.factory_results import (
+    DEFAULT_PAGE_SIZE, FIELDS as FACTORY_FIELDS, MAX_PAGE_SIZE, STATUSES as FACTORY_STATUSES,
+    decode_cursor, encode_cursor, load_factories, query_digest,
+)
+from api.job_index import GC_INTERVAL_S, JobIndex
+from api.jobs import JobManager
+from api.result_cache import ResultCache
+from api.pipeline import (
+    CHART_SERIES_FILE, RECORDS_FILE, read_result, read_status, render_job_chart,
+    run_append, run_pipeline, summary_filename, use_job_index, write_status,
+)
+from api.tenant_state import (
+    StateConflictError, restore_factories, save_state,
+    snapshot_factories, state_config, state_path,
+)
 
 
 # ── Config ──
-CONFIG_PATH = str(PROJECT_ROOT / "config" / "sectors.json")
+CONFIG_PATH = str(PROJECT_ROOT / "config" / "sectors.json")  # "default" config
 UPLOAD_DIR = PROJECT_ROOT / "data" / "uploads"
 OUTPUT_DIR = PROJECT_ROOT / "data" / "outputs"
+CACHE_DIR = PROJECT_ROOT / "data" / "result_cache"
+STATE_DIR = PROJECT_ROOT / "data" / "tenants"
+JOB_INDEX_PATH = PROJECT_ROOT / "data" / "jobs.sqlite3"
+
+# ── Chart formats served by /outputs/{job_id}/emissions_chart.{fmt} ──
+CHART_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "webp": "image/webp",
+}
+
+# ── Upload limits ──
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # 1 MiB read/write granularity
+MAX_UPLOAD_BYTES = int(os.environ.get("CARBON_TRACE_MAX_UPLOAD_BYTES", 2 * 1024**3))
+MAX_HEADER_BYTES = 64 * 1024      # A header line longer than this is rejected
+
+# ── Per-job TTL bounds (?ttl=, seconds) ──
+MIN_JOB_TTL_S = 60
+MAX_JOB_TTL_S = 30 * 24 * 3600
+
+# ── Event streams (GET /jobs/{job_id}/events) ──
+EVENT_POLL_S = 0.2           # How often a stream checks the job's event log
+EVENT_KEEPALIVE_S = 15.0     # Comment line sent after this long without events
+
+# ── Job metadata, sizes and TTLs; drives output garbage collection ──
+job_index = JobIndex(JOB_INDEX_PATH, OUTPUT_DIR)
+use_job_index(job_index)  # Archive jobs start on the event loop
+
+# ── Worker pool (pre-forked and warmed at startup); workers mark jobs running ──
+jobs = JobManager(job_index=job_index)
+
+# ── Completed jobs keyed by (config, upload bytes, options) ──
+results = ResultCache(CACHE_DIR, OUTPUT_DIR, delete_job=job_index.delete)
+
+# ── Upload jobs accepted by this process that have not finished ──
+_jobs_in_flight: Set[str] = set()
+
+# ── Scrape-time gauges ──
+metrics.JOBS_IN_FLIGHT.set_function(lambda: len(_jobs_in_flight))
+metrics.OUTPUT_DIR_BYTES.set_function(lambda: job_index.total_bytes())
+
+# ── Jobs that change a tenant's state run one at a time per tenant ──
+_tenant_locks: Dict[str, asyncio.Lock] = {}
+_background_tasks: Set[asyncio.Task] = set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    jobs.start()
+    await asyncio.to_thread(job_index.sync)
+    collector = asyncio.create_task(_collect_outputs()) if GC_INTERVAL_S > 0 else None
+    yield
+    if collector is not None:
+        collector.cancel()
+    jobs.shutdown()
+
+
+async def _collect_outputs() -> None:
+    """Background loop: delete expired and over-quota job outputs."""
+    while True:
+        try:
+            evicted = await asyncio.to_thread(job_index.collect)
+            if evicted:
+                print(f"🧹 Collected {len(evicted)} job output(s)")
+        except Exception:
+            traceback.print_exc()
+        await asyncio.sleep(GC_INTERVAL_S)
+
 
 # ── App ──
 app = FastAPI(
     title="Carbon-Trace API",
     description="Industrial Emission Auditor — SDG 13: Climate Action",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ── CORS (allow any frontend to connect) ──
@@ -56,9 +152,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ── Serve generated output files ──
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/outputs", StaticFiles(directory=str(OUTPUT_DIR)), name="outputs")
+# ── Reject oversized uploads before the body is read ──
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.method in ("POST", "PUT"):
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > MAX_UPLOAD_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": _too_large_message()},
+            )
+    return await call_next(request)
+
+
+# ── Request counts and latency per route template ──
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        metrics.REQUESTS.inc(method=request.method, route=path, status=status)
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - start, method=request.method, route=path
+        )
 
 
 @app.get("/", tags=["Health"])
@@ -72,175 +194,608 @@ async def health():
     }
 
 
+@app.get("/metrics", tags=["Health"])
+async def metrics_endpoint():
+    """
+    Prometheus metrics: request counts and latency per route, pipeline stage
+    durations, rows processed and dropped, jobs in flight and output disk usage.
+    """
+    body = await asyncio.to_thread(metrics.registry.render)
+    return PlainTextResponse(body, media_type=metrics.CONTENT_TYPE)
+
+
 @app.post("/upload-csv", tags=["Audit"])
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(
+    file: UploadFile = File(...),
+    keep_cleaned: bool = Query(
+        False, description="Also write the cleaned rows to cleaned.csv"
+    ),
+    config: str = Query(
+        "default",
+        description="Named factor set (see GET /configs), e.g. a regional config",
+    ),
+    wait: bool = Query(
+        True,
+        description="Wait for the audit and return its results. "
+                    "With wait=false, return a job_id immediately (202) "
+                    "and poll GET /jobs/{job_id}.",
+    ),
+    tenant: Optional[str] = Query(
+        None,
+        description="Also save the audited factory state under this tenant, "
+                    "replacing its previous state (see POST /tenants/{tenant}/months)",
+    ),
+    profile: bool = Query(
+        False,
+        description="Profile each pipeline stage (cProfile + tracemalloc) and save "
+                    "the capture as /outputs/{job_id}/profile.zip. Slows the job down.",
+    ),
+    ttl: Optional[int] = Query(
+        None, ge=MIN_JOB_TTL_S, le=MAX_JOB_TTL_S,
+        description="Seconds the job's outputs are kept after last use "
+                    "(default: CARBON_TRACE_JOB_TTL_S)",
+    ),
+):
     """
     Upload a production CSV → clean → audit → return JSON results.
 
     **Accepts:** multipart/form-data with a single CSV file.
 
-    **Pipeline:**
-    1. Save uploaded file to temp location
-    2. `web_pipeline.clean_csv()` → cleaned CSV
-    3. `src.runner.run_audit()` → per-factory emission closures
-    4. `src.runner.write_summary_csv()` → audit_summary_2026.csv
-    5. `src.runner.plot_emissions()` → emissions_chart.png
+    **Pipeline** (runs in a worker process, off the event loop):
+    1. Stream the upload to disk in 1 MiB chunks, rejecting a bad header
+       (422) or an oversized body (413) early
+    2. `web_pipeline.clean_frame()` → cleaned DataFrame (kept in memory;
+       written to cleaned.csv only when `keep_cleaned=true`)
+    3. `src.runner.run_audit_frame()` → per-factory emission audit, one
+       calendar year at a time (optional `year` column; caps reset yearly)
+    4. `src.runner.write_summary_csv()` → audit_summary_<year>.csv
+    5. Save chart series (the PNG is rendered lazily on first download,
+       or right away when `profile=true`)
     6. Return structured JSON
 
-    **Returns:** Summary stats, per-factory details, violator list,
-    cleaning report, and downloadable file paths.
+    **Returns:** Summary stats, sector breakdown and top violators of the
+    latest year (every year under `years`), cleaning report, and
+    downloadable file paths (per-factory rows are
+    paged from `factories_url`, i.e. GET /jobs/{job_id}/factories) — or, with `wait=false`,
+    a `job_id` and status URL.
     """
-    # ── Validate file type ──
-    if not file.filename or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type. Please upload a .csv file.",
+    return await _process_upload(
+        file, config, keep_cleaned, wait, tenant, profile, ttl, kind="upload"
+    )
+
+
+@app.post("/upload-archive", tags=["Audit"])
+async def upload_archive(
+    file: UploadFile = File(...),
+    keep_cleaned: bool = Query(
+        False, description="Also write the merged cleaned rows to cleaned.csv"
+    ),
+    config: str = Query(
+        "default",
+        description="Named factor set (see GET /configs), e.g. a regional config",
+    ),
+    wait: bool = Query(
+        True,
+        description="Wait for the audit and return its results. "
+                    "With wait=false, return a job_id immediately (202).",
+    ),
+    ttl: Optional[int] = Query(
+        None, ge=MIN_JOB_TTL_S, le=MAX_JOB_TTL_S,
+        description="Seconds the job's outputs are kept after last use (see POST /upload-csv)",
+    ),
+):
+    """
+    Upload a zip or tar archive of CSVs → audit them all as one fleet.
+
+    **Accepts:** multipart/form-data with one `.zip`, `.tar`, `.tar.gz` /
+    `.tgz`, `.tar.bz2` or `.tar.xz` file. Every `.csv` member must have
+    the `/upload-csv` columns; other members are ignored.
+
+    Members are decompressed one at a time (never extracted to disk) and
+    cleaned side by side in the worker pool; the cleaned rows are then
+    merged — a later file's row wins for a repeated (factory_id, [year,]
+    month) — and audited like a single upload (see `api.archive`).
+
+    **Returns:** The `/upload-csv` response for the merged fleet, with a
+    combined `cleaning_report` and `members`: each file's own cleaning
+    report, or the `error` that left it out. 422 if no member is valid.
+    """
+    return await _process_upload(
+        file, config, keep_cleaned, wait, None, False, ttl, kind="archive"
+    )
+
+
+@app.post("/tenants/{tenant}/months", tags=["Tenants"])
+async def append_months(
+    tenant: str,
+    file: UploadFile = File(...),
+    keep_cleaned: bool = Query(
+        False, description="Also write the cleaned rows to cleaned.csv"
+    ),
+    config: str = Query(
+        "default",
+        description="Named factor set for a tenant without saved state "
+                    "(existing state keeps the config it was built with)",
+    ),
+    wait: bool = Query(
+        True,
+        description="Wait for the audit and return its results. "
+                    "With wait=false, return a job_id immediately (202).",
+    ),
+    profile: bool = Query(
+        False, description="Profile each pipeline stage (see POST /upload-csv)"
+    ),
+    ttl: Optional[int] = Query(
+        None, ge=MIN_JOB_TTL_S, le=MAX_JOB_TTL_S,
+        description="Seconds the job's outputs are kept after last use (see POST /upload-csv)",
+    ),
+):
+    """
+    Append new months to a tenant's saved factory state.
+
+    Each factory's auditor resumes from its saved running total, so only
+    the uploaded rows are audited — O(new rows) rather than a re-audit of
+    the year. Rows for a (year, month) a factory already has, or that come
+    before its latest one, are skipped; a new year starts from zero.
+    Results are identical to uploading every month at once.
+
+    **Returns:** The `/upload-csv` response for the whole updated state,
+    plus a `state` section (`months_appended`, `rows_skipped`,
+    `factories_updated`). 409 if the state's config has changed since it
+    was saved.
+    """
+    return await _process_upload(
+        file, config, keep_cleaned, wait, tenant, profile, ttl, kind="append"
+    )
+
+
+@app.get("/tenants/{tenant}/state", tags=["Tenants"])
+async def download_state(tenant: str):
+    """Download a tenant's state snapshot (JSON) for backup or restore."""
+    path = _tenant_state_path(tenant)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Tenant has no saved state.")
+    return FileResponse(
+        path=str(path),
+        media_type="application/json",
+        filename=f"{tenant}_state.json",
+    )
+
+
+@app.put("/tenants/{tenant}/state", tags=["Tenants"])
+async def restore_state(tenant: str, file: UploadFile = File(...)):
+    """
+    Rebuild a tenant's state from a snapshot (as downloaded from GET).
+
+    The snapshot is validated by restoring every factory's auditor from it
+    before it replaces the current state.
+    """
+    path = _tenant_state_path(tenant)
+    data = await file.read()
+
+    def restore() -> Dict[str, Any]:
+        snapshot = json.loads(data)
+        config = state_config(snapshot)
+        years = restore_factories(snapshot, config)
+        save_state(path, snapshot_factories(tenant, years, config))
+        return {
+            "tenant": tenant,
+            "config": config.name,
+            "factories": len({fid for factories in years.values() for fid in factories}),
+            "years": list(years),
+        }
+
+    try:
+        async with _tenant_lock(tenant):
+            return await asyncio.to_thread(restore)
+    except StateConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:  # includes json.JSONDecodeError
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.delete("/tenants/{tenant}/state", tags=["Tenants"])
+async def delete_state(tenant: str):
+    """Forget a tenant's saved state (the next upload starts a fresh year)."""
+    path = _tenant_state_path(tenant)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Tenant has no saved state.")
+    async with _tenant_lock(tenant):
+        shutil.rmtree(path.parent)
+    return {"message": f"State of tenant {tenant} deleted.", "tenant": tenant}
+
+
+@app.get("/configs", tags=["Audit"])
+async def list_configs():
+    """List the named emission-factor configs selectable via `?config=`."""
+    configs = {}
+    for name in config_registry.names():
+        compiled = config_registry.get(name)
+        configs[name] = {
+            "sectors": {
+                sector: {
+                    "emission_factor": cfg.emission_factor._asdict(),
+                    "carbon_cap_kg": cfg.carbon_cap_kg,
+                }
+                for sector, cfg in compiled.sectors.items()
+            },
+            "energy_source_multipliers": dict(compiled.energy_multipliers),
+            "digest": compiled.digest,
+        }
+    return {"default": "default", "configs": configs}
+
+
+@app.get("/jobs", tags=["Audit"])
+async def list_jobs(
+    limit: int = Query(50, ge=1, le=500, description="Jobs per page"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    status: Optional[str] = Query(None, description="queued, running, completed or failed"),
+    tenant: Optional[str] = Query(None, description="Only this tenant's jobs"),
+):
+    """
+    List jobs, newest first, from the job index (no filesystem scan).
+
+    Each job has its kind (`upload` / `append` / `archive`), config, tenant, upload
+    file name, status, input rows, size on disk and timestamps, including
+    `expires_at` — when its outputs will be deleted unless used again.
+    `disk` reports the outputs' total size and quota.
+    """
+    try:
+        records, next_cursor = await asyncio.to_thread(
+            job_index.list, limit, cursor, status, tenant
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "jobs": records,
+        "next_cursor": next_cursor,
+        "disk": {
+            "used_bytes": await asyncio.to_thread(job_index.total_bytes),
+            "quota_bytes": job_index.max_bytes,
+        },
+    }
 
-    # ── Create unique job directory for this upload ──
-    job_id = uuid.uuid4().hex[:12]
+
+@app.get("/jobs/{job_id}", tags=["Audit"])
+async def job_status(job_id: str):
+    """
+    Report the status of an audit job.
+
+    `status` is one of `queued`, `running`, `completed`, `failed`.
+    Running jobs include the current `stage` and `progress` (0–1);
+    completed jobs include the `/upload-csv` response as `result`;
+    failed jobs include `status_code` and `error`.
+    """
     job_dir = OUTPUT_DIR / job_id
-    job_dir.mkdir(parents=True, exist_ok=True)
+    status = read_status(job_dir)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    job_index.touch(job_id)
+    if status["status"] == "completed":
+        status["result"] = read_result(job_dir)
+    return status
 
-    raw_path = job_dir / "raw_upload.csv"
-    cleaned_path = job_dir / "cleaned.csv"
-    summary_path = job_dir / "audit_summary_2026.csv"
-    chart_path = job_dir / "emissions_chart.png"
 
+@app.get("/jobs/{job_id}/factories", tags=["Audit"])
+async def list_factories(
+    job_id: str,
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE,
+        description=f"Rows per page (default {DEFAULT_PAGE_SIZE}; NDJSON: all rows)",
+    ),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    sort: str = Query("factory_id", description="Field to sort by; prefix with '-' for descending"),
+    sector: Optional[str] = Query(None, description="Comma-separated sectors to keep"),
+    status: Optional[str] = Query(None, description="COMPLIANT or EXCEEDED (comma-separated)"),
+    year: Optional[str] = Query(None, description="Comma-separated calendar years to keep"),
+    fmt: str = Query("json", alias="format", description="`json` pages or `ndjson` stream"),
+):
+    """
+    Per-factory results of a completed job, page by page.
+
+    There is one row per factory and calendar year in the upload.
+
+    JSON responses hold `items`, the number of matching factories (`total`)
+    and a `next_cursor` (null on the last page); pass it back unchanged
+    with the same `sort` and filters to get the next page. `format=ndjson`
+    streams one factory per line — every matching row from the cursor on,
+    or `limit` rows if given.
+    """
+    if fmt not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="Unsupported format. Use one of: ['json', 'ndjson']")
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    if field not in FACTORY_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported sort field. Use one of: {list(FACTORY_FIELDS)}",
+        )
+    sectors = [s.strip() for s in (sector or "").split(",") if s.strip()]
+    statuses = [s.strip().upper() for s in (status or "").split(",") if s.strip()]
+    if any(s not in FACTORY_STATUSES for s in statuses):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported status. Use one of: {list(FACTORY_STATUSES)}",
+        )
     try:
-        # ── Step 1: Save upload ──
-        content = await file.read()
-        with open(raw_path, "wb") as f:
-            f.write(content)
-
-        # ── Step 2: Clean the CSV ──
-        _, cleaning_report = clean_csv(str(raw_path), str(cleaned_path))
-
-        # ── Step 3: Run Carbon-Trace audit ──
-        factories, records = run_audit(
-            input_csv=str(cleaned_path),
-            config_path=CONFIG_PATH,
+        years = [int(y) for y in (year or "").split(",") if y.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="year must be comma-separated integers.")
+
+    digest = query_digest(field, descending, sectors, statuses, years)
+    offset = 0
+    if cursor:
+        try:
+            offset = decode_cursor(cursor, digest)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    job_dir = OUTPUT_DIR / job_id
+    job = read_status(job_dir)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, not completed.")
+    # Loading (and sorting) a large fleet's table is kept off the event loop
+    table = await asyncio.to_thread(load_factories, job_dir)
+    if table is None:
+        raise HTTPException(status_code=404, detail="Factory results not found.")
+    job_index.touch(job_id)
+    indices = await asyncio.to_thread(table.select, field, descending, sectors, statuses, years)
+
+    if fmt == "ndjson":
+        end = offset + limit if limit else len(indices)
+        return StreamingResponse(
+            table.iter_ndjson(indices[offset:end]),
+            media_type="application/x-ndjson",
+            headers={"X-Total-Count": str(len(indices))},
         )
 
-        if not factories:
-            raise HTTPException(
-                status_code=422,
-                detail="No valid factory data found after cleaning. "
-                       "Check that your CSV contains the required columns.",
-            )
+    limit = limit or DEFAULT_PAGE_SIZE
+    end = offset + limit
+    return {
+        "job_id": job_id,
+        "total": len(indices),
+        "limit": limit,
+        "items": table.rows(indices[offset:end].tolist()),
+        "next_cursor": encode_cursor(end, digest) if end < len(indices) else None,
+    }
 
-        # ── Step 4: Generate outputs ──
-        write_summary_csv(factories, str(summary_path))
-        plot_emissions(factories, str(chart_path), config_path=CONFIG_PATH)
-
-        # ── Step 5: Build response ──
-        total_emissions = sum(f.total_emissions for f in factories.values())
-        total_alerts = sum(f.alerts_count for f in factories.values())
-
-        # Per-factory summary
-        factory_details = []
-        for factory in factories.values():
-            history = factory.history
-            monthly_vals = [r["monthly_emissions_kg"] for r in history]
-            factory_details.append({
-                "factory_id": factory.factory_id,
-                "sector": factory.sector,
-                "total_emissions_kg": round(factory.total_emissions, 2),
-                "max_monthly_kg": round(max(monthly_vals), 2) if monthly_vals else 0,
-                "avg_monthly_kg": round(sum(monthly_vals) / len(monthly_vals), 2) if monthly_vals else 0,
-                "alerts": factory.alerts_count,
-                "status": "EXCEEDED" if factory.is_over_cap else "COMPLIANT",
-            })
-
-        # Top violators
-        violators = [
-            {
-                "id": f.factory_id,
-                "sector": f.sector,
-                "total": round(f.total_emissions, 2),
-                "alerts": f.alerts_count,
-            }
-            for f in factories.values()
-            if f.is_over_cap
-        ]
-        violators.sort(key=lambda v: v["total"], reverse=True)
-
-        # Sector breakdown
-        from collections import defaultdict
-        sector_totals: Dict[str, float] = defaultdict(float)
-        sector_counts: Dict[str, int] = defaultdict(int)
-        for f in factories.values():
-            sector_totals[f.sector] += f.total_emissions
-            sector_counts[f.sector] += 1
-
-        sector_breakdown = {
-            sector: {
-                "factories": sector_counts[sector],
-                "total_emissions_kg": round(sector_totals[sector], 2),
-                "avg_per_factory_kg": round(sector_totals[sector] / sector_counts[sector], 2),
-            }
-            for sector in sorted(sector_totals)
-        }
 
-        return {
-            "job_id": job_id,
-            "summary": {
-                "total_factories": len(factories),
-                "total_emissions_kg": round(total_emissions, 2),
-                "total_emissions_tons": round(total_emissions / 1000, 2),
-                "total_alerts": total_alerts,
-                "factories_over_cap": len(violators),
-            },
-            "sector_breakdown": sector_breakdown,
-            "violators": violators[:10],
-            "factories": factory_details,
-            "cleaning_report": cleaning_report,
-            "files": {
-                "audit_csv": f"/outputs/{job_id}/audit_summary_2026.csv",
-                "chart": f"/outputs/{job_id}/emissions_chart.png",
-            },
-        }
+@app.get("/jobs/{job_id}/events", tags=["Audit"])
+async def job_events(
+    job_id: str,
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID", ge=0),
+):
+    """
+    Stream a job's progress as Server-Sent Events (`text/event-stream`).
+
+    Events are `stage`, `progress` (rows cleaned / audited), `alert` (a
+    factory crossed its cap), `results` (a year's summary, sector
+    breakdown and top violators as soon as it is audited), and finally
+    `completed` or `failed`, after which the stream ends. Past events are
+    replayed first, so the stream can be opened at any time; reconnecting
+    with `Last-Event-ID` resumes after that event.
+    """
+    job_dir = OUTPUT_DIR / job_id
+    if read_status(job_dir) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    job_index.touch(job_id)
+    tail = EventTail(job_dir, after=last_event_id or 0)
+
+    async def stream():
+        idle = 0.0
+        while True:
+            # Status first: once it is final, so is the event log
+            status = read_status(job_dir)
+            events = await asyncio.to_thread(tail.read)
+            for event_id, event in events:
+                yield format_event(event_id, event)
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+            if status is None:
+                return  # Deleted while streaming
+            if status["status"] in TERMINAL_EVENTS:
+                # Finished without a final event: its worker died, or the
+                # job predates event logs
+                final = {"event": status["status"], "time": status["updated_at"]}
+                for key in ("status_code", "error", "timings", "rows"):
+                    if key in status:
+                        final[key] = status[key]
+                if status["status"] == "completed":
+                    final["status_url"] = f"/jobs/{job_id}"
+                yield format_event(tail.last_id + 1, final)
+                return
+            if await request.is_disconnected():
+                return
+            idle = 0.0 if events else idle + EVENT_POLL_S
+            if idle >= EVENT_KEEPALIVE_S:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(EVENT_POLL_S)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _job_inputs(job_id: str) -> Path:
+    """A completed job's saved audit inputs (`src.scenarios.INPUTS_FILE`)."""
+    job_dir = OUTPUT_DIR / job_id
+    job = read_status(job_dir)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, not completed.")
+    inputs = job_dir / INPUTS_FILE
+    if not inputs.exists():
+        raise HTTPException(status_code=404, detail="Job has no saved audit inputs.")
+    return inputs
 
+
+@app.post("/jobs/{job_id}/scenarios", tags=["Audit"])
+async def evaluate_scenarios(job_id: str, payload: Dict[str, Any] = Body(...)):
+    """
+    Re-audit a completed job under alternative factors, multipliers and caps.
+
+    The body is `{"scenarios": [...]}`; each scenario overrides parts of the
+    job's config in sectors.json layout (`name`, `sectors.<Sector>.emission_factor`,
+    `sectors.<Sector>.carbon_cap_kg`, `energy_source_multipliers`). All
+    scenarios are evaluated together in one vectorized pass and returned
+    with totals and breach counts next to the job's own `baseline`.
+    """
+    inputs = _job_inputs(job_id)
+    if "scenarios" not in payload:
+        raise HTTPException(status_code=422, detail="Body must hold a 'scenarios' list.")
+
+    start = time.perf_counter()
+    try:
+        result = await jobs.run(
+            f"{job_id}:scenarios:{uuid.uuid4().hex[:8]}", run_scenarios,
+            str(inputs), payload["scenarios"],
+        )
     except ValueError as e:
-        # Cleaning/validation errors
-        _cleanup_job(job_dir)
         raise HTTPException(status_code=422, detail=str(e))
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="scenarios")
+    job_index.touch(job_id)
+    return {"job_id": job_id, **result}
 
-    except HTTPException:
-        raise
 
-    except Exception as e:
-        _cleanup_job(job_dir)
-        traceback.print_exc()
+@app.post("/jobs/{job_id}/uncertainty", tags=["Audit"])
+async def evaluate_uncertainty(job_id: str, payload: Dict[str, Any] = Body(...)):
+    """
+    Monte Carlo confidence bands for a completed job's totals and breaches.
+
+    The body holds `sigma` — standard deviations in sectors.json layout
+    (`sectors.<Sector>.emission_factor.<factor>`, `energy_source_multipliers.<source>`) —
+    and optionally `draws` (default 1000), `percentiles` (default 5, 50, 95)
+    and `seed`. Returns percentiles and breach probabilities per factory,
+    per sector and for the fleet.
+    """
+    inputs = _job_inputs(job_id)
+    unknown = set(payload) - {"sigma", "draws", "percentiles", "seed"}
+    if "sigma" not in payload or unknown:
         raise HTTPException(
-            status_code=500,
-            detail=f"Audit pipeline failed: {str(e)}",
+            status_code=422,
+            detail="Body must hold 'sigma' and may hold 'draws', 'percentiles' and 'seed'.",
+        )
+
+    start = time.perf_counter()
+    try:
+        result = await jobs.run(
+            f"{job_id}:uncertainty:{uuid.uuid4().hex[:8]}", run_uncertainty,
+            str(inputs), payload["sigma"],
+            payload.get("draws", DEFAULT_DRAWS),
+            payload.get("percentiles", DEFAULT_PERCENTILES),
+            payload.get("seed"),
         )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="uncertainty")
+    job_index.touch(job_id)
+    return {"job_id": job_id, **result}
 
 
-@app.get("/outputs/{job_id}/audit_summary_2026.csv", tags=["Downloads"])
-async def download_summary(job_id: str):
-    """Download the audit summary CSV for a given job."""
-    path = OUTPUT_DIR / job_id / "audit_summary_2026.csv"
+@app.get("/outputs/{job_id}/audit_summary_{year}.csv", tags=["Downloads"])
+async def download_summary(job_id: str, year: int):
+    """Download a job's audit summary CSV for one calendar year."""
+    name = summary_filename(year)
+    path = OUTPUT_DIR / job_id / name
     if not path.exists():
         raise HTTPException(status_code=404, detail="Summary file not found.")
+    job_index.touch(job_id)
     return FileResponse(
         path=str(path),
         media_type="text/csv",
-        filename="audit_summary_2026.csv",
+        filename=name,
     )
 
 
-@app.get("/outputs/{job_id}/emissions_chart.png", tags=["Downloads"])
-async def download_chart(job_id: str):
-    """Download the emissions chart PNG for a given job."""
-    path = OUTPUT_DIR / job_id / "emissions_chart.png"
+@app.get("/outputs/{job_id}/emissions_chart.{fmt}", tags=["Downloads"])
+async def download_chart(
+    job_id: str,
+    fmt: str,
+    dpi: int = Query(300, ge=50, le=600, description="Raster resolution"),
+    width: float = Query(15, ge=2, le=40, description="Figure width (inches)"),
+    height: float = Query(9, ge=2, le=40, description="Figure height (inches)"),
+    year: Optional[int] = Query(None, description="Calendar year to chart (default: the latest)"),
+):
+    """
+    Download the emissions chart for a given job (PNG, SVG or WebP).
+
+    Charts are rendered on first request from the job's saved series and
+    cached per (year, format, size, dpi) variant; later requests are plain
+    file downloads. The default variant — the latest year — is
+    `emissions_chart.png`.
+    """
+    if fmt not in CHART_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported chart format. Use one of: {sorted(CHART_MEDIA_TYPES)}",
+        )
+
+    job_dir = OUTPUT_DIR / job_id
+    if year is not None:
+        path = job_dir / f"emissions_chart_{year}_{width:g}x{height:g}_{dpi}dpi.{fmt}"
+    elif (fmt, dpi, width, height) == ("png", 300, 15, 9):
+        path = job_dir / "emissions_chart.png"
+    else:
+        path = job_dir / f"emissions_chart_{width:g}x{height:g}_{dpi}dpi.{fmt}"
+
     if not path.exists():
-        raise HTTPException(status_code=404, detail="Chart file not found.")
+        if not (job_dir / CHART_SERIES_FILE).exists():
+            raise HTTPException(status_code=404, detail="Chart file not found.")
+        start = time.perf_counter()
+        try:
+            await jobs.run(
+                f"{job_id}:{path.name}", render_job_chart,
+                str(job_dir), str(path), dpi, width, height, fmt, year,
+            )
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Job has no data for year {year}.")
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="plot")
+        job_index.refresh_size(job_id)
+    job_index.touch(job_id)
+
     return FileResponse(
         path=str(path),
-        media_type="image/png",
-        filename="emissions_chart.png",
+        media_type=CHART_MEDIA_TYPES[fmt],
+        filename=f"emissions_chart.{fmt}",
+    )
+
+
+@app.get("/outputs/{job_id}/records.{fmt}", tags=["Downloads"])
+async def download_records(job_id: str, fmt: str):
+    """
+    Download the per-month audit records for a given job.
+
+    `parquet` serves the stored file (dictionary-encoded ids, sectors and
+    sources). `csv` is streamed from it one row group at a time, so large
+    jobs never hold the whole CSV in memory.
+    """
+    if fmt not in ("parquet", "csv"):
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported records format. Use one of: ['csv', 'parquet']",
+        )
+    path = OUTPUT_DIR / job_id / RECORDS_FILE
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Records file not found.")
+    job_index.touch(job_id)
+
+    if fmt == "parquet":
+        return FileResponse(
+            path=str(path),
+            media_type="application/vnd.apache.parquet",
+            filename="records.parquet",
+        )
+    return StreamingResponse(
+        iter_records_csv(str(path)),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="records.csv"'},
     )
 
 
@@ -250,14 +805,322 @@ async def cleanup_job(job_id: str):
     job_dir = OUTPUT_DIR / job_id
     if not job_dir.exists():
         raise HTTPException(status_code=404, detail="Job not found.")
-    shutil.rmtree(job_dir)
+    job_index.delete(job_id)
     return {"message": f"Job {job_id} cleaned up.", "job_id": job_id}
 
 
+async def _process_upload(
+    file: UploadFile,
+    config: str,
+    keep_cleaned: bool,
+    wait: bool,
+    tenant: Optional[str],
+    profile: bool,
+    ttl: Optional[int],
+    kind: str,
+) -> JSONResponse:
+    """
+    Save an upload and run (or queue) its audit job.
+
+    ``kind`` is ``upload`` (`run_pipeline`), ``append`` (`run_append`) or
+    ``archive`` (`api.archive.audit_archive`).
+    """
+    # ── Validate file type ──
+    if kind == "archive":
+        fmt = archive_format(file.filename or "")
+        if fmt is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid file type. Please upload a .zip or .tar(.gz/.bz2/.xz) "
+                       "archive of CSV files.",
+            )
+    elif not file.filename or not file.filename.lower().endswith(".csv"):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file type. Please upload a .csv file.",
+        )
+
+    # ── Resolve the named config and tenant ──
+    try:
+        config_path = str(config_registry.path_for(config))
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown config {config!r}. Available: {config_registry.names()}",
+        )
+    state_file = str(_tenant_state_path(tenant)) if tenant is not None else None
+
+    # ── Create unique job directory for this upload ──
+    job_id = uuid.uuid4().hex[:12]
+    job_dir = OUTPUT_DIR / job_id
+    job_dir.mkdir(parents=True, exist_ok=True)
+    job_index.add(
+        job_id, kind, config=config, tenant=tenant, filename=file.filename, ttl_s=ttl,
+    )
+
+    raw_path = job_dir / (f"raw_upload.{fmt}" if kind == "archive" else "raw_upload.csv")
+
+    try:
+        # ── Step 1: Stream upload to disk (CSV header checked on first chunk) ──
+        start = time.perf_counter()
+        upload_digest = await _save_upload(file, raw_path, check_header=kind != "archive")
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage="save")
+
+        if kind == "archive":
+            # Runs on the event loop, submitting each member to the pool
+            fn = _run_archive
+            job_args = (job_id, job_dir, raw_path, fmt, config_path, keep_cleaned)
+            cache_key = None
+        elif kind == "append":
+            fn = run_append
+            job_args = (
+                job_id, str(job_dir), config_path, tenant, state_file, keep_cleaned, profile,
+            )
+            cache_key = None
+        else:
+            fn = run_pipeline
+            job_args = (
+                job_id, str(job_dir), config_path, keep_cleaned, tenant, state_file, profile,
+            )
+            cache_key = None
+            if tenant is None and not profile:
+                # ── Identical upload under the same config? Reuse its job ──
+                config_digest = config_registry.load(config_path, name=config).digest
+                cache_key = ResultCache.key(config_digest, upload_digest, [keep_cleaned])
+                cached_id = results.lookup(cache_key)
+                if cached_id is not None:
+                    _cleanup_job(job_dir)
+                    job_index.touch(cached_id)
+                    return _cached_response(cached_id, wait)
+
+        write_status(job_dir, job_id, "queued", stage="queued", progress=0.0)
+        EventLog(job_dir).emit("stage", stage="queued", progress=0.0)
+        _jobs_in_flight.add(job_id)  # Until `_job_finished`
+        # Tenant state and profiled runs are never served from the result cache
+        cache_header = {"X-Cache": "MISS" if cache_key else "BYPASS"}
+
+        # ── Async mode: hand off and return immediately ──
+        if not wait:
+            if kind == "archive":
+                future = asyncio.ensure_future(fn(*job_args))
+            elif tenant is None:
+                future = jobs.submit(job_id, fn, *job_args)
+            else:
+                future = asyncio.ensure_future(_run_for_tenant(tenant, job_id, fn, *job_args))
+            if isinstance(future, asyncio.Future):
+                _background_tasks.add(future)
+                future.add_done_callback(_background_tasks.discard)
+            future.add_done_callback(lambda f: _record_crash(f, job_dir, job_id))
+            future.add_done_callback(lambda f: _job_finished(job_dir, job_id))
+            if cache_key:
+                future.add_done_callback(lambda f: _cache_result(f, cache_key, job_id))
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "job_id": job_id,
+                    "status": "queued",
+                    "status_url": f"/jobs/{job_id}",
+                    "events_url": f"/jobs/{job_id}/events",
+                },
+                headers=cache_header,
+            )
+
+        # ── Steps 2–6: run in the worker pool, await without blocking ──
+        try:
+            if kind == "archive":
+                response = await fn(*job_args)
+            elif tenant is None:
+                response = await jobs.run(job_id, fn, *job_args)
+            else:
+                response = await _run_for_tenant(tenant, job_id, fn, *job_args)
+        finally:
+            _job_finished(job_dir, job_id)
+        if cache_key:
+            await asyncio.to_thread(results.store, cache_key, job_id)
+        return JSONResponse(response, headers=cache_header)
+
+    except ValueError as e:
+        # Cleaning/validation errors
+        _cleanup_job(job_dir)
+        raise HTTPException(status_code=422, detail=str(e))
+
+    except StateConflictError as e:
+        _cleanup_job(job_dir)
+        raise HTTPException(status_code=409, detail=str(e))
+
+    except HTTPException:
+        _cleanup_job(job_dir)
+        raise
+
+    except Exception as e:
+        _cleanup_job(job_dir)
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Audit pipeline failed: {str(e)}",
+        )
+
+
+def _tenant_state_path(tenant: str) -> Path:
+    try:
+        return state_path(STATE_DIR, tenant)
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid tenant name. Use 1–64 letters, digits, '_' or '-'.",
+        )
+
+
+def _tenant_lock(tenant: str) -> asyncio.Lock:
+    return _tenant_locks.setdefault(tenant, asyncio.Lock())
+
+
+async def _run_archive(
+    job_id: str,
+    job_dir: Path,
+    archive_path: Path,
+    fmt: str,
+    config_path: str,
+    keep_cleaned: bool,
+) -> Dict[str, Any]:
+    """Clean an archive's members side by side in the pool, then audit them."""
+    return await audit_archive(
+        jobs, job_id, job_dir, archive_path, fmt, config_path, keep_cleaned, MAX_UPLOAD_BYTES,
+    )
+
+
+async def _run_for_tenant(
+    tenant: str, job_id: str, fn: Callable[..., Any], *args: Any
+) -> Any:
+    """Run a state-changing job once the tenant's previous one has finished."""
+    async with _tenant_lock(tenant):
+        return await jobs.run(job_id, fn, *args)
+
+
+def _too_large_message() -> str:
+    return f"Upload exceeds the {MAX_UPLOAD_BYTES:,} byte limit."
+
+
+async def _save_upload(file: UploadFile, raw_path: Path, check_header: bool = True) -> str:
+    """
+    Copy an upload to ``raw_path`` in fixed-size chunks.
+
+    Returns the SHA-256 hex digest of the bytes written (the upload's
+    content address for the result cache).
+
+    Peak memory is one chunk regardless of file size. With
+    ``check_header`` (CSV uploads) the header is validated as soon as the
+    first line has arrived, so a file with the wrong columns is rejected
+    before the rest of it is copied. Writing and hashing run in a thread
+    (`_write_chunk`), so a large upload never blocks the event loop.
+
+    Raises
+    ------
+    ValueError
+        If the header is missing required columns.
+    HTTPException
+        413 if the upload exceeds ``MAX_UPLOAD_BYTES``.
+    """
+    digest = hashlib.sha256()
+    written = 0
+    header_checked = not check_header
+    pending = b""
+
+    f = await asyncio.to_thread(open, raw_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+
+            written += len(chunk)
+            if written > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail=_too_large_message())
+
+            if not header_checked:
+                pending += chunk
+                newline = pending.find(b"\n")
+                if newline < 0 and len(pending) <= MAX_HEADER_BYTES:
+                    continue  # Header line not complete yet
+                _check_header(pending[:newline] if newline >= 0 else pending)
+                header_checked = True
+                chunk, pending = pending, b""
+
+            await asyncio.to_thread(_write_chunk, f, digest, chunk)
+
+        if not header_checked:
+            # Whole file is a single line (or empty)
+            _check_header(pending)
+            await asyncio.to_thread(_write_chunk, f, digest, pending)
+    finally:
+        await asyncio.to_thread(f.close)
+
+    return digest.hexdigest()
+
+
+def _write_chunk(f: IO[bytes], digest: Any, chunk: bytes) -> None:
+    """Append one upload chunk and add it to the digest (off the event loop)."""
+    f.write(chunk)
+    digest.update(chunk)
+
+
+def _check_header(header: bytes) -> None:
+    if len(header) > MAX_HEADER_BYTES:
+        raise ValueError("CSV header line is too long.")
+    validate_header(header.decode("utf-8-sig", errors="replace").rstrip("\r"))
+
+
+def _cached_response(job_id: str, wait: bool) -> JSONResponse:
+    """Response for an upload whose results are already cached."""
+    headers = {"X-Cache": "HIT"}
+    if not wait:
+        return JSONResponse(
+            content={
+                "job_id": job_id,
+                "status": "completed",
+                "status_url": f"/jobs/{job_id}",
+                "events_url": f"/jobs/{job_id}/events",
+            },
+            headers=headers,
+        )
+    return JSONResponse(read_result(OUTPUT_DIR / job_id), headers=headers)
+
+
+def _cache_result(future: Future, cache_key: str, job_id: str) -> None:
+    """Done-callback: remember a successful background job."""
+    if not future.cancelled() and future.exception() is None:
+        results.store(cache_key, job_id)
+
+
+def _record_crash(future: Future, job_dir: Path, job_id: str) -> None:
+    """Mark a background job failed if its worker died before reporting."""
+    if future.cancelled() or future.exception() is None:
+        return
+    status = read_status(job_dir) or {}
+    if status.get("status") != "failed":
+        write_status(
+            job_dir, job_id, "failed",
+            status_code=500,
+            error=f"Audit pipeline failed: {future.exception()}",
+        )
+
+
+def _job_finished(job_dir: Path, job_id: str) -> None:
+    """Record a finished job in the metrics and the job index."""
+    _jobs_in_flight.discard(job_id)
+    metrics.observe_job(read_status(job_dir))
+    job_index.finish(job_id)
+
+
 def _cleanup_job(job_dir: Path) -> None:
     """Remove a job directory on error (best effort)."""
     try:
-        if job_dir.exists():
-            shutil.rmtree(job_dir)
+        job_index.delete(job_dir.name)
     except Exception:
         pass
+
+
+# ── Serve remaining output files ──
+# Mounted last so the explicit /outputs/... routes above take precedence.
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+app.mount("/outputs", StaticFiles(directory=str(OUTPUT_DIR)), name="outputs")
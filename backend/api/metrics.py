@@ -0,0 +1,236 @@
+"""Carbon-Trace: Prometheus-style metrics for the API.
+
+A small, dependency-free registry of counters, gauges and histograms that
+renders the Prometheus text exposition format for `GET /metrics`.
+Recording a sample is a dict lookup, a `bisect` and an addition under a
+lock, so instrumentation can stay on under load.
+
+Metrics live in the API process. Pipeline stages run in pool workers and
+report their timings through `status.json`; the API observes them when a
+job finishes (see `observe_job`). With several API processes, each
+exposes its own counts.
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond routes up to multi-minute uploads
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric(ABC):
+    """Base class: a named metric family with fixed label names."""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Mapping[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines of the metric's current values."""
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        # An unlabeled counter reports 0 before its first increment
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._labels(k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, set directly or read at scrape time."""
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation)
+        self._value = 0.0
+        self._function = function
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the value with ``function`` whenever metrics are scraped."""
+        self._function = function
+
+    def value(self) -> float:
+        return float(self._function()) if self._function else self._value
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_number(self.value())}"]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum."""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values → [count per bucket (+Inf last), sum]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][i] += 1
+            series[1][0] += value
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = 'le="%s"' % ("+Inf" if bound == math.inf else _number(bound))
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """An ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# ── Process-wide registry ──
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "carbon_trace_http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "carbon_trace_http_request_duration_seconds",
+    "Time to the response start of each HTTP request, by route template.",
+    ("method", "route"),
+))
+STAGE_SECONDS = registry.register(Histogram(
+    "carbon_trace_stage_duration_seconds",
+    "Duration of each pipeline stage (save, clean, audit, summary, response, plot)"
+    " and on-demand evaluation (scenarios, uncertainty).",
+    ("stage",),
+))
+JOBS = registry.register(Counter(
+    "carbon_trace_jobs_total",
+    "Finished audit jobs by outcome.",
+    ("status",),
+))
+ROWS_PROCESSED = registry.register(Counter(
+    "carbon_trace_rows_processed_total",
+    "Uploaded CSV rows read by the cleaning stage.",
+))
+ROWS_DROPPED = registry.register(Counter(
+    "carbon_trace_rows_dropped_total",
+    "Rows removed by cleaning (invalid sectors, non-numeric, negative, duplicates).",
+))
+JOBS_IN_FLIGHT = registry.register(Gauge(
+    "carbon_trace_jobs_in_flight",
+    "Upload, append and archive jobs accepted by this process that have not finished.",
+))
+OUTPUT_DIR_BYTES = registry.register(Gauge(
+    "carbon_trace_output_dir_bytes",
+    "Disk space used by job output directories.",
+))
+
+
+def observe_job(status: Optional[Mapping[str, Any]]) -> None:
+    """Record a finished job's outcome, stage timings and row counts."""
+    if not status or status.get("status") not in ("completed", "failed"):
+        return
+    JOBS.inc(status=status["status"])
+    for stage, seconds in (status.get("timings") or {}).items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    rows = status.get("rows") or {}
+    ROWS_PROCESSED.inc(rows.get("input", 0))
+    ROWS_DROPPED.inc(rows.get("dropped", 0))
+
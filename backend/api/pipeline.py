@@ -0,0 +1,750 @@
+"""Carbon-Trace: Audit pipeline job (runs inside pool worker processes).
+
+Everything here executes in a worker of the API's process pool, never on
+the FastAPI event loop. Progress is reported through `status.json` in the
+job directory, so any API process can answer `GET /jobs/{job_id}`, and
+as a stream of events in `events.ndjson` for `GET /jobs/{job_id}/events`
+(see `api.events`): stage transitions, rows cleaned and audited, an alert
+as each factory crosses its cap, and each year's results as soon as it is
+audited — ahead of the summary files and the chart.
+
+Job lifecycle:
+    queued → running (stages: clean, audit, summary, response) → completed | failed
+
+The first stage also marks the job running in the job index the worker was
+started with (`warm_worker`), so `GET /jobs?status=running` lists it.
+
+The wall time of each stage and the job's row counts are saved in the
+final status (`timings`, `rows`) for `api.metrics`. Jobs run with
+``profile=True`` also render the chart (stage `plot`) and save a cProfile /
+tracemalloc capture of every stage as `profile.zip` (see `api.profiling`).
+
+`run_append` is the incremental variant: it continues a tenant's saved
+factory state (see `api.tenant_state`) with the uploaded months only.
+`run_archive` audits the CSVs of an archive upload as one fleet, once
+their members have been cleaned side by side (see `api.archive`).
+
+Caps are annual: an upload with a ``year`` column is audited one calendar
+year at a time (`src.runner.split_years`), so running totals restart every
+January, and each year gets its own summary CSV (`audit_summary_<year>.csv`),
+chart and response section. Uploads without it are `DEFAULT_YEAR`.
+
+The chart is not drawn here: the job saves the few series it needs to
+`chart_series.json`, and `render_job_chart` draws a variant on first download.
+Per-factory rows are saved to `factories.json` and served page by page
+from `GET /jobs/{job_id}/factories` (see `api.factory_results`), so the
+response itself stays the same size however large the fleet.
+Per-month audit records are exported to `records.parquet` when pyarrow is
+installed (see `src.export`). The cleaned inputs themselves are kept as
+`audit_inputs.npz` for what-if scenarios (see `src.scenarios`).
+
+Configuration (environment):
+    CARBON_TRACE_CHUNKED_CLEAN_BYTES  Uploads larger than this are cleaned
+                                      out-of-core (default: 256 MiB)
+    CARBON_TRACE_CLEAN_CHUNK_ROWS     Rows per chunk in that mode (default: 500,000)
+    CARBON_TRACE_AUDIT_WORKERS        Processes for one job's audit, sharded by
+                                      factory_id (default: 1 — the pool already
+                                      runs jobs side by side)
+    CARBON_TRACE_PARALLEL_AUDIT_ROWS  Minimum cleaned rows before a job's audit
+                                      is sharded (default: 1,000,000)
+"""
+
+import json
+import os
+import shutil
+import time
+import traceback
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+CHUNKED_CLEAN_BYTES = int(os.environ.get("CARBON_TRACE_CHUNKED_CLEAN_BYTES", 256 * 1024**2))
+CLEAN_CHUNK_ROWS = int(os.environ.get("CARBON_TRACE_CLEAN_CHUNK_ROWS", 500_000))
+AUDIT_WORKERS = int(os.environ.get("CARBON_TRACE_AUDIT_WORKERS", 1))
+PARALLEL_AUDIT_ROWS = int(os.environ.get("CARBON_TRACE_PARALLEL_AUDIT_ROWS", 1_000_000))
+
+STATUS_FILE = "status.json"
+RESULT_FILE = "result.json"
+CHART_SERIES_FILE = "chart_series.json"
+RECORDS_FILE = "records.parquet"
+
+# Fraction of the job completed when each stage starts
+STAGE_PROGRESS = {
+    "queued": 0.0,
+    "clean": 0.1,
+    "audit": 0.4,
+    "summary": 0.8,
+    "plot": 0.9,
+    "response": 0.95,
+    "completed": 1.0,
+}
+
+
+# Job index whose rows `StageTimer` marks running (see `use_job_index`)
+_job_index: Optional[Any] = None
+
+
+def use_job_index(job_index: Any) -> None:
+    """Mark this process's jobs running in ``job_index`` as they start."""
+    global _job_index
+    _job_index = job_index
+
+
+def warm_worker(job_index: Optional[Any] = None) -> None:
+    """
+    Pool initializer: import the heavy libraries once per worker.
+
+    ``job_index`` (an `api.job_index.JobIndex`) is told when each job the
+    worker picks up starts running.
+    """
+    if job_index is not None:
+        use_job_index(job_index)
+    import pandas  # noqa: F401
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    import web_pipeline  # noqa: F401
+    import src.runner  # noqa: F401
+    from src.config import registry
+    for name in registry.names():
+        registry.get(name)  # Compile configs before the first job
+
+
+def write_status(job_dir: Path, job_id: str, status: str, **fields: Any) -> None:
+    """Atomically replace the job's status.json."""
+    payload = {
+        "job_id": job_id,
+        "status": status,
+        "updated_at": time.time(),
+        **fields,
+    }
+    tmp = job_dir / f".{STATUS_FILE}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, job_dir / STATUS_FILE)
+
+
+def read_status(job_dir: Path) -> Dict[str, Any] | None:
+    """Return the job's status dict, or None if the job is unknown."""
+    try:
+        with open(job_dir / STATUS_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def read_result(job_dir: Path) -> Dict[str, Any] | None:
+    """Return the completed job's JSON response, or None."""
+    try:
+        with open(job_dir / RESULT_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class StageTimer:
+    """
+    Reports a job's stage transitions and times each stage.
+
+    `stage` ends the current stage and starts the next one, updating
+    status.json and emitting a ``stage`` event to `events`; `timings` holds
+    the seconds spent in each finished stage.
+    With ``profile=True`` each stage is also captured by a `StageProfiler`.
+    """
+
+    def __init__(self, job_dir: Path, job_id: str, profile: bool = False):
+        from api.events import EventLog
+        from api.profiling import StageProfiler
+
+        self.job_dir = job_dir
+        self.job_id = job_id
+        self.events = EventLog(job_dir)
+        self.timings: Dict[str, float] = {}
+        self.profiler = StageProfiler() if profile else None
+        self._current: Optional[str] = None
+        self._started = 0.0
+
+    def stage(self, stage: str) -> None:
+        first = self._current is None and not self.timings
+        self.stop()
+        write_status(
+            self.job_dir, self.job_id, "running",
+            stage=stage, progress=STAGE_PROGRESS[stage],
+        )
+        if first and _job_index is not None:
+            _job_index.start(self.job_id)
+        self.events.emit("stage", stage=stage, progress=STAGE_PROGRESS[stage])
+        self._current = stage
+        self._started = time.perf_counter()
+        if self.profiler:
+            self.profiler.start(stage)
+
+    def stop(self) -> Dict[str, float]:
+        """End the current stage; return all timings so far."""
+        if self._current is not None:
+            if self.profiler:
+                self.profiler.stop()
+            elapsed = time.perf_counter() - self._started
+            self.timings[self._current] = self.timings.get(self._current, 0.0) + elapsed
+            self._current = None
+        return self.timings
+
+    def save_profile(self) -> None:
+        """Write the job's `profile.zip`, if it is being profiled."""
+        if self.profiler:
+            self.profiler.write(self.job_dir, self.job_id)
+
+
+def run_pipeline(
+    job_id: str,
+    job_dir: str,
+    config_path: str,
+    keep_cleaned: bool = False,
+    tenant: Optional[str] = None,
+    state_file: Optional[str] = None,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    """
+    Clean → audit → summary → chart for an upload already saved to disk.
+
+    Parameters
+    ----------
+    job_id : str
+        Job identifier (also the output directory name).
+    job_dir : str
+        Directory containing `raw_upload.csv`; outputs are written here.
+    config_path : str
+        Path to sectors.json config.
+    keep_cleaned : bool
+        Also write the cleaned rows to `cleaned.csv`.
+    tenant, state_file : str, optional
+        Save the audited factories as ``tenant``'s state snapshot at
+        ``state_file``, replacing any previous state.
+    profile : bool
+        Profile every stage and save `profile.zip` (see `api.profiling`).
+
+    Returns
+    -------
+    dict
+        The `/upload-csv` JSON response (also saved to `result.json`).
+        Top-level results describe the latest year in the upload; ``years``
+        holds the same for every year.
+
+    Raises
+    ------
+    ValueError
+        If the CSV fails validation or has no valid factory rows. The failure
+        is recorded in status.json with ``status_code`` 422 (500 otherwise).
+    """
+    from web_pipeline import clean_csv, clean_frame
+    from src.config import get_config
+    from src.scenarios import INPUTS_FILE, save_inputs
+    from src.vectorized import read_audit_csv
+
+    job_path = Path(job_dir)
+    raw_path = job_path / "raw_upload.csv"
+    cleaned_path = job_path / "cleaned.csv"
+    timer = StageTimer(job_path, job_id, profile=profile)
+    try:
+        timer.stage("clean")
+        if raw_path.stat().st_size > CHUNKED_CLEAN_BYTES:
+            # ── Large upload: clean out-of-core, audit from the cleaned file ──
+            _, cleaning_report = clean_csv(
+                str(raw_path), str(cleaned_path), chunksize=CLEAN_CHUNK_ROWS,
+                progress=lambda rows: timer.events.emit("progress", stage="clean", rows=rows),
+            )
+            _cleaned(timer, cleaning_report)
+            timer.stage("audit")
+            cleaned_df = read_audit_csv(str(cleaned_path))
+            save_inputs(cleaned_df, str(job_path / INPUTS_FILE), get_config(config_path))
+            years = _audit(cleaned_df, config_path, timer)
+            del cleaned_df
+            if not keep_cleaned:
+                cleaned_path.unlink()
+        else:
+            # ── Step 1: Clean the CSV (in memory) ──
+            cleaned_df, cleaning_report = clean_frame(str(raw_path))
+            _cleaned(timer, cleaning_report)
+            if keep_cleaned:
+                cleaned_df.to_csv(cleaned_path, index=False)
+
+            # ── Step 2: Run Carbon-Trace audit on the cleaned frame ──
+            timer.stage("audit")
+            save_inputs(cleaned_df, str(job_path / INPUTS_FILE), get_config(config_path))
+            years = _audit(cleaned_df, config_path, timer)
+            del cleaned_df
+
+        _check_factories(years)
+
+        # ── Steps 3–4: Generate outputs, build response ──
+        response = _write_outputs(
+            timer, years, config_path, cleaning_report, keep_cleaned
+        )
+        if state_file:
+            from api.tenant_state import save_state, snapshot_factories
+            save_state(state_file, snapshot_factories(tenant, years, get_config(config_path)))
+        _complete(timer, response)
+        return response
+
+    except Exception as e:
+        record_failure(timer, e)
+        raise
+
+
+def run_append(
+    job_id: str,
+    job_dir: str,
+    config_path: str,
+    tenant: str,
+    state_file: str,
+    keep_cleaned: bool = False,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    """
+    Clean → continue ``tenant``'s saved state with the uploaded months.
+
+    Factories are restored from the snapshot at ``state_file`` and only the
+    new rows are fed through their auditor closures, so the cost is
+    O(new rows); the results equal a full re-upload of all months. Rows
+    for a (year, month) at or before a factory's last recorded one are
+    skipped; rows of a new year start that year's totals from zero.
+    Without saved state this starts a fresh one under ``config_path``.
+
+    Returns
+    -------
+    dict
+        The `/upload-csv` JSON response for the whole updated state, plus
+        a ``state`` section describing the append.
+
+    Raises
+    ------
+    ValueError
+        If the CSV or the snapshot is invalid (status_code 422).
+    api.tenant_state.StateConflictError
+        If the state's config changed since it was saved (status_code 409).
+    """
+    from web_pipeline import clean_frame
+    from src.config import DEFAULT_YEAR, get_config
+    from src.runner import run_audit_frame, split_years
+    from api.tenant_state import (
+        load_state, restore_factories, save_state, snapshot_factories, state_config,
+    )
+
+    job_path = Path(job_dir)
+    timer = StageTimer(job_path, job_id, profile=profile)
+    try:
+        timer.stage("clean")
+        cleaned_df, cleaning_report = clean_frame(str(job_path / "raw_upload.csv"))
+        _cleaned(timer, cleaning_report)
+        if keep_cleaned:
+            cleaned_df.to_csv(job_path / "cleaned.csv", index=False)
+
+        timer.stage("audit")
+        snapshot = load_state(state_file)
+        if snapshot is None:
+            config = get_config(config_path)
+            years = {}
+        else:
+            config = state_config(snapshot)
+            years = restore_factories(snapshot, config)
+            del snapshot
+
+        # ── Skip months at or before a factory's last recorded (year, month) ──
+        last_period = {}
+        for year, factories in years.items():  # Oldest year first
+            for fid, f in factories.items():
+                if f.last_month is not None:
+                    last_period[fid] = year * 100 + f.last_month
+        uploaded_year = cleaned_df["year"] if "year" in cleaned_df else DEFAULT_YEAR
+        period = uploaded_year * 100 + cleaned_df["month"].astype("int64")
+        recorded = cleaned_df["factory_id"].map(last_period)
+        stale = recorded.notna() & (period <= recorded)
+        rows_skipped = int(stale.sum())
+        if rows_skipped:
+            cleaned_df = cleaned_df[~stale]
+            cleaning_report["actions"].append(
+                f"Skipped {rows_skipped} rows for months already in the saved state"
+            )
+
+        new_records = []
+        for year, part in split_years(cleaned_df):
+            factories = years.setdefault(year, {})
+            new_records += run_audit_frame(
+                part, config.path, factories=factories,
+                on_alert=_alert_callback(timer, year),
+            )[1]
+            _audited(timer, year, factories, len(new_records), len(cleaned_df))
+        del cleaned_df
+        years = dict(sorted(years.items()))
+        _check_factories(years)
+
+        response = _write_outputs(
+            timer, years, config.path, cleaning_report, keep_cleaned
+        )
+        response["state"] = {
+            "tenant": tenant,
+            "config": config.name,
+            "months_appended": len(new_records),
+            "rows_skipped": rows_skipped,
+            "factories_updated": len({r["factory_id"] for r in new_records}),
+        }
+        save_state(state_file, snapshot_factories(tenant, years, config))
+        _complete(timer, response)
+        return response
+
+    except Exception as e:
+        record_failure(timer, e)
+        raise
+
+
+def run_archive(
+    job_id: str,
+    job_dir: str,
+    config_path: str,
+    members: List[Dict[str, Any]],
+    clean_seconds: float = 0.0,
+    keep_cleaned: bool = False,
+) -> Dict[str, Any]:
+    """
+    Audit the cleaned members of an archive upload as one fleet.
+
+    Parameters
+    ----------
+    job_id, job_dir, config_path, keep_cleaned
+        As for `run_pipeline`.
+    members : list[dict]
+        `api.archive.clean_member` results for every CSV in the archive,
+        in archive order; their rows are spilled under ``members/``.
+    clean_seconds : float
+        Time spent cleaning the members, reported as the ``clean`` stage.
+
+    Returns
+    -------
+    dict
+        The `/upload-csv` JSON response for the merged fleet, plus
+        ``members``: each file's own cleaning report (or ``error``).
+
+    Raises
+    ------
+    ValueError
+        If no member is valid or none has valid factory rows (status_code 422).
+    """
+    from api.archive import MEMBERS_DIR, merge_members
+    from src.config import get_config
+    from src.scenarios import INPUTS_FILE, save_inputs
+
+    job_path = Path(job_dir)
+    timer = StageTimer(job_path, job_id)
+    timer.timings["clean"] = clean_seconds
+    try:
+        # Merging the members (cross-file duplicates) is part of the audit stage
+        timer.stage("audit")
+        cleaned_df, cleaning_report = merge_members(job_path, members)
+        shutil.rmtree(job_path / MEMBERS_DIR, ignore_errors=True)
+        if keep_cleaned:
+            cleaned_df.to_csv(job_path / "cleaned.csv", index=False)
+        save_inputs(cleaned_df, str(job_path / INPUTS_FILE), get_config(config_path))
+        years = _audit(cleaned_df, config_path, timer)
+        del cleaned_df
+        _check_factories(years)
+
+        response = _write_outputs(
+            timer, years, config_path, cleaning_report, keep_cleaned
+        )
+        response["members"] = members
+        _complete(timer, response)
+        return response
+
+    except Exception as e:
+        shutil.rmtree(job_path / MEMBERS_DIR, ignore_errors=True)
+        record_failure(timer, e)
+        raise
+
+
+def _audit(df: Any, config_path: str, timer: StageTimer) -> Dict[int, Dict[str, Any]]:
+    """Audit a cleaned frame year by year; large years are sharded across processes."""
+    from src.runner import notify_alerts, run_audit_frame, split_years
+
+    years = {}
+    rows = 0
+    for year, part in split_years(df):
+        on_alert = _alert_callback(timer, year)
+        if AUDIT_WORKERS > 1 and len(part) >= PARALLEL_AUDIT_ROWS:
+            from src.parallel import audit_parallel
+            years[year], _ = audit_parallel(part, config_path, AUDIT_WORKERS, with_records=False)
+            notify_alerts(years[year], on_alert)
+        else:
+            years[year], _ = run_audit_frame(part, config_path=config_path, on_alert=on_alert)
+        rows += len(part)
+        _audited(timer, year, years[year], rows, len(df))
+    return years
+
+
+# ── Progress events (see `api.events`) ──
+
+def _cleaned(timer: StageTimer, report: dict) -> None:
+    timer.events.emit(
+        "progress", stage="clean",
+        rows=report["original_rows"], cleaned=report["cleaned_rows"],
+    )
+
+
+def _alert_callback(timer: StageTimer, year: int):
+    """An `on_alert` callback (see `src.runner`) emitting ``alert`` events for ``year``."""
+    return lambda factory, record: timer.events.alert(year, factory, record)
+
+
+def _audited(
+    timer: StageTimer, year: int, factories: Dict[str, Any], rows: int, total: int
+) -> None:
+    """Report audit progress and ``year``'s results, before any file is written."""
+    timer.events.emit("progress", stage="audit", rows=rows, total=total)
+    if factories:
+        results = _year_results(timer.job_id, year, factories)
+        del results["files"]  # Not written yet
+        timer.events.emit("results", year=year, **results)
+
+
+def _check_factories(years: Dict[int, Dict[str, Any]]) -> None:
+    if not any(years.values()):
+        raise ValueError(
+            "No valid factory data found after cleaning. "
+            "Check that your CSV contains the required columns."
+        )
+
+
+def summary_filename(year: int) -> str:
+    """Name of a job's audit summary CSV for ``year``."""
+    return f"audit_summary_{year}.csv"
+
+
+def _write_outputs(
+    timer: StageTimer,
+    years: Dict[int, Dict[str, Any]],
+    config_path: str,
+    cleaning_report: dict,
+    keep_cleaned: bool,
+) -> Dict[str, Any]:
+    """Summary CSVs, chart series and records for a finished audit; returns the response."""
+    from api.factory_results import FACTORIES_FILE, write_factories
+    from src import export
+    from src.config import get_config
+    from src.runner import select_chart_series, write_summary_csv
+
+    job_path, job_id = timer.job_dir, timer.job_id
+    timer.stage("summary")
+    for year, factories in years.items():
+        write_summary_csv(factories, str(job_path / summary_filename(year)))
+    # Chart inputs only — rendering is deferred to the first download
+    with open(job_path / CHART_SERIES_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "years": {
+                str(year): select_chart_series(factories)
+                for year, factories in years.items()
+            },
+            "caps": get_config(config_path).caps,
+        }, f)
+    write_factories(years, str(job_path / FACTORIES_FILE))
+    if export.AVAILABLE:
+        export.write_records_parquet(years, str(job_path / RECORDS_FILE))
+    if timer.profiler:
+        # Profiled jobs draw the default chart now so plotting is captured too
+        timer.stage("plot")
+        render_job_chart(str(job_path), str(job_path / "emissions_chart.png"), 300, 15, 9, "png")
+    timer.stage("response")
+    return build_response(
+        job_id, years, cleaning_report, keep_cleaned,
+        records=export.AVAILABLE, profile=timer.profiler is not None,
+    )
+
+
+def _complete(timer: StageTimer, response: Dict[str, Any]) -> None:
+    with open(timer.job_dir / RESULT_FILE, "w", encoding="utf-8") as f:
+        json.dump(response, f)
+    timings = timer.stop()
+    timer.save_profile()
+    report = response["cleaning_report"]
+    rows = {
+        "input": report["original_rows"],
+        "cleaned": report["cleaned_rows"],
+        "dropped": report["rows_removed"],
+    }
+    # The event goes first: once status.json says completed, the log is final
+    timer.events.emit(
+        "completed", status_url=f"/jobs/{timer.job_id}", timings=timings, rows=rows,
+    )
+    write_status(
+        timer.job_dir, timer.job_id, "completed",
+        stage="completed", progress=1.0,
+        timings=timings,
+        rows=rows,
+    )
+
+
+def record_failure(timer: StageTimer, error: Exception) -> None:
+    """Record a failed job; validation errors → 422, state conflicts → 409."""
+    from api.tenant_state import StateConflictError
+
+    if isinstance(error, ValueError):
+        status_code = 422
+    elif isinstance(error, StateConflictError):
+        status_code = 409
+    else:
+        status_code = 500
+        traceback.print_exc()
+    timings = timer.stop()
+    try:
+        timer.save_profile()
+    except Exception:
+        traceback.print_exc()  # Never mask the job's own error
+    try:
+        timer.events.emit("failed", status_code=status_code, error=str(error))
+    except Exception:
+        traceback.print_exc()
+    write_status(
+        timer.job_dir, timer.job_id, "failed",
+        status_code=status_code,
+        error=str(error),
+        timings=timings,
+    )
+
+
+def render_job_chart(
+    job_dir: str,
+    output_path: str,
+    dpi: int,
+    width: float,
+    height: float,
+    fmt: str,
+    year: Optional[int] = None,
+) -> str:
+    """
+    Render one chart variant for a job from its saved `chart_series.json`.
+
+    ``year`` picks the calendar year to draw (default: the latest). The
+    image is written to a temporary name and atomically moved into place,
+    so concurrent requests for the same variant never see a partial file.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the job has no saved chart series.
+    KeyError
+        If the job has no data for ``year``.
+    """
+    from src.config import DEFAULT_YEAR
+    from src.runner import render_chart
+
+    with open(Path(job_dir) / CHART_SERIES_FILE, encoding="utf-8") as f:
+        saved = json.load(f)
+    # Jobs saved before charts were kept per year hold a single "series"
+    by_year = saved.get("years") or {str(DEFAULT_YEAR): saved["series"]}
+    if year is None:
+        year = max(int(y) for y in by_year)
+
+    series = by_year[str(year)]
+    tmp = f"{output_path}.{os.getpid()}.tmp"
+    render_chart(
+        series, tmp,
+        caps=saved.get("caps"), dpi=dpi, figsize=(width, height), fmt=fmt, year=year,
+    )
+    os.replace(tmp, output_path)
+    return output_path
+
+
+def build_response(
+    job_id: str,
+    years: Dict[int, Dict[str, Any]],
+    cleaning_report: dict,
+    keep_cleaned: bool = False,
+    records: bool = False,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    """
+    Assemble the structured JSON result for a finished audit.
+
+    ``years`` maps calendar year → factory_id → Industry. The top-level
+    ``summary``, ``sector_breakdown`` and ``violators`` describe the latest
+    year (``year``); ``years`` has the same, plus its files, for each year.
+    """
+    sections = {
+        str(year): _year_results(job_id, year, factories)
+        for year, factories in sorted(years.items())
+    }
+    latest = max(years)
+    current = sections[str(latest)]
+
+    files = {
+        "audit_csv": current["files"]["audit_csv"],
+        "chart": f"/outputs/{job_id}/emissions_chart.png",
+    }
+    if keep_cleaned:
+        files["cleaned_csv"] = f"/outputs/{job_id}/cleaned.csv"
+    if records:
+        files["records_parquet"] = f"/outputs/{job_id}/records.parquet"
+        files["records_csv"] = f"/outputs/{job_id}/records.csv"
+    if profile:
+        files["profile"] = f"/outputs/{job_id}/profile.zip"
+
+    return {
+        "job_id": job_id,
+        "year": latest,
+        "summary": current["summary"],
+        "sector_breakdown": current["sector_breakdown"],
+        "violators": current["violators"],
+        "years": sections,
+        "factories_url": f"/jobs/{job_id}/factories",
+        "cleaning_report": cleaning_report,
+        "files": files,
+    }
+
+
+def _year_results(job_id: str, year: int, factories: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary, sector breakdown, top violators and files of one audited year."""
+    total_emissions = sum(f.total_emissions for f in factories.values())
+    total_alerts = sum(f.alerts_count for f in factories.values())
+
+    # Top violators
+    violators = [
+        {
+            "id": f.factory_id,
+            "sector": f.sector,
+            "total": round(f.total_emissions, 2),
+            "alerts": f.alerts_count,
+        }
+        for f in factories.values()
+        if f.is_over_cap
+    ]
+    violators.sort(key=lambda v: v["total"], reverse=True)
+
+    # Sector breakdown
+    sector_totals: Dict[str, float] = defaultdict(float)
+    sector_counts: Dict[str, int] = defaultdict(int)
+    for f in factories.values():
+        sector_totals[f.sector] += f.total_emissions
+        sector_counts[f.sector] += 1
+
+    sector_breakdown = {
+        sector: {
+            "factories": sector_counts[sector],
+            "total_emissions_kg": round(sector_totals[sector], 2),
+            "avg_per_factory_kg": round(sector_totals[sector] / sector_counts[sector], 2),
+        }
+        for sector in sorted(sector_totals)
+    }
+
+    return {
+        "summary": {
+            "total_factories": len(factories),
+            "total_emissions_kg": round(total_emissions, 2),
+            "total_emissions_tons": round(total_emissions / 1000, 2),
+            "total_alerts": total_alerts,
+            "factories_over_cap": len(violators),
+        },
+        "sector_breakdown": sector_breakdown,
+        "violators": violators[:10],
+        "files": {
+            "audit_csv": f"/outputs/{job_id}/{summary_filename(year)}",
+            "chart": f"/outputs/{job_id}/emissions_chart.png?year={year}",
+        },
+    }
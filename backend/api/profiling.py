@@ -0,0 +1,133 @@
+"""Carbon-Trace: Opt-in per-job profiling (`?profile=1`).
+
+A `StageProfiler` wraps each pipeline stage of one job in a cProfile
+capture and tracks its tracemalloc peak. When the job ends, everything is
+bundled as `profile.zip` in the job's output directory:
+
+    profile.json     per stage: seconds, peak traced memory, top
+                     allocations and the hottest functions
+    <stage>.prof     raw cProfile data (`python -m pstats`, snakeviz, ...)
+    <stage>.txt      the same, as a pstats report sorted by cumulative time
+
+Profiling slows a job down several times over and only covers the worker
+process; sharded audits (`CARBON_TRACE_AUDIT_WORKERS`) are profiled as
+one call into the shard pool.
+"""
+
+import cProfile
+import io
+import json
+import linecache
+import marshal
+import pstats
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PROFILE_FILE = "profile.zip"
+
+# Entries kept per stage
+TOP_ALLOCATIONS = 10
+TOP_FUNCTIONS = 25
+
+
+class StageProfiler:
+    """cProfile + tracemalloc capture of each stage of one job."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._current: Optional[str] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._started = 0.0
+        self._own_tracing = False
+
+    def start(self, stage: str) -> None:
+        """Begin capturing ``stage`` (ends the current one first)."""
+        self.stop()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+        tracemalloc.reset_peak()
+        self._current = stage
+        self._profile = self._profiles.setdefault(stage, cProfile.Profile())
+        self._started = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """End the current stage's capture, if any."""
+        if self._current is None:
+            return
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        current, peak = tracemalloc.get_traced_memory()
+        # Leave out memory held by the profiler itself
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        top = snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+
+        entry = self.stages.setdefault(self._current, {"seconds": 0.0, "peak_memory_bytes": 0})
+        entry["seconds"] += elapsed
+        entry["peak_memory_bytes"] = max(entry["peak_memory_bytes"], peak)
+        entry["memory_at_end_bytes"] = current
+        entry["top_allocations"] = [_allocation(stat) for stat in top]
+        self._current = None
+        self._profile = None
+
+    def close(self) -> None:
+        """Stop capturing and release tracemalloc."""
+        self.stop()
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+
+    def write(self, job_dir: Path, job_id: str) -> Path:
+        """Bundle the capture as `profile.zip` in ``job_dir``; return its path."""
+        self.close()
+        stages = {}
+        path = Path(job_dir) / PROFILE_FILE
+        tmp = path.with_suffix(".zip.tmp")
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for stage, entry in self.stages.items():
+                report = io.StringIO()
+                stats = pstats.Stats(self._profiles[stage], stream=report)
+                stages[stage] = {**entry, "top_functions": _functions(stats)}
+                # Same bytes as `Stats.dump_stats`
+                zf.writestr(f"{stage}.prof", marshal.dumps(stats.stats))
+                stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS * 2)
+                zf.writestr(f"{stage}.txt", report.getvalue())
+            zf.writestr("profile.json", json.dumps(
+                {"job_id": job_id, "created_at": time.time(), "stages": stages}, indent=2,
+            ))
+        tmp.replace(path)
+        return path
+
+
+def _allocation(stat: tracemalloc.Statistic) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "line": linecache.getline(frame.filename, frame.lineno).strip(),
+        "size_bytes": stat.size,
+        "blocks": stat.count,
+    }
+
+
+def _functions(stats: pstats.Stats) -> List[Dict[str, Any]]:
+    """Hottest functions of a capture, by cumulative time."""
+    rows = []
+    for (filename, lineno, name), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{lineno}({name})",
+            "calls": nc,
+            "primitive_calls": cc,
+            "total_seconds": tt,
+            "cumulative_seconds": ct,
+        })
+    rows.sort(key=lambda r: r["cumulative_seconds"], reverse=True)
+    return rows[:TOP_FUNCTIONS]
@@ -0,0 +1,153 @@
+"""Carbon-Trace: Content-addressed cache of completed audit jobs.
+
+A cache key hashes together the effective config's digest (SHA-256 of its
+sectors.json), the upload's digest and any options that change the outputs. Each entry is a small
+pointer file, ``<cache_dir>/<key>.json``, naming the completed job whose
+outputs and `result.json` can be reused as-is.
+
+Entries are evicted least-recently-used first when they have not been hit
+for ``max_age_s`` seconds or when the cached jobs' outputs exceed
+``max_bytes``. Evicting an entry deletes its job with ``delete_job``
+(`api.job_index.JobIndex.delete` in the API, so the job index forgets it
+too).
+
+Configuration (environment):
+    CARBON_TRACE_CACHE_MAX_BYTES   Disk budget for cached jobs (default: 5 GiB;
+                                   0 disables the cache)
+    CARBON_TRACE_CACHE_MAX_AGE_S   Idle time before an entry expires (default: 7 days)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from api.pipeline import read_status
+
+
+def dir_size(path: Path) -> int:
+    """Total size in bytes of the files directly inside ``path``."""
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat().st_size
+    except FileNotFoundError:
+        pass
+    return total
+
+
+class ResultCache:
+    """Maps upload content hashes to completed job directories."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        output_dir: Path,
+        max_bytes: Optional[int] = None,
+        max_age_s: Optional[float] = None,
+        delete_job: Optional[Callable[[str], None]] = None,
+    ):
+        self._cache_dir = Path(cache_dir)
+        self._output_dir = Path(output_dir)
+        self._delete_job = delete_job or (
+            lambda job_id: shutil.rmtree(self._output_dir / job_id, ignore_errors=True)
+        )
+        self.max_bytes = (
+            max_bytes if max_bytes is not None
+            else int(os.environ.get("CARBON_TRACE_CACHE_MAX_BYTES", 5 * 1024**3))
+        )
+        self.max_age_s = (
+            max_age_s if max_age_s is not None
+            else float(os.environ.get("CARBON_TRACE_CACHE_MAX_AGE_S", 7 * 24 * 3600))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(config_digest: str, upload_digest: str, options: Iterable[Any] = ()) -> str:
+        """Cache key for an upload digest under a given config and options."""
+        h = hashlib.sha256()
+        h.update(config_digest.encode("ascii"))
+        h.update(upload_digest.encode("ascii"))
+        h.update(json.dumps(list(options)).encode("utf-8"))
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self._cache_dir / f"{key}.json"
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Return the job_id cached under ``key``, or None.
+
+        A hit refreshes the entry's last-used time. Entries whose job was
+        deleted or did not complete are dropped.
+        """
+        if not self.enabled:
+            return None
+        path = self._entry_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                job_id = json.load(f)["job_id"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+        status = read_status(self._output_dir / job_id)
+        if not status or status.get("status") != "completed":
+            path.unlink(missing_ok=True)
+            return None
+
+        os.utime(path)  # LRU: mark as recently used
+        return job_id
+
+    def store(self, key: str, job_id: str) -> None:
+        """Record a completed job under ``key`` and enforce the limits."""
+        if not self.enabled:
+            return
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._cache_dir / f".{key}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"job_id": job_id, "created_at": time.time()}, f)
+        os.replace(tmp, self._entry_path(key))
+        self.evict()
+
+    def evict(self) -> List[str]:
+        """Apply age and size limits; return the evicted job ids."""
+        entries: List[Dict[str, Any]] = []
+        for path in self._cache_dir.glob("*.json"):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    job_id = json.load(f)["job_id"]
+                last_used = path.stat().st_mtime
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                continue
+            job_dir = self._output_dir / job_id
+            if not job_dir.exists():
+                path.unlink(missing_ok=True)
+                continue
+            entries.append({
+                "path": path,
+                "job_id": job_id,
+                "last_used": last_used,
+                "size": dir_size(job_dir),
+            })
+
+        # Most recently used first; keep entries until the budget runs out
+        entries.sort(key=lambda e: e["last_used"], reverse=True)
+        now = time.time()
+        used = 0
+        evicted: List[str] = []
+        for entry in entries:
+            used += entry["size"]
+            if now - entry["last_used"] > self.max_age_s or used > self.max_bytes:
+                entry["path"].unlink(missing_ok=True)
+                self._delete_job(entry["job_id"])
+                evicted.append(entry["job_id"])
+                used -= entry["size"]
+        return evicted
@@ -0,0 +1,151 @@
+"""Carbon-Trace: Persisted per-tenant factory state.
+
+A tenant's accumulated audit state — each factory's unrounded running
+total, monthly log and cap status — is saved between requests as
+``<state_dir>/<tenant>/state.json``:
+
+    {
+      "version": 1,
+      "tenant": "acme",
+      "config": "default",          # named config the state was built with
+      "config_digest": "<sha256>",
+      "updated_at": 1760000000.0,
+      "factories": [ {<Industry.snapshot()>, "year": 2026}, ... ]
+    }
+
+There is one entry per factory and calendar year, since caps (and running
+totals) restart every year; entries saved without a ``year`` belong to
+`DEFAULT_YEAR`. Appending months restores the factories from the snapshot,
+audits only the new rows and writes the snapshot back, so a year-to-date
+update costs O(new rows) instead of a full re-audit.
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from src.config import DEFAULT_YEAR, CompiledConfig, registry
+from src.models import Industry
+
+SNAPSHOT_VERSION = 1
+STATE_FILE = "state.json"
+
+_TENANT_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class StateConflictError(Exception):
+    """Saved state cannot be continued (e.g. its config has changed)."""
+
+
+def state_path(state_dir: Path, tenant: str) -> Path:
+    """
+    Snapshot file of ``tenant``.
+
+    Raises
+    ------
+    KeyError
+        If the tenant name is invalid.
+    """
+    if not _TENANT_RE.match(tenant):
+        raise KeyError(tenant)
+    return Path(state_dir) / tenant / STATE_FILE
+
+
+def load_state(path: str | os.PathLike) -> Optional[Dict[str, Any]]:
+    """Return the saved snapshot, or None if the tenant has no state."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_state(path: str | os.PathLike, snapshot: Dict[str, Any]) -> None:
+    """Atomically replace a tenant's snapshot."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+
+def snapshot_factories(
+    tenant: str, years: Mapping[int, Dict[str, Industry]], config: CompiledConfig
+) -> Dict[str, Any]:
+    """Build a tenant snapshot from audited factories (year → factory_id → Industry)."""
+    return {
+        "version": SNAPSHOT_VERSION,
+        "tenant": tenant,
+        "config": config.name,
+        "config_digest": config.digest,
+        "updated_at": time.time(),
+        "factories": [
+            {**f.snapshot(), "year": year}
+            for year, factories in years.items()
+            for f in factories.values()
+        ],
+    }
+
+
+def state_config(snapshot: Dict[str, Any]) -> CompiledConfig:
+    """
+    The compiled config a snapshot was built with.
+
+    Raises
+    ------
+    ValueError
+        If the snapshot is malformed.
+    StateConflictError
+        If that config no longer exists or its factors have changed since —
+        continuing would mix two factor sets in one running total.
+    """
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported state snapshot (expected version {SNAPSHOT_VERSION}).")
+    name = snapshot.get("config")
+    try:
+        config = registry.get(str(name))
+    except KeyError:
+        raise StateConflictError(f"Saved state uses config {name!r}, which no longer exists.")
+    if config.digest != snapshot.get("config_digest"):
+        raise StateConflictError(
+            f"Config {name!r} has changed since this state was saved. "
+            "Re-upload the full year to rebuild it."
+        )
+    return config
+
+
+def restore_factories(
+    snapshot: Dict[str, Any], config: CompiledConfig
+) -> Dict[int, Dict[str, Industry]]:
+    """
+    Rebuild year → factory_id → Industry from a snapshot, oldest year first.
+
+    Raises
+    ------
+    ValueError
+        If the snapshot is malformed.
+    """
+    years: Dict[int, Dict[str, Industry]] = {}
+    entries = snapshot.get("factories")
+    if not isinstance(entries, list):
+        raise ValueError("Invalid state snapshot: 'factories' must be a list.")
+    for state in entries:
+        if not isinstance(state, dict):
+            raise ValueError("Invalid state snapshot: factory entries must be objects.")
+        try:
+            year = int(state.get("year", DEFAULT_YEAR))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid state snapshot: 'year' must be an integer.")
+        sector_cfg = config.sector(str(state.get("sector")))
+        factory = Industry.from_snapshot(
+            state,
+            emission_factor=sector_cfg.emission_factor,
+            carbon_cap_kg=sector_cfg.carbon_cap_kg,
+            energy_source_multipliers=config.energy_multipliers,
+        )
+        years.setdefault(year, {})[factory.factory_id] = factory
+    return dict(sorted(years.items()))
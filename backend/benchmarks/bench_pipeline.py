@@ -0,0 +1,457 @@
+"""Carbon-Trace: End-to-end performance benchmarks for the audit pipeline.
+
+Times each stage separately on synthetic fleets (`src.data_gen`) of
+increasing size, in factory-months (CSV rows):
+
+    clean_csv            raw upload → cleaned CSV
+    run_audit[<engine>]  cleaned CSV → Industry objects (closure / vectorized)
+    write_summary_csv    Industry objects → audit summary CSV
+    plot_emissions       Industry objects → PNG chart
+    scenarios[<n>]       saved inputs → n what-if scenarios (`src.scenarios`)
+    uncertainty[<n>]     saved inputs → n Monte Carlo draws (`src.uncertainty`)
+    upload_csv           full POST /upload-csv?wait=true through a test client
+    upload_archive[<n>]  the same fleet as a zip of n per-site CSVs, POST /upload-archive
+
+Every stage reports wall time (best of ``--repeat`` runs) and peak memory:
+traced Python/NumPy allocations (tracemalloc) for in-process stages, and
+the pool worker's peak RSS for the upload, whose pipeline runs in a worker.
+The upload stages run the API against a scratch data directory (job
+outputs, job index, result cache), so they never touch `data/`.
+
+Results are written as JSON so runs can be compared between commits:
+
+    python -m benchmarks.bench_pipeline --output before.json
+    git checkout <branch>
+    python -m benchmarks.bench_pipeline --output after.json --compare before.json
+
+Run from the backend directory.
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Ensure project root is on the path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+SCHEMA_VERSION = 1
+DEFAULT_SIZES = (50, 10_000, 100_000, 1_000_000)
+DEFAULT_ENGINES = ("closure", "vectorized")
+# Batch sizes of the what-if and Monte Carlo stages
+SCENARIOS = 500
+DRAWS = 10_000
+# CSV files in the archive upload stage
+ARCHIVE_MEMBERS = 16
+CONFIG_PATH = str(PROJECT_ROOT / "config" / "sectors.json")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# ── Measurement ──
+
+def measure(
+    fn: Callable[[], Any], repeat: int = 1, trace_memory: bool = True
+) -> Tuple[Any, List[float], Optional[float]]:
+    """
+    Time ``fn`` and measure its peak traced memory.
+
+    Returns
+    -------
+    tuple
+        (last result, wall seconds per run, peak MiB or None). Memory is
+        measured in one extra run, since tracing slows the timed runs down.
+    """
+    result = None
+    runs = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if trace_memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = peak / 1024**2
+    return result, runs, peak_mb
+
+
+def _worker_peak_rss_mb(pool: Any) -> Optional[float]:
+    """Largest peak RSS (VmHWM) among a process pool's workers (Linux only)."""
+    processes = getattr(pool, "_processes", None) or {}
+    peaks = []
+    for pid in processes:
+        try:
+            with open(f"/proc/{pid}/status", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peaks.append(int(line.split()[1]) / 1024)
+        except OSError:
+            continue
+    return max(peaks) if peaks else None
+
+
+# ── Stages ──
+
+def bench_size(
+    rows: int,
+    work_dir: Path,
+    engines: Sequence[str] = DEFAULT_ENGINES,
+    repeat: int = 1,
+    trace_memory: bool = True,
+    upload: bool = True,
+    seed: int = 42,
+) -> List[Dict[str, Any]]:
+    """Benchmark every stage on a fleet of ``rows`` factory-months."""
+    from web_pipeline import clean_csv
+    from src.data_gen import generate_monthly_data
+    from src.runner import plot_emissions, run_audit, write_summary_csv
+
+    raw = work_dir / f"fleet_{rows}.csv"
+    cleaned = work_dir / f"cleaned_{rows}.csv"
+    generate_monthly_data(str(raw), seed=seed, total_rows=rows)
+    results: List[Dict[str, Any]] = []
+
+    def record(stage: str, runs: List[float], peak_mb: Optional[float], **extra: Any) -> None:
+        entry = {
+            "stage": stage,
+            "rows": rows,
+            "seconds": min(runs),
+            "runs": runs,
+            "rows_per_second": rows / min(runs) if min(runs) > 0 else None,
+            "peak_memory_mb": peak_mb,
+            **extra,
+        }
+        results.append(entry)
+        shown = peak_mb if peak_mb is not None else extra.get("worker_peak_rss_mb")
+        mem = f"{shown:9.1f} MiB" if shown is not None else "        — "
+        if peak_mb is None and shown is not None:
+            mem += " (worker RSS)"
+        print(f"  ⏱️  {stage:<22} {rows:>9,} rows  {min(runs):9.3f} s  {mem}")
+
+    _, runs, peak = measure(
+        lambda: clean_csv(str(raw), str(cleaned)), repeat, trace_memory
+    )
+    record("clean_csv", runs, peak)
+
+    factories = None
+    for engine in engines:
+        (factories, _), runs, peak = measure(
+            lambda: run_audit(str(cleaned), CONFIG_PATH, engine=engine),
+            repeat, trace_memory,
+        )
+        record(f"run_audit[{engine}]", runs, peak)
+
+    if factories is not None:
+        summary = work_dir / "audit_summary.csv"
+        _, runs, peak = measure(
+            lambda: write_summary_csv(factories, str(summary)), repeat, trace_memory
+        )
+        record("write_summary_csv", runs, peak)
+
+        chart = work_dir / "emissions_chart.png"
+        _, runs, peak = measure(
+            lambda: plot_emissions(factories, str(chart), config_path=CONFIG_PATH),
+            repeat, trace_memory,
+        )
+        record("plot_emissions", runs, peak)
+        del factories
+
+    from src.config import get_config
+    from src.scenarios import run_scenarios, save_inputs
+    from src.uncertainty import run_uncertainty
+    from src.vectorized import read_audit_csv
+
+    inputs = work_dir / f"inputs_{rows}.npz"
+    save_inputs(read_audit_csv(str(cleaned)), str(inputs), get_config(CONFIG_PATH))
+    scenarios = [
+        {"energy_source_multipliers": {"coal": 1.0 + i / SCENARIOS}} for i in range(SCENARIOS)
+    ]
+    _, runs, peak = measure(
+        lambda: run_scenarios(str(inputs), scenarios), repeat, trace_memory
+    )
+    record(f"scenarios[{SCENARIOS}]", runs, peak)
+
+    sigma = {"energy_source_multipliers": {"coal": 0.1, "grid": 0.05, "natural_gas": 0.05}}
+    _, runs, peak = measure(
+        lambda: run_uncertainty(str(inputs), sigma, draws=DRAWS, seed=seed),
+        repeat, trace_memory,
+    )
+    record(f"uncertainty[{DRAWS}]", runs, peak)
+
+    if upload:
+        data_dir = work_dir / "api"
+        runs, peak = _bench_upload(raw, repeat, data_dir)
+        record("upload_csv", runs, None, worker_peak_rss_mb=peak)
+        runs, peak = _bench_archive(raw, work_dir / f"fleet_{rows}.zip", repeat, data_dir)
+        record(f"upload_archive[{ARCHIVE_MEMBERS}]", runs, None, worker_peak_rss_mb=peak)
+
+    return results
+
+
+@contextmanager
+def _api_app(data_dir: Path) -> Iterator[Any]:
+    """
+    Yield the API app with its job outputs, job index, result cache and
+    tenant state under ``data_dir``; `api.main` is restored on exit.
+
+    The pool has one warm worker and the result cache is off, so every
+    upload runs the full pipeline — whatever the environment was when
+    `api.main` was imported.
+    """
+    import api.main
+    from api.job_index import JobIndex
+    from api.jobs import JobManager
+    from api.pipeline import use_job_index
+    from api.result_cache import ResultCache
+
+    output_dir = data_dir / "outputs"
+    job_index = JobIndex(data_dir / "jobs.sqlite3", output_dir)
+    scratch = {
+        "OUTPUT_DIR": output_dir,
+        "CACHE_DIR": data_dir / "result_cache",
+        "STATE_DIR": data_dir / "tenants",
+        "JOB_INDEX_PATH": data_dir / "jobs.sqlite3",
+        "job_index": job_index,
+        "jobs": JobManager(max_workers=1, job_index=job_index),
+        "results": ResultCache(
+            data_dir / "result_cache", output_dir, max_bytes=0, delete_job=job_index.delete,
+        ),
+    }
+    saved = {name: getattr(api.main, name) for name in scratch}
+    for name, value in scratch.items():
+        setattr(api.main, name, value)
+    use_job_index(job_index)
+    try:
+        yield api.main.app
+    finally:
+        for name, value in saved.items():
+            setattr(api.main, name, value)
+        use_job_index(saved["job_index"])
+
+
+def _bench_upload(raw: Path, repeat: int, data_dir: Path) -> Tuple[List[float], Optional[float]]:
+    """Time POST /upload-csv?wait=true with a fresh single-worker pool."""
+    from fastapi.testclient import TestClient
+
+    import api.main
+
+    content = raw.read_bytes()
+    runs = []
+    with _api_app(data_dir) as app, TestClient(app) as client:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            res = client.post(
+                "/upload-csv",
+                params={"wait": "true"},
+                files={"file": (raw.name, content, "text/csv")},
+            )
+            runs.append(time.perf_counter() - start)
+            if res.status_code != 200:
+                raise RuntimeError(f"Upload failed ({res.status_code}): {res.text[:200]}")
+            client.delete(f"/outputs/{res.json()['job_id']}")
+        peak = _worker_peak_rss_mb(api.main.jobs._pool)
+    return runs, peak
+
+
+def _bench_archive(
+    raw: Path, archive: Path, repeat: int, data_dir: Path
+) -> Tuple[List[float], Optional[float]]:
+    """Time POST /upload-archive?wait=true on ``raw`` split by factory into a zip."""
+    import zipfile
+
+    import pandas as pd
+    from fastapi.testclient import TestClient
+
+    import api.main
+
+    df = pd.read_csv(raw, dtype=str)
+    site = pd.factorize(df["factory_id"])[0] % ARCHIVE_MEMBERS
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as z:
+        for i, part in df.groupby(site):
+            z.writestr(f"site_{i:02d}.csv", part.to_csv(index=False))
+    del df
+
+    content = archive.read_bytes()
+    runs = []
+    with _api_app(data_dir) as app, TestClient(app) as client:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            res = client.post(
+                "/upload-archive",
+                params={"wait": "true"},
+                files={"file": (archive.name, content, "application/zip")},
+            )
+            runs.append(time.perf_counter() - start)
+            if res.status_code != 200:
+                raise RuntimeError(f"Upload failed ({res.status_code}): {res.text[:200]}")
+            client.delete(f"/outputs/{res.json()['job_id']}")
+        peak = _worker_peak_rss_mb(api.main.jobs._pool)
+    return runs, peak
+
+
+# ── Results file ──
+
+def environment() -> Dict[str, Any]:
+    """Machine, interpreter, library and commit details for a results file."""
+    def version(package: str) -> Optional[str]:
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=PROJECT_ROOT, capture_output=True,
+                text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "git_commit": git("rev-parse", "HEAD"),
+        "git_dirty": bool(status) if status is not None else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": {
+            p: version(p) for p in ("numpy", "pandas", "matplotlib", "fastapi", "pyarrow")
+        },
+    }
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    engines: Sequence[str] = DEFAULT_ENGINES,
+    repeat: int = 1,
+    trace_memory: bool = True,
+    upload: bool = True,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """Run the benchmark at every size and return the results document."""
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="carbon_trace_bench_") as tmp:
+        for rows in sizes:
+            print(f"\n📊 {rows:,} factory-months")
+            results.extend(bench_size(
+                rows, Path(tmp), engines=engines, repeat=repeat,
+                trace_memory=trace_memory, upload=upload, seed=seed,
+            ))
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": environment(),
+        "settings": {
+            "sizes": list(sizes),
+            "engines": list(engines),
+            "repeat": repeat,
+            "trace_memory": trace_memory,
+            "upload": upload,
+            "seed": seed,
+        },
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "results": results,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Pair up the stages of two results documents.
+
+    ``speedup`` > 1 means ``current`` is faster than ``baseline``.
+    """
+    before = {(r["stage"], r["rows"]): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        old = before.get((r["stage"], r["rows"]))
+        if old is None:
+            continue
+        rows.append({
+            "stage": r["stage"],
+            "rows": r["rows"],
+            "baseline_seconds": old["seconds"],
+            "seconds": r["seconds"],
+            "speedup": old["seconds"] / r["seconds"] if r["seconds"] > 0 else None,
+            "baseline_peak_memory_mb": old.get("peak_memory_mb"),
+            "peak_memory_mb": r.get("peak_memory_mb"),
+        })
+    return rows
+
+
+def _print_comparison(rows: List[Dict[str, Any]], baseline_commit: Optional[str]) -> None:
+    print(f"\n📈 Compared with {(baseline_commit or 'baseline')[:12]}")
+    for r in rows:
+        speedup = f"{r['speedup']:6.2f}×" if r["speedup"] is not None else "     —"
+        print(
+            f"  {r['stage']:<22} {r['rows']:>9,} rows  "
+            f"{r['baseline_seconds']:9.3f} s → {r['seconds']:9.3f} s  {speedup}"
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Carbon-Trace pipeline benchmarks")
+    parser.add_argument(
+        "--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+        help="Comma-separated fleet sizes in factory-months",
+    )
+    parser.add_argument(
+        "--engines", default=",".join(DEFAULT_ENGINES),
+        help="Comma-separated run_audit engines",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--seed", type=int, default=42, help="Synthetic fleet seed")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced memory runs")
+    parser.add_argument("--no-upload", action="store_true", help="Skip the /upload-csv stage")
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    doc = run_benchmarks(
+        sizes=[int(s) for s in args.sizes.split(",") if s],
+        engines=[e for e in args.engines.split(",") if e],
+        repeat=max(args.repeat, 1),
+        trace_memory=not args.no_memory,
+        upload=not args.no_upload,
+        seed=args.seed,
+    )
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{(doc['environment']['git_commit'] or 'results')[:12]}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"\n✅ Results written → {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        _print_comparison(compare_results(baseline, doc), baseline["environment"].get("git_commit"))
+    return doc
+
+
+if __name__ == "__main__":
+    main()
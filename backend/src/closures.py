@@ -7,16 +7,25 @@ The closure factory encapsulates:
 
 Each call to `make_emission_auditor()` produces a fully independent
 auditor closure with its own state — no shared globals.
+
+`auditor.snapshot()` returns a copy of that state for persistence; it can
+only be restored by creating a new auditor from it (``initial_total_kg``,
+``initial_monthly_log``), never written back into a running one.
 """
 
-from typing import Optional
+from types import MappingProxyType
+from typing import Mapping, Optional, Union
+
+from .config import EmissionFactors
 
 
 def make_emission_auditor(
     sector: str,
-    emission_factor: dict,
+    emission_factor: Union[dict, EmissionFactors],
     carbon_cap_kg: float,
-    energy_source_multipliers: Optional[dict] = None,
+    energy_source_multipliers: Optional[Mapping[str, float]] = None,
+    initial_total_kg: float = 0.0,
+    initial_monthly_log: Optional[list] = None,
 ) -> callable:
     """
     Factory function that returns a closure for one factory's emissions.
@@ -32,42 +41,52 @@ def make_emission_auditor(
             "energy_per_mwh": 820.0,        # kg CO₂ per MWh consumed
             "material_processing_per_ton": 120.0  # kg CO₂ per ton of raw material
         }
+        or an already-compiled (immutable) `EmissionFactors`, which is
+        shared instead of copied.
     carbon_cap_kg : float
         Annual carbon cap in kg CO₂. Exceeding this triggers an ALERT.
     energy_source_multipliers : dict, optional
         Multipliers by energy source type (e.g. {"coal": 1.25, "renewable": 0.35}).
+        A read-only mapping (e.g. from `CompiledConfig`) is shared as-is.
+    initial_total_kg : float, optional
+        Cumulative emissions to resume from (default 0.0 — a fresh year).
+    initial_monthly_log : list, optional
+        Previously audited monthly emissions to resume from. The next call
+        continues numbering at ``len(initial_monthly_log) + 1``.
 
     Returns
     -------
     callable
         An auditor closure that accepts monthly production data and returns
-        emission results.
+        emission results. Its ``snapshot()`` attribute returns a copy of the
+        accumulated state.
 
     Private State (encapsulated)
     ----------------------------
-    - `_factors` : a frozen copy of emission_factor — cannot be modified externally
+    - `_factors` : immutable EmissionFactors — cannot be modified externally
     - `_total_emissions` : cumulative annual emissions
     - `_cap` : carbon cap threshold
     - `_monthly_log` : detailed per-month emission breakdown
     """
 
-    # ──── PRIVATE: Deep-copy and freeze emission factors ────
-    # This prevents external mutation of the factors dict
-    _factors = {
-        "production_per_ton": float(emission_factor.get("production_per_ton", 0)),
-        "energy_per_mwh": float(emission_factor.get("energy_per_mwh", 0)),
-        "material_processing_per_ton": float(
-            emission_factor.get("material_processing_per_ton", 0)
-        ),
-    }
-
-    _energy_multipliers = dict(energy_source_multipliers or {})
+    # ──── PRIVATE: Freeze emission factors ────
+    # Compiled factors are immutable and shared; plain dicts are copied into
+    # an immutable record so external mutation cannot reach the closure
+    if isinstance(emission_factor, EmissionFactors):
+        _factors = emission_factor
+    else:
+        _factors = EmissionFactors.from_dict(emission_factor)
+
+    if isinstance(energy_source_multipliers, MappingProxyType):
+        _energy_multipliers = energy_source_multipliers
+    else:
+        _energy_multipliers = dict(energy_source_multipliers or {})
     _cap = float(carbon_cap_kg)
     _sector = str(sector)
 
     # ──── PRIVATE STATE: persists across calls ────
-    _total_emissions = 0.0
-    _monthly_log: list = []
+    _total_emissions = float(initial_total_kg)
+    _monthly_log: list = list(initial_monthly_log or [])
 
     def auditor(
         monthly_production_tons: float,
@@ -103,16 +122,16 @@ def make_emission_auditor(
         nonlocal _total_emissions
 
         # ── Component 1: Production emissions ──
-        emissions_production = monthly_production_tons * _factors["production_per_ton"]
+        emissions_production = monthly_production_tons * _factors.production_per_ton
 
         # ── Component 2: Energy emissions ──
-        emissions_energy = energy_used_mwh * _factors["energy_per_mwh"]
+        emissions_energy = energy_used_mwh * _factors.energy_per_mwh
 
         # ── Component 3: Raw material processing emissions ──
         emissions_material = 0.0
         if raw_material_weight_tons is not None and raw_material_weight_tons > 0:
             emissions_material = (
-                raw_material_weight_tons * _factors["material_processing_per_ton"]
+                raw_material_weight_tons * _factors.material_processing_per_ton
             )
 
         # ── Total monthly (before energy-source adjustment) ──
@@ -160,4 +179,13 @@ def make_emission_auditor(
             "breakdown": breakdown,
         }
 
+    def snapshot() -> dict:
+        """Copy of the accumulated state (unrounded total, monthly log)."""
+        return {
+            "sector": _sector,
+            "total_emissions_kg": _total_emissions,
+            "monthly_log": list(_monthly_log),
+        }
+
+    auditor.snapshot = snapshot
     return auditor
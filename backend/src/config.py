@@ -0,0 +1,182 @@
+"""Process-wide registry of compiled sector configs.
+
+`sectors.json` is parsed once per process into immutable records and
+re-read only when the file's mtime (or size) changes. Every auditor closure
+then shares the same factor objects instead of copying dicts per factory.
+
+Several named configs can live side by side in the config directory:
+    sectors.json            → "default"
+    sectors_<name>.json     → "<name>"   (e.g. regional factor sets)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+DEFAULT_CONFIG_DIR = Path(__file__).resolve().parent.parent / "config"
+DEFAULT_NAME = "default"
+
+# Cap used when a sector is missing from the config
+DEFAULT_CAP_KG = 1_000_000_000
+
+# Calendar year of data uploaded without a ``year`` column
+DEFAULT_YEAR = 2026
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class EmissionFactors(NamedTuple):
+    """Sector-specific emission factors (kg CO₂ per unit)."""
+    production_per_ton: float = 0.0
+    energy_per_mwh: float = 0.0
+    material_processing_per_ton: float = 0.0
+
+    @classmethod
+    def from_dict(cls, factors: Optional[Mapping[str, Any]]) -> "EmissionFactors":
+        factors = factors or {}
+        return cls(
+            float(factors.get("production_per_ton", 0)),
+            float(factors.get("energy_per_mwh", 0)),
+            float(factors.get("material_processing_per_ton", 0)),
+        )
+
+
+class SectorConfig(NamedTuple):
+    """Compiled settings of one sector."""
+    emission_factor: EmissionFactors
+    carbon_cap_kg: float
+
+
+UNKNOWN_SECTOR = SectorConfig(EmissionFactors(), float(DEFAULT_CAP_KG))
+
+
+class CompiledConfig(NamedTuple):
+    """An immutable, parsed sectors.json."""
+    name: str
+    path: str
+    digest: str                              # SHA-256 of the file bytes
+    sectors: Mapping[str, SectorConfig]
+    energy_multipliers: Mapping[str, float]
+
+    def sector(self, name: str) -> SectorConfig:
+        """Settings for ``name``; unknown sectors get zero factors."""
+        return self.sectors.get(name, UNKNOWN_SECTOR)
+
+    @property
+    def caps(self) -> Dict[str, float]:
+        """Carbon cap (kg) per sector."""
+        return {s: cfg.carbon_cap_kg for s, cfg in self.sectors.items()}
+
+
+def compile_config(raw: Mapping[str, Any], name: str = "", path: str = "",
+                   digest: str = "") -> CompiledConfig:
+    """Compile a parsed sectors.json dict into immutable records."""
+    sectors = {
+        sector: SectorConfig(
+            EmissionFactors.from_dict(cfg.get("emission_factor")),
+            float(cfg.get("carbon_cap_kg", DEFAULT_CAP_KG)),
+        )
+        for sector, cfg in raw.get("sectors", {}).items()
+    }
+    multipliers = {
+        source: float(m)
+        for source, m in raw.get("energy_source_multipliers", {}).items()
+    }
+    return CompiledConfig(
+        name=name,
+        path=path,
+        digest=digest,
+        sectors=MappingProxyType(sectors),
+        energy_multipliers=MappingProxyType(multipliers),
+    )
+
+
+def config_name(path: str | os.PathLike) -> str:
+    """Config name for a file path (the inverse of `ConfigRegistry.path_for`)."""
+    stem = Path(path).stem
+    if stem == "sectors":
+        return DEFAULT_NAME
+    return stem[len("sectors_"):] if stem.startswith("sectors_") else stem
+
+
+class ConfigRegistry:
+    """
+    Caches compiled configs by path, reloading when the file changes.
+
+    Thread-safe; each process (API or pool worker) keeps its own registry.
+    """
+
+    def __init__(self, config_dir: Path = DEFAULT_CONFIG_DIR):
+        self._config_dir = Path(config_dir)
+        self._cache: Dict[str, Tuple[Tuple[int, int], CompiledConfig]] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, name: str = DEFAULT_NAME) -> Path:
+        """
+        File backing the config called ``name``.
+
+        Raises
+        ------
+        KeyError
+            If the name is invalid or no such config file exists.
+        """
+        if not _NAME_RE.match(name):
+            raise KeyError(name)
+        filename = "sectors.json" if name == DEFAULT_NAME else f"sectors_{name}.json"
+        path = self._config_dir / filename
+        if not path.is_file():
+            raise KeyError(name)
+        return path
+
+    def names(self) -> List[str]:
+        """Names of all configs available in the config directory."""
+        names = []
+        for path in sorted(self._config_dir.glob("sectors*.json")):
+            if path.name == "sectors.json":
+                names.insert(0, DEFAULT_NAME)
+            elif path.stem.startswith("sectors_"):
+                names.append(config_name(path))
+        return names
+
+    def get(self, name: str = DEFAULT_NAME) -> CompiledConfig:
+        """Compiled config by name (see `path_for`)."""
+        return self.load(self.path_for(name), name=name)
+
+    def load(self, path: str | os.PathLike, name: str = "") -> CompiledConfig:
+        """Compiled config for a file path, re-read only if it changed."""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            with open(key, "rb") as f:
+                data = f.read()
+            compiled = compile_config(
+                json.loads(data),
+                name=name or config_name(key),
+                path=key,
+                digest=hashlib.sha256(data).hexdigest(),
+            )
+            self._cache[key] = (stamp, compiled)
+            return compiled
+
+
+# ── Process-wide registry ──
+registry = ConfigRegistry()
+
+
+def get_config(config_path: str | os.PathLike) -> CompiledConfig:
+    """Compiled config for ``config_path`` from the process-wide registry."""
+    return registry.load(config_path)
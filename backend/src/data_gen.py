@@ -1,125 +1,403 @@
-"""Generate synthetic monthly production data for 50 factories.
+"""Generate synthetic monthly production data for factory fleets.
 
 Creates realistic sector-specific data considering:
 - Steel: high tonnage, high energy (blast furnace, EAF)
 - Textile: moderate production, chemical processing
 - Electronics: lower tonnage, high energy (clean rooms, fab lines)
+
+Fleets of any size are generated with NumPy and streamed to disk in
+chunks of whole factories, so millions of rows take seconds and memory
+stays bounded. Optional dirty rows (bad sectors, energy-source variants,
+negative values, duplicates) exercise `web_pipeline.clean_csv`.
 """
 
-import csv
-import random
-from typing import List, Dict
+import argparse
+import math
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# Rows generated (and written) per chunk
+CHUNK_ROWS = 500_000
+
+
+class SectorProfile(NamedTuple):
+    """Ranges that synthetic factories of one sector are drawn from."""
+    id_prefix: str
+    production_tons: Tuple[float, float]      # base monthly production
+    energy_mwh: Tuple[float, float]           # base monthly energy use
+    energy_weights: Mapping[str, float]       # energy source probabilities
+    raw_material_ratio: Tuple[float, float]   # input weight / product weight
+
+
+SECTOR_PROFILES: Dict[str, SectorProfile] = {
+    # Realistic: a medium steel plant produces 800–2000 tons/month
+    #            and uses 3000–7000 MWh/month; ore/scrap → steel ratio
+    "Steel": SectorProfile(
+        "FAC_STEEL", (800, 2000), (3500, 7000),
+        {"coal": 0.45, "natural_gas": 0.20, "grid": 0.25, "renewable": 0.10},
+        (1.2, 1.5),
+    ),
+    # Realistic: 200–600 tons/month, 500–1200 MWh/month; fiber → fabric
+    "Textile": SectorProfile(
+        "FAC_TEX", (200, 600), (500, 1200),
+        {"coal": 0.30, "natural_gas": 0.15, "grid": 0.40, "renewable": 0.15},
+        (1.05, 1.25),
+    ),
+    # Realistic: 100–450 tons/month, 800–1800 MWh/month; silicon/metals → product
+    "Electronics": SectorProfile(
+        "FAC_ELEC", (100, 450), (800, 1800),
+        {"coal": 0.20, "natural_gas": 0.15, "grid": 0.45, "renewable": 0.20},
+        (1.1, 1.4),
+    ),
+}
+
+DEFAULT_FACTORIES_PER_SECTOR = {"Steel": 20, "Textile": 15, "Electronics": 15}
+
+ENERGY_SOURCES = ["coal", "natural_gas", "grid", "renewable"]
 
+# ── Dirty-data variants (see web_pipeline normalization) ──
+# Recoverable spellings of each sector, and sectors the cleaner drops
+_SECTOR_VARIANTS = ["{lower}", " {upper}", "{lower} "]
+_INVALID_SECTORS = ["Cement", "Unknown", "Mining"]
+# Spellings that map back to each canonical energy source
+_SOURCE_VARIANTS = {
+    "coal": [" Coal", "COAL", "coal "],
+    "natural_gas": ["Natural Gas", "gas", "nat_gas"],
+    "grid": ["Electricity", "electrical grid", " GRID"],
+    "renewable": ["solar", "wind", "hydro"],
+}
 
-def generate_monthly_data(output_path: str, seed: int = 42) -> None:
+FIELDNAMES = [
+    "factory_id", "sector", "month",
+    "monthly_production_tons", "energy_used_mwh",
+    "energy_source_type", "raw_material_weight_tons",
+]
+
+
+def generate_monthly_data(
+    output_path: str,
+    seed: int = 42,
+    factories_per_sector: Optional[Mapping[str, int]] = None,
+    n_factories: Optional[int] = None,
+    sector_mix: Optional[Mapping[str, float]] = None,
+    years: int = 1,
+    start_year: int = 2026,
+    dirty_rate: float = 0.0,
+    total_rows: Optional[int] = None,
+) -> int:
     """
-    Generate a realistic CSV for 50 factories across 3 sectors.
+    Generate a realistic production CSV for a fleet of factories.
 
     Parameters
     ----------
     output_path : str
         File path for the output CSV.
     seed : int
-        Random seed for reproducibility.
+        Random seed; the same arguments always produce the same values.
+    factories_per_sector : dict, optional
+        Number of factories in each sector (default: 20 Steel, 15 Textile,
+        15 Electronics).
+    n_factories : int, optional
+        Fleet size split across sectors by ``sector_mix`` instead.
+    sector_mix : dict, optional
+        Relative weight of each sector for ``n_factories`` / ``total_rows``
+        (default: the proportions of the default fleet).
+    years : int
+        Years of monthly data per factory. With more than one year a
+        ``year`` column (starting at ``start_year``) is added.
+    start_year : int
+        First year, when ``years > 1``.
+    dirty_rate : float
+        Fraction of rows (0–1) made dirty, evenly split between bad
+        sectors (recoverable spellings or unknown sectors), energy-source
+        variants, negative production/energy, and duplicated rows.
+    total_rows : int, optional
+        Generate exactly this many factory-months: the fleet is sized to
+        cover them and the last factory's months are cut short.
+
+    Returns
+    -------
+    int
+        Number of data rows written (including duplicates).
 
     Output CSV columns:
-        factory_id, sector, month, monthly_production_tons,
+        factory_id, sector, [year,] month, monthly_production_tons,
         energy_used_mwh, energy_source_type, raw_material_weight_tons
     """
-
-    random.seed(seed)
+    if years < 1:
+        raise ValueError("years must be at least 1")
+    if not 0.0 <= dirty_rate <= 1.0:
+        raise ValueError("dirty_rate must be between 0 and 1")
 
     # ── Define factory distribution ──
-    factory_specs: List[Dict] = []
+    months_per_factory = 12 * years
+    if total_rows is not None:
+        n_factories = math.ceil(total_rows / months_per_factory)
+    counts = _sector_counts(factories_per_sector, n_factories, sector_mix)
+    sectors = list(counts)
+    fleet = _factory_specs(counts, np.random.default_rng(seed))
+    n_rows = len(fleet["sector"]) * months_per_factory
+    if total_rows is not None:
+        n_rows = min(n_rows, total_rows)
 
-    # Steel: 20 factories — high production, very high energy
-    # Realistic: a medium steel plant produces 800–2000 tons/month
-    #            and uses 3000–7000 MWh/month
-    for i in range(1, 21):
-        factory_specs.append({
-            "factory_id": f"FAC_STEEL_{i:02d}",
-            "sector": "Steel",
-            "base_prod": random.uniform(800, 2000),
-            "base_energy": random.uniform(3500, 7000),
-            "energy_weights": {"coal": 0.45, "natural_gas": 0.20, "grid": 0.25, "renewable": 0.10},
-            "raw_material_ratio": (1.2, 1.5),   # ore/scrap → steel ratio
-        })
-
-    # Textile: 15 factories — moderate production, chemical processing
-    # Realistic: 200–600 tons/month, 500–1200 MWh/month
-    for i in range(1, 16):
-        factory_specs.append({
-            "factory_id": f"FAC_TEX_{i:02d}",
-            "sector": "Textile",
-            "base_prod": random.uniform(200, 600),
-            "base_energy": random.uniform(500, 1200),
-            "energy_weights": {"coal": 0.30, "natural_gas": 0.15, "grid": 0.40, "renewable": 0.15},
-            "raw_material_ratio": (1.05, 1.25),  # fiber → fabric ratio
-        })
-
-    # Electronics: 15 factories — lower tonnage, high energy
-    # Realistic: 100–450 tons/month, 800–1800 MWh/month
-    for i in range(1, 16):
-        factory_specs.append({
-            "factory_id": f"FAC_ELEC_{i:02d}",
-            "sector": "Electronics",
-            "base_prod": random.uniform(100, 450),
-            "base_energy": random.uniform(800, 1800),
-            "energy_weights": {"coal": 0.20, "natural_gas": 0.15, "grid": 0.45, "renewable": 0.20},
-            "raw_material_ratio": (1.1, 1.4),    # silicon/metals → product
-        })
-
-    all_rows: List[Dict] = []
-
-    for spec in factory_specs:
-        base_prod = spec["base_prod"]
-        base_energy = spec["base_energy"]
-        energy_types = list(spec["energy_weights"].keys())
-        energy_probs = list(spec["energy_weights"].values())
-
-        for month in range(1, 13):
-            # Seasonal variation: ±15% with slight winter bump (months 11–2)
-            seasonal_factor = 1.0
-            if month in (11, 12, 1, 2):
-                seasonal_factor = random.uniform(1.0, 1.10)  # winter production push
-            elif month in (6, 7):
-                seasonal_factor = random.uniform(0.90, 1.0)  # summer maintenance
-
-            prod = base_prod * random.uniform(0.85, 1.15) * seasonal_factor
-            energy = base_energy * random.uniform(0.85, 1.15) * seasonal_factor
-
-            # Select energy source based on sector-specific probability
-            energy_source = random.choices(energy_types, weights=energy_probs, k=1)[0]
-
-            # Raw material weight (always > product weight)
-            rm_lo, rm_hi = spec["raw_material_ratio"]
-            raw_material = prod * random.uniform(rm_lo, rm_hi)
-
-            row = {
-                "factory_id": spec["factory_id"],
-                "sector": spec["sector"],
-                "month": month,
-                "monthly_production_tons": round(prod, 1),
-                "energy_used_mwh": round(energy, 1),
-                "energy_source_type": energy_source,
-                "raw_material_weight_tons": round(raw_material, 1),
-            }
-            all_rows.append(row)
-
-    # ── Write CSV ──
-    fieldnames = [
-        "factory_id", "sector", "month",
-        "monthly_production_tons", "energy_used_mwh",
-        "energy_source_type", "raw_material_weight_tons",
+    fieldnames = list(FIELDNAMES)
+    if years > 1:
+        fieldnames.insert(2, "year")
+
+    # ── Stream chunks of whole factories ──
+    factories_per_chunk = max(1, CHUNK_ROWS // months_per_factory)
+    written = 0
+    with open(output_path, "wb") as f:
+        f.write((",".join(fieldnames) + "\n").encode("utf-8"))
+        for chunk, start in enumerate(range(0, len(fleet["sector"]), factories_per_chunk)):
+            stop = min(start + factories_per_chunk, len(fleet["sector"]))
+            rows = min(n_rows - start * months_per_factory, (stop - start) * months_per_factory)
+            if rows <= 0:
+                break
+            rng = np.random.default_rng([seed, chunk + 1])
+            columns = _month_rows(fleet, sectors, start, stop, rows, years, start_year, rng)
+            if dirty_rate > 0:
+                columns = _dirty(columns, len(sectors), dirty_rate, rng)
+            if years == 1:
+                del columns["year"]
+            written += _write_chunk(f, columns, fleet, sectors)
+
+    print(
+        f"✅ Generated {written:,} rows for {len(fleet['sector']):,} factories "
+        f"→ {output_path}"
+    )
+    return written
+
+
+def _sector_counts(
+    factories_per_sector: Optional[Mapping[str, int]],
+    n_factories: Optional[int],
+    sector_mix: Optional[Mapping[str, float]],
+) -> Dict[str, int]:
+    """Factories per sector, splitting ``n_factories`` by ``sector_mix``."""
+    if factories_per_sector is None and n_factories is None:
+        factories_per_sector = DEFAULT_FACTORIES_PER_SECTOR
+    if factories_per_sector is None:
+        mix = dict(sector_mix or DEFAULT_FACTORIES_PER_SECTOR)
+        total = sum(mix.values())
+        if total <= 0:
+            raise ValueError("sector_mix weights must sum to a positive number")
+        # Largest remainder: the counts add up to exactly n_factories
+        shares = {s: n_factories * w / total for s, w in mix.items()}
+        counts = {s: int(v) for s, v in shares.items()}
+        by_remainder = sorted(mix, key=lambda s: shares[s] - counts[s], reverse=True)
+        for s in by_remainder[: n_factories - sum(counts.values())]:
+            counts[s] += 1
+        factories_per_sector = counts
+
+    unknown = set(factories_per_sector) - set(SECTOR_PROFILES)
+    if unknown:
+        raise ValueError(f"Unknown sectors: {sorted(unknown)}")
+    return {s: int(n) for s, n in factories_per_sector.items() if n > 0}
+
+
+def _factory_specs(counts: Mapping[str, int], rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Per-factory sector code, ID, and base production and energy."""
+    sector = np.repeat(np.arange(len(counts), dtype=np.int32), list(counts.values()))
+    ids: List[str] = []
+    for name, n in counts.items():
+        width = max(2, len(str(n)))
+        prefix = SECTOR_PROFILES[name].id_prefix
+        ids.extend(f"{prefix}_{i:0{width}d}" for i in range(1, n + 1))
+
+    profiles = [SECTOR_PROFILES[s] for s in counts]
+    prod = np.array([p.production_tons for p in profiles])[sector]
+    energy = np.array([p.energy_mwh for p in profiles])[sector]
+    return {
+        "sector": sector,
+        "factory_id": np.array(ids, dtype=object),
+        "base_prod": rng.uniform(prod[:, 0], prod[:, 1]),
+        "base_energy": rng.uniform(energy[:, 0], energy[:, 1]),
+    }
+
+
+def _month_rows(
+    fleet: Dict[str, np.ndarray],
+    sectors: List[str],
+    start: int,
+    stop: int,
+    rows: int,
+    years: int,
+    start_year: int,
+    rng: np.random.Generator,
+) -> Dict[str, np.ndarray]:
+    """Monthly rows of factories ``start:stop`` (the first ``rows`` of them)."""
+    months_per_factory = 12 * years
+    factory = np.repeat(np.arange(start, stop, dtype=np.int64), months_per_factory)[:rows]
+    step = np.tile(np.arange(months_per_factory), stop - start)[:rows]
+    month = step % 12 + 1
+    sector = fleet["sector"][factory]
+
+    # Seasonal variation: winter production push (months 11–2),
+    # summer maintenance (months 6–7)
+    u = rng.random(rows)
+    winter = np.isin(month, (11, 12, 1, 2))
+    summer = np.isin(month, (6, 7))
+    seasonal = np.where(winter, 1.0 + 0.10 * u, np.where(summer, 0.90 + 0.10 * u, 1.0))
+
+    prod = fleet["base_prod"][factory] * rng.uniform(0.85, 1.15, rows) * seasonal
+    energy = fleet["base_energy"][factory] * rng.uniform(0.85, 1.15, rows) * seasonal
+
+    # Select energy source based on sector-specific probability
+    profiles = [SECTOR_PROFILES[s] for s in sectors]
+    cum = np.array([
+        np.cumsum([p.energy_weights.get(src, 0.0) for src in ENERGY_SOURCES]) for p in profiles
+    ])
+    cum /= cum[:, -1:]
+    source = (rng.random(rows)[:, None] >= cum[sector]).sum(axis=1)
+    source = np.minimum(source, len(ENERGY_SOURCES) - 1)
+
+    # Raw material weight (always > product weight)
+    ratio = np.array([p.raw_material_ratio for p in profiles])[sector]
+    raw_material = prod * rng.uniform(ratio[:, 0], ratio[:, 1])
+
+    return {
+        "factory": factory,
+        "sector": sector,                    # code into the sector levels
+        "year": start_year + step // 12,
+        "month": month,
+        "monthly_production_tons": np.round(prod, 1),
+        "energy_used_mwh": np.round(energy, 1),
+        "energy_source_type": source,        # code into the source levels
+        "raw_material_weight_tons": np.round(raw_material, 1),
+    }
+
+
+def _dirty(
+    columns: Dict[str, np.ndarray],
+    n_sectors: int,
+    dirty_rate: float,
+    rng: np.random.Generator,
+) -> Dict[str, np.ndarray]:
+    """Corrupt a ``dirty_rate`` fraction of rows, one defect per row."""
+    n = len(columns["month"])
+    dirty = rng.random(n) < dirty_rate
+    kind = np.where(dirty, rng.integers(0, 4, n), -1)
+    variant = rng.integers(0, 3, n)
+
+    # Bad sectors: codes past the canonical ones select a variant spelling
+    # (recoverable) or an unknown sector (dropped by the cleaner)
+    bad = kind == 0
+    unknown = bad & (rng.random(n) < 0.5)
+    sector = columns["sector"].copy()
+    sector[bad] = n_sectors + sector[bad] * len(_SECTOR_VARIANTS) + variant[bad]
+    sector[unknown] = -1 - variant[unknown]
+    columns["sector"] = sector
+
+    # Energy-source variants map back to the canonical source
+    variant_source = kind == 1
+    source = columns["energy_source_type"].copy()
+    source[variant_source] = (
+        len(ENERGY_SOURCES) + source[variant_source] * 3 + variant[variant_source]
+    )
+    columns["energy_source_type"] = source
+
+    # Negative production or energy
+    negative = kind == 2
+    for i, col in enumerate(("monthly_production_tons", "energy_used_mwh")):
+        which = negative & (variant % 2 == i)
+        columns[col] = np.where(which, -columns[col], columns[col])
+
+    # Duplicates: the row appears twice in a row
+    repeats = np.where(kind == 3, 2, 1)
+    if (repeats > 1).any():
+        columns = {k: np.repeat(v, repeats) for k, v in columns.items()}
+    return columns
+
+
+def _levels(sectors: List[str]) -> Tuple[List[str], List[str]]:
+    """Text of each sector and energy-source code (see `_dirty`)."""
+    sector_levels = list(sectors) + [
+        v.format(lower=s.lower(), upper=s.upper()) for s in sectors for v in _SECTOR_VARIANTS
+    ]
+    source_levels = ENERGY_SOURCES + [
+        v for src in ENERGY_SOURCES for v in _SOURCE_VARIANTS[src]
     ]
+    return sector_levels, source_levels
+
 
-    with open(output_path, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(all_rows)
+def _write_chunk(f, columns: Dict[str, np.ndarray], fleet: Dict[str, np.ndarray],
+                 sectors: List[str]) -> int:
+    """Append one chunk of rows to the open CSV file ``f``."""
+    sector_levels, source_levels = _levels(sectors)
+    # Unknown sectors have negative codes: index them from the end
+    sector_levels = sector_levels + _INVALID_SECTORS[::-1]
+    sector = columns["sector"] % len(sector_levels)
 
-    print(f"✅ Generated {len(all_rows)} rows for {len(factory_specs)} factories → {output_path}")
+    names = [n for n in FIELDNAMES if n != "factory_id"]
+    if "year" in columns:
+        names.insert(1, "year")
+
+    if pa is not None:
+        first = int(columns["factory"][0])
+        last = int(columns["factory"][-1]) + 1
+        arrays = [pa.DictionaryArray.from_arrays(
+            (columns["factory"] - first).astype(np.int32),
+            pa.array(fleet["factory_id"][first:last], type=pa.string()),
+        )]
+        for name in names:
+            if name == "sector":
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    sector.astype(np.int32), pa.array(sector_levels)))
+            elif name == "energy_source_type":
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    columns[name].astype(np.int32), pa.array(source_levels)))
+            else:
+                arrays.append(pa.array(columns[name]))
+        table = pa.Table.from_arrays(arrays, names=["factory_id"] + names)
+        pa_csv.write_csv(
+            table, f,
+            write_options=pa_csv.WriteOptions(include_header=False, quoting_style="none"),
+        )
+    else:
+        text = [fleet["factory_id"][columns["factory"]].tolist()]
+        for name in names:
+            if name == "sector":
+                text.append(np.array(sector_levels, dtype=object)[sector].tolist())
+            elif name == "energy_source_type":
+                text.append(np.array(source_levels, dtype=object)[columns[name]].tolist())
+            else:
+                text.append(columns[name].astype(str).tolist())
+        f.write(("\n".join(map(",".join, zip(*text))) + "\n").encode("utf-8"))
+    return len(columns["month"])
 
 
 if __name__ == "__main__":
-    generate_monthly_data("../data/monthly_production.csv")
+    parser = argparse.ArgumentParser(description="Generate synthetic production data")
+    parser.add_argument("output", nargs="?", default="../data/monthly_production.csv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--factories", type=int, help="Fleet size (default: 50)")
+    parser.add_argument(
+        "--sector-mix", help="Sector weights, e.g. Steel=0.5,Textile=0.3,Electronics=0.2"
+    )
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--start-year", type=int, default=2026)
+    parser.add_argument("--dirty-rate", type=float, default=0.0)
+    parser.add_argument("--rows", type=int, help="Exact number of factory-months")
+    args = parser.parse_args()
+
+    mix = None
+    if args.sector_mix:
+        mix = {k: float(v) for k, v in (p.split("=") for p in args.sector_mix.split(","))}
+    generate_monthly_data(
+        args.output,
+        seed=args.seed,
+        n_factories=args.factories or (50 if mix else None),
+        sector_mix=mix,
+        years=args.years,
+        start_year=args.start_year,
+        dirty_rate=args.dirty_rate,
+        total_rows=args.rows,
+    )
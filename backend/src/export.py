@@ -0,0 +1,148 @@
+"""Columnar export of per-month audit records.
+
+Every audited month of every factory is written as one row of a Parquet
+file. Repetitive text columns (factory_id, sector, energy_source_type,
+status) are dictionary-encoded, so a year of records is a fraction of the
+size of the same data as CSV or JSON, and BI tools can load month-level
+results without re-running the audit.
+
+Requires `pyarrow` (optional): `AVAILABLE` is False without it and the
+export is skipped.
+"""
+
+from typing import Dict, Iterator, Mapping
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+from .models import Industry
+
+AVAILABLE = pa is not None
+
+# Rows per Parquet row group (also the CSV streaming chunk size)
+ROW_GROUP_ROWS = 128 * 1024
+
+_FLOAT_COLUMNS = [
+    "monthly_emissions_kg",
+    "cumulative_emissions_kg",
+    "production_kg",
+    "energy_kg",
+    "material_kg",
+    "source_multiplier",
+]
+
+
+def records_table(years: Mapping[int, Dict[str, Industry]]) -> "pa.Table":
+    """
+    Build the per-month records of every audited year as an Arrow table.
+
+    ``years`` maps calendar year → factory_id → Industry. Rows are grouped
+    by year, then by factory (in dict order), months in recorded order.
+
+    Columns: factory_id, sector, year, month, month_number,
+    energy_source_type, monthly_emissions_kg, total_emissions_kg,
+    production_kg, energy_kg, material_kg, source_multiplier, status.
+    """
+    _require_pyarrow()
+    audited = [(year, f) for year, factories in years.items() for f in factories.values()]
+    per_factory = [f.month_columns() for _, f in audited]
+    counts = np.array([len(c["months"]) for c in per_factory], dtype=np.int64)
+    # One code per factory-year; a factory audited in several years repeats
+    factory_codes = np.repeat(np.arange(len(per_factory), dtype=np.int32), counts)
+
+    def concat(name: str, dtype) -> np.ndarray:
+        if not per_factory:
+            return np.empty(0, dtype=dtype)
+        return np.concatenate([np.frombuffer(c[name], dtype=dtype) for c in per_factory])
+
+    def levels(values: list) -> tuple:
+        """Sorted distinct ``values`` and each value's index among them."""
+        uniques = sorted(set(values))
+        index = {v: i for i, v in enumerate(uniques)}
+        return uniques, np.array([index[v] for v in values], dtype=np.int32)
+
+    id_levels, id_codes = levels([f.factory_id for _, f in audited])
+    sector_levels, sector_codes = levels([f.sector for _, f in audited])
+    year_values = np.array([year for year, _ in audited], dtype=np.int16)
+
+    # month_number restarts at 1 for each factory-year
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    month_number = np.arange(len(factory_codes), dtype=np.int64) - starts + 1
+
+    sources = [s for c in per_factory for s in c["energy_source_type"]]
+    alerts = concat("alerts", np.int8)
+
+    columns = {
+        "factory_id": pa.DictionaryArray.from_arrays(
+            id_codes[factory_codes], pa.array(id_levels, type=pa.string())
+        ),
+        "sector": pa.DictionaryArray.from_arrays(
+            sector_codes[factory_codes], pa.array(sector_levels, type=pa.string())
+        ),
+        "year": pa.array(year_values[factory_codes]),
+        "month": pa.array(concat("months", np.int16)),
+        "month_number": pa.array(month_number.astype(np.int16)),
+        "energy_source_type": pa.array(sources, type=pa.string()).dictionary_encode(),
+    }
+    for name in _FLOAT_COLUMNS:
+        out_name = "total_emissions_kg" if name == "cumulative_emissions_kg" else name
+        columns[out_name] = pa.array(concat(name, np.float64))
+    columns["status"] = pa.DictionaryArray.from_arrays(
+        alerts.astype(np.int32), pa.array(["OK", "ALERT"], type=pa.string())
+    )
+    return pa.table(columns)
+
+
+def write_records_parquet(years: Mapping[int, Dict[str, Industry]], output_path: str) -> None:
+    """Write the per-month records of every audited year to a Parquet file."""
+    table = records_table(years)
+    pq.write_table(
+        table, output_path,
+        row_group_size=ROW_GROUP_ROWS,
+        compression="zstd",
+        use_dictionary=True,
+    )
+    print(f"✅ Records written → {output_path} ({table.num_rows:,} rows)")
+
+
+def iter_records_csv(parquet_path: str) -> Iterator[bytes]:
+    """
+    Stream a records Parquet file as CSV, one row group per chunk.
+
+    Only one row group is decoded at a time, so memory stays flat however
+    many months the file holds.
+    """
+    _require_pyarrow()
+    parquet = pq.ParquetFile(parquet_path)
+    header = True
+    for batch in parquet.iter_batches(batch_size=ROW_GROUP_ROWS):
+        # Decode dictionaries so the CSV holds plain values
+        batch = pa.RecordBatch.from_arrays(
+            [
+                col.dictionary_decode() if pa.types.is_dictionary(col.type) else col
+                for col in batch.columns
+            ],
+            names=batch.schema.names,
+        )
+        sink = pa.BufferOutputStream()
+        pa_csv.write_csv(
+            batch, sink,
+            write_options=pa_csv.WriteOptions(include_header=header, quoting_style="needed"),
+        )
+        header = False
+        yield sink.getvalue().to_pybytes()
+    if header:  # Empty file: still send the header
+        sink = pa.BufferOutputStream()
+        pa_csv.write_csv(parquet.schema_arrow.empty_table(), sink)
+        yield sink.getvalue().to_pybytes()
+
+
+def _require_pyarrow() -> None:
+    if not AVAILABLE:
+        raise RuntimeError("Record export requires pyarrow (pip install pyarrow).")
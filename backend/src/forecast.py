@@ -0,0 +1,209 @@
+"""Year-end projections and expected breach months from partial-year data.
+
+The auditor can only say whether a factory is over its cap *so far*. For
+every factory-year with months still to come, `forecast` fits
+
+    monthly_kg(m) ≈ (level + slope · (m − m̄)) · season[sector, m]
+
+to the months recorded — a linear trend on deseasonalized emissions — and
+extends it to December. Level and slope are closed-form least squares
+whose sums are one `np.bincount` each over the whole fleet, so the fit is a
+handful of vector passes however many factories there are. Slopes from a
+few noisy months are unreliable, so they are pooled across the fleet:
+each is shrunk toward no trend in proportion to its noise, against the
+spread of trends in its sector (`_shrink`). With fewer than `MIN_TREND_MONTHS` months the projection is
+flat (the deseasonalized mean).
+
+Seasonal indices (mean 1 over the year) are estimated per sector from the
+complete factory-years in the same job — earlier years of a multi-year
+upload, or peers that already reported all twelve months — and are flat
+where a sector has none.
+
+The projected year-end total is the recorded total plus the projected
+months. The expected breach month is the first month whose running total
+exceeds the cap: the actual breach month when the cap is already crossed,
+else the first projected month over it, else none (0).
+"""
+
+from typing import Dict, List, Mapping, NamedTuple
+
+import numpy as np
+
+from .models import Industry
+
+MONTHS = 12
+# Fewer recorded months than this → flat projection (no trend)
+MIN_TREND_MONTHS = 3
+
+
+class Forecast(NamedTuple):
+    """Projections per factory-year, in input order."""
+    projected_total_kg: np.ndarray    # float64
+    breach_month: np.ndarray          # int16; 0 = no breach expected
+    months_projected: np.ndarray      # int16
+    season: np.ndarray                # (sectors × 12) seasonal indices used
+    sectors: List[str]
+
+
+def seasonal_indices(
+    groups: np.ndarray,
+    group_sectors: np.ndarray,
+    months: np.ndarray,
+    monthly: np.ndarray,
+    n_sectors: int,
+) -> np.ndarray:
+    """
+    (sectors × 12) seasonal indices from complete factory-years.
+
+    A complete factory-year contributes each month's emissions relative to
+    its own monthly mean; a sector's index is the average of those ratios,
+    normalized to mean 1. Sectors without a complete year get 1.0.
+    """
+    n_groups = len(group_sectors)
+    counts = np.bincount(groups, minlength=n_groups)
+    sums = np.bincount(groups, weights=monthly, minlength=n_groups)
+    complete = (counts == MONTHS) & (sums > 0)
+
+    rows = complete[groups]
+    ratio = monthly[rows] / (sums[groups[rows]] / MONTHS)
+    cells = group_sectors[groups[rows]] * MONTHS + (months[rows] - 1)
+    size = n_sectors * MONTHS
+    total = np.bincount(cells, weights=ratio, minlength=size).reshape(n_sectors, MONTHS)
+    seen = np.bincount(cells, minlength=size).reshape(n_sectors, MONTHS)
+
+    season = np.ones((n_sectors, MONTHS))
+    known = seen.min(axis=1) > 0
+    season[known] = total[known] / seen[known]
+    season[known] /= season[known].mean(axis=1, keepdims=True)
+    return season
+
+
+def forecast(
+    groups: np.ndarray,
+    group_sectors: np.ndarray,
+    months: np.ndarray,
+    monthly: np.ndarray,
+    totals: np.ndarray,
+    caps: np.ndarray,
+    first_breach: np.ndarray,
+    sectors: List[str],
+) -> Forecast:
+    """
+    Project every factory-year to December (see the module docstring).
+
+    Parameters
+    ----------
+    groups, months, monthly : numpy.ndarray
+        Per recorded month: factory-year index, month (1–12), emissions (kg).
+    group_sectors, totals, caps, first_breach : numpy.ndarray
+        Per factory-year: sector code into ``sectors``, running total so
+        far, carbon cap, and month the cap was crossed (0 if not yet).
+    """
+    n_groups = len(group_sectors)
+    season = seasonal_indices(groups, group_sectors, months, monthly, len(sectors))
+
+    # ── Trend on deseasonalized months (least squares, per factory-year) ──
+    factor = season[group_sectors[groups], months - 1]
+    y = np.divide(monthly, factor, out=np.zeros(len(monthly)), where=factor > 0)
+    x = months.astype(np.float64)
+
+    def sums(values: np.ndarray) -> np.ndarray:
+        return np.bincount(groups, weights=values, minlength=n_groups)
+
+    n = np.bincount(groups, minlength=n_groups).astype(np.float64)
+    sx, sxx, sy, sxy, syy = sums(x), sums(x * x), sums(y), sums(x * y), sums(y * y)
+    mean_x = np.divide(sx, n, out=np.zeros(n_groups), where=n > 0)
+    mean_y = np.divide(sy, n, out=np.zeros(n_groups), where=n > 0)
+    denom = n * sxx - sx * sx
+    trend = (n >= MIN_TREND_MONTHS) & (denom > 0) & (mean_y > 0)
+    slope = np.zeros(n_groups)
+    slope[trend] = (n[trend] * sxy[trend] - sx[trend] * sy[trend]) / denom[trend]
+    rss = np.maximum(syy - n * mean_y**2 - slope**2 * denom / np.maximum(n, 1), 0.0)
+    # Sampling variance of each slope, relative to the factory's level
+    noise = np.zeros(n_groups)
+    noise[trend] = rss[trend] / (n[trend] - 2) * n[trend] / denom[trend] / mean_y[trend] ** 2
+    relative = np.divide(slope, mean_y, out=np.zeros(n_groups), where=trend)
+    relative = _shrink(relative, noise, group_sectors, trend, len(sectors))
+    slope = relative * mean_y
+
+    # ── Projection of the months after the last one recorded ──
+    last = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(last, groups, months)
+    calendar = np.arange(1, MONTHS + 1)
+    future = calendar > last[:, None]                                  # (G, 12)
+    projected = np.maximum(mean_y[:, None] + slope[:, None] * (calendar - mean_x[:, None]), 0.0)
+    projected *= season[group_sectors] * future
+
+    running = totals[:, None] + np.cumsum(projected, axis=1)
+    over = (running > caps[:, None]) & future
+    projected_breach = np.where(over.any(axis=1), over.argmax(axis=1) + 1, 0)
+    breach = np.where(first_breach > 0, first_breach, projected_breach)
+
+    return Forecast(
+        projected_total_kg=totals + projected.sum(axis=1),
+        breach_month=breach.astype(np.int16),
+        months_projected=future.sum(axis=1).astype(np.int16),
+        season=season,
+        sectors=sectors,
+    )
+
+
+def _shrink(
+    relative: np.ndarray,
+    noise: np.ndarray,
+    group_sectors: np.ndarray,
+    fitted: np.ndarray,
+    n_sectors: int,
+) -> np.ndarray:
+    """
+    Empirical-Bayes shrinkage of relative slopes toward no trend.
+
+    A sector's slopes spread by the true variation of trends (τ²) plus each
+    fit's sampling noise; τ² is their mean square minus the mean noise.
+    Each slope keeps τ² / (τ² + its noise) of its value, so a fleet without
+    real trends extrapolates none, while a clear trend among trending peers
+    is kept. (Shrinking toward the sector's mean slope instead would spread
+    the shared error of the seasonal indices to every factory.)
+    """
+    codes = group_sectors[fitted]
+    count = np.maximum(np.bincount(codes, minlength=n_sectors), 1)
+    square = np.bincount(codes, weights=relative[fitted] ** 2, minlength=n_sectors) / count
+    mean_noise = np.bincount(codes, weights=noise[fitted], minlength=n_sectors) / count
+    tau2 = np.maximum(square - mean_noise, 0.0)[codes]
+
+    out = np.zeros_like(relative)
+    total = tau2 + noise[fitted]
+    weight = np.divide(tau2, total, out=np.zeros(len(codes)), where=total > 0)
+    out[fitted] = weight * relative[fitted]
+    return out
+
+
+def forecast_years(years: Mapping[int, Dict[str, Industry]]) -> Forecast:
+    """
+    `forecast` for audited factories, ``years`` mapping year → factory_id → Industry.
+
+    Factory-years come out grouped by year, then in dict order (as in
+    `api.factory_results.factory_columns`). Seasonality is pooled over
+    every year of the job.
+    """
+    audited = [f for factories in years.values() for f in factories.values()]
+    sectors = sorted({f.sector for f in audited})
+    sector_index = {s: i for i, s in enumerate(sectors)}
+    per_factory = [f.month_columns() for f in audited]
+    counts = np.array([len(c["months"]) for c in per_factory], dtype=np.int64)
+
+    def concat(name: str, dtype) -> np.ndarray:
+        if not per_factory:
+            return np.empty(0, dtype=dtype)
+        return np.concatenate([np.frombuffer(c[name], dtype=dtype) for c in per_factory])
+
+    return forecast(
+        groups=np.repeat(np.arange(len(audited)), counts),
+        group_sectors=np.array([sector_index[f.sector] for f in audited], dtype=np.int64),
+        months=concat("months", np.int16).astype(np.int64),
+        monthly=concat("monthly_emissions_kg", np.float64),
+        totals=np.array([f.total_emissions for f in audited], dtype=np.float64),
+        caps=np.array([f.carbon_cap_kg for f in audited], dtype=np.float64),
+        first_breach=np.array([f.first_breach_month or 0 for f in audited], dtype=np.int64),
+        sectors=sectors,
+    )
@@ -4,8 +4,13 @@ This module provides the `Industry` class (as required by the problem statement)
 that encapsulates a factory's identity and its private auditor closure.
 """
 
-from typing import List, Dict, Any, Optional
+import operator
+from array import array
+from functools import reduce
+from typing import List, Dict, Any, Mapping, Optional, Tuple, Union
+
 from .closures import make_emission_auditor
+from .config import EmissionFactors
 
 
 class Industry:
@@ -19,15 +24,31 @@ class Industry:
 
     The auditor closure is created once during __init__ and maintains
     independent, isolated emission state for this factory.
+
+    Monthly results are kept in typed arrays (8 bytes per value instead of a
+    dict per month), and running aggregates — total, sum, max, month count,
+    alert count and first breach month — are updated as months are recorded,
+    so every summary property is O(1). `history` rebuilds the record dicts
+    on demand.
     """
 
+    __slots__ = (
+        "_factory_id", "_sector", "_cap", "_auditor",
+        "_months", "_monthly", "_totals",
+        "_production", "_energy", "_material", "_multiplier", "_alert_flags",
+        "_sources", "_alert_text", "_sum_monthly", "_max_monthly", "_alerts",
+        "_first_breach_month",
+    )
+
     def __init__(
         self,
         factory_id: str,
         sector: str,
-        emission_factor: dict,
+        emission_factor: Union[dict, EmissionFactors],
         carbon_cap_kg: float,
-        energy_source_multipliers: Optional[dict] = None,
+        energy_source_multipliers: Optional[Mapping[str, float]] = None,
+        history: Optional[List[Dict[str, Any]]] = None,
+        total_emissions_kg: Optional[float] = None,
     ):
         """
         Initialize an Industry instance.
@@ -38,27 +59,68 @@ class Industry:
             Unique factory identifier (e.g. "FAC_STEEL_01").
         sector : str
             Industry sector name.
-        emission_factor : dict
+        emission_factor : dict or EmissionFactors
             Sector-specific emission factors passed to the closure.
         carbon_cap_kg : float
             Annual carbon cap in kg CO₂.
         energy_source_multipliers : dict, optional
             Energy source type multipliers.
+        history : list[dict], optional
+            Monthly audit records already computed for this factory (e.g. by
+            the vectorized engine). The auditor closure resumes after them.
+        total_emissions_kg : float, optional
+            Unrounded cumulative total matching ``history``. Defaults to the
+            last record's ``total_emissions_kg``.
         """
         self._factory_id = factory_id
         self._sector = sector
+        self._cap = float(carbon_cap_kg)
+
+        # Per-month values (rounded as reported), one typed array per field
+        self._months = array("h")
+        self._monthly = array("d")
+        self._totals = array("d")
+        self._production = array("d")
+        self._energy = array("d")
+        self._material = array("d")
+        self._multiplier = array("d")
+        self._alert_flags = array("b")
+        self._sources = []              # energy_source_type ("" if none)
+        # Alert messages that differ from the one rebuilt from the rounded
+        # total (rare: only at a rounding boundary), by month index
+        self._alert_text = {}
+
+        # Running aggregates
+        self._sum_monthly = 0.0
+        self._max_monthly = 0.0
+        self._alerts = 0
+        self._first_breach_month = None
+
+        for record in history or ():
+            self._append(record)
+
+        if total_emissions_kg is None:
+            total_emissions_kg = self.total_emissions
+
+        self._start_auditor(emission_factor, energy_source_multipliers, total_emissions_kg)
 
+    def _start_auditor(
+        self,
+        emission_factor: Union[dict, EmissionFactors],
+        energy_source_multipliers: Optional[Mapping[str, float]],
+        total_emissions_kg: float,
+    ) -> None:
+        """Create the auditor closure, resuming after the recorded months."""
         # PRIVATE: Each factory gets its own closure — fully isolated state
         self._auditor = make_emission_auditor(
-            sector=sector,
+            sector=self._sector,
             emission_factor=emission_factor,
-            carbon_cap_kg=carbon_cap_kg,
+            carbon_cap_kg=self._cap,
             energy_source_multipliers=energy_source_multipliers,
+            initial_total_kg=total_emissions_kg,
+            initial_monthly_log=self._monthly.tolist(),
         )
 
-        # History of monthly audit results (for reporting)
-        self._history: List[Dict[str, Any]] = []
-
     # ── Read-only properties ──
 
     @property
@@ -71,25 +133,86 @@ class Industry:
         """Read-only sector name."""
         return self._sector
 
+    @property
+    def carbon_cap_kg(self) -> float:
+        """Annual carbon cap in kg CO₂."""
+        return self._cap
+
     @property
     def history(self) -> List[Dict[str, Any]]:
-        """Read-only copy of emission history."""
-        return list(self._history)
+        """Emission history as record dicts (rebuilt on each access)."""
+        return [self._record(i) for i in range(len(self._months))]
+
+    @property
+    def months_recorded(self) -> int:
+        """Number of months audited."""
+        return len(self._months)
+
+    @property
+    def last_month(self) -> Optional[int]:
+        """Most recently recorded month, or None."""
+        return self._months[-1] if self._months else None
 
     @property
     def total_emissions(self) -> float:
         """Current cumulative emissions in kg CO₂."""
-        return self._history[-1]["total_emissions_kg"] if self._history else 0.0
+        return self._totals[-1] if self._totals else 0.0
+
+    @property
+    def max_monthly_emissions(self) -> float:
+        """Highest single-month emissions in kg CO₂ (0.0 with no data)."""
+        return self._max_monthly
+
+    @property
+    def avg_monthly_emissions(self) -> float:
+        """Mean monthly emissions in kg CO₂ (0.0 with no data)."""
+        return self._sum_monthly / len(self._monthly) if self._monthly else 0.0
 
     @property
     def alerts_count(self) -> int:
         """Number of months where the carbon cap was exceeded."""
-        return sum(1 for r in self._history if r["status"] == "ALERT")
+        return self._alerts
 
     @property
     def is_over_cap(self) -> bool:
         """Whether the factory has ever exceeded its carbon cap."""
-        return self.alerts_count > 0
+        return self._alerts > 0
+
+    @property
+    def first_breach_month(self) -> Optional[int]:
+        """Month in which the cap was first exceeded, or None."""
+        return self._first_breach_month
+
+    @property
+    def first_alert(self) -> Optional[Dict[str, Any]]:
+        """Audit record of the month the cap was first exceeded, or None."""
+        if self._first_breach_month is None:
+            return None
+        return self._record(self._alert_flags.index(1))
+
+    @property
+    def cumulative_series(self) -> List[Tuple[int, float]]:
+        """(month, cumulative kg CO₂) pairs in recorded order."""
+        return list(zip(self._months, self._totals))
+
+    def month_columns(self) -> Dict[str, Any]:
+        """
+        Copies of the per-month columns, in recorded order.
+
+        Numeric columns are typed `array.array`s (``months`` int16,
+        ``alerts`` int8, the rest float64); ``energy_source_type`` is a list.
+        """
+        return {
+            "months": self._months[:],
+            "monthly_emissions_kg": self._monthly[:],
+            "cumulative_emissions_kg": self._totals[:],
+            "production_kg": self._production[:],
+            "energy_kg": self._energy[:],
+            "material_kg": self._material[:],
+            "source_multiplier": self._multiplier[:],
+            "alerts": self._alert_flags[:],
+            "energy_source_type": list(self._sources),
+        }
 
     # ── Core method ──
 
@@ -137,12 +260,188 @@ class Industry:
             "month": month,
         })
 
-        self._history.append(result)
+        self._append(result, energy_source_type)
         return result
 
+    # ── Persistence ──
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        JSON-serializable copy of this factory's accumulated state.
+
+        Holds the auditor's unrounded running total, so a factory restored
+        with `from_snapshot` continues exactly as this one would.
+        """
+        return {
+            "factory_id": self._factory_id,
+            "sector": self._sector,
+            "carbon_cap_kg": self._cap,
+            "total_emissions_kg": self._auditor.snapshot()["total_emissions_kg"],
+            "status": "EXCEEDED" if self.is_over_cap else "COMPLIANT",
+            "months": self._months.tolist(),
+            "monthly_emissions_kg": self._monthly.tolist(),
+            "cumulative_emissions_kg": self._totals.tolist(),
+            "breakdown": {
+                "production_kg": self._production.tolist(),
+                "energy_kg": self._energy.tolist(),
+                "material_kg": self._material.tolist(),
+                "source_multiplier": self._multiplier.tolist(),
+            },
+            "energy_source_type": list(self._sources),
+            "alerts": [bool(a) for a in self._alert_flags],
+            "alert_text": {str(i): text for i, text in self._alert_text.items()},
+        }
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        state: Mapping[str, Any],
+        emission_factor: Union[dict, EmissionFactors],
+        carbon_cap_kg: float,
+        energy_source_multipliers: Optional[Mapping[str, float]] = None,
+    ) -> "Industry":
+        """
+        Rebuild a factory (and its auditor) from a `snapshot` dict.
+
+        Columns (lists, or same-typed buffers such as NumPy arrays) are
+        bulk-loaded into the typed arrays, so restoring costs no per-month
+        Python objects.
+
+        Raises
+        ------
+        ValueError
+            If the snapshot is malformed.
+        """
+        try:
+            factory = cls.__new__(cls)
+            factory_id = state["factory_id"]
+            # A missing id (NaN ≠ itself) stays missing, as in a serial audit
+            factory._factory_id = str(factory_id) if factory_id == factory_id else factory_id
+            factory._sector = str(state["sector"])
+            factory._cap = float(carbon_cap_kg)
+            factory._load_columns(state)
+            factory._start_auditor(
+                emission_factor, energy_source_multipliers,
+                float(state["total_emissions_kg"]),
+            )
+            return factory
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            raise ValueError(f"Invalid factory snapshot: {e}") from e
+
+    def _load_columns(self, state: Mapping[str, Any]) -> None:
+        """Set the arrays and aggregates from snapshot columns."""
+        breakdown = state["breakdown"]
+        self._months = _typed_array("h", state["months"])
+        self._monthly = _typed_array("d", state["monthly_emissions_kg"])
+        self._totals = _typed_array("d", state["cumulative_emissions_kg"])
+        self._production = _typed_array("d", breakdown["production_kg"])
+        self._energy = _typed_array("d", breakdown["energy_kg"])
+        self._material = _typed_array("d", breakdown["material_kg"])
+        self._multiplier = _typed_array("d", breakdown["source_multiplier"])
+        self._alert_flags = _typed_array("b", state["alerts"])
+        sources = state.get("energy_source_type")
+        self._sources = [""] * len(self._months) if sources is None else list(sources)
+        columns = (
+            self._months, self._monthly, self._totals, self._production,
+            self._energy, self._material, self._multiplier, self._alert_flags,
+            self._sources,
+        )
+        if len({len(c) for c in columns}) > 1:
+            raise ValueError("column lengths differ")
+
+        self._alert_text = {int(i): str(t) for i, t in state.get("alert_text", {}).items()}
+        # Left-to-right, like the running sum in `_append`
+        self._sum_monthly = reduce(operator.add, self._monthly, 0.0)
+        self._max_monthly = max(self._monthly, default=0.0)
+        self._alerts = self._alert_flags.count(1)
+        self._first_breach_month = (
+            self._months[self._alert_flags.index(1)] if self._alerts else None
+        )
+
+    # ── Compact storage ──
+
+    def _append(self, record: Dict[str, Any], source: Optional[str] = None) -> None:
+        """Store one audit record in the typed arrays and update aggregates."""
+        index = len(self._months)
+        monthly = record["monthly_emissions_kg"]
+        total = record["total_emissions_kg"]
+        breakdown = record["breakdown"]
+        is_alert = record["status"] == "ALERT"
+
+        self._months.append(record["month"])
+        self._monthly.append(monthly)
+        self._totals.append(total)
+        self._production.append(breakdown["production_kg"])
+        self._energy.append(breakdown["energy_kg"])
+        self._material.append(breakdown["material_kg"])
+        self._multiplier.append(breakdown["source_multiplier"])
+        self._alert_flags.append(is_alert)
+        self._sources.append(source or "")
+
+        self._sum_monthly += monthly
+        if index == 0 or monthly > self._max_monthly:
+            self._max_monthly = monthly
+        if is_alert:
+            self._alerts += 1
+            if self._first_breach_month is None:
+                self._first_breach_month = record["month"]
+            alert = record["alert"]
+            if alert is not None and alert != self._format_alert(total):
+                self._alert_text[index] = alert
+
+    def _format_alert(self, total: float) -> str:
+        return (
+            f"🚨 Carbon cap exceeded! "
+            f"Total: {total:,.0f} kg CO₂ "
+            f"(cap: {self._cap:,.0f} kg)"
+        )
+
+    def _record(self, i: int) -> Dict[str, Any]:
+        """Rebuild the audit record dict for the i-th recorded month."""
+        is_alert = bool(self._alert_flags[i])
+        alert = None
+        if is_alert:
+            alert = self._alert_text.get(i) or self._format_alert(self._totals[i])
+        return {
+            "month_number": i + 1,
+            "monthly_emissions_kg": self._monthly[i],
+            "total_emissions_kg": self._totals[i],
+            "status": "ALERT" if is_alert else "OK",
+            "alert": alert,
+            "breakdown": {
+                "production_kg": self._production[i],
+                "energy_kg": self._energy[i],
+                "material_kg": self._material[i],
+                "source_multiplier": self._multiplier[i],
+            },
+            "factory_id": self._factory_id,
+            "sector": self._sector,
+            "month": self._months[i],
+        }
+
     def __repr__(self) -> str:
         return (
             f"Industry(factory_id='{self._factory_id}', sector='{self._sector}', "
             f"total_emissions={self.total_emissions:,.0f} kg CO₂, "
             f"alerts={self.alerts_count})"
         )
+
+
+def _typed_array(typecode: str, values: Any) -> array:
+    """
+    ``array(typecode, values)``; a same-typed array is adopted as-is and
+    other same-typed buffers (e.g. NumPy) are copied in one step.
+    """
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    if not isinstance(values, (list, tuple)):
+        try:
+            view = memoryview(values)
+        except TypeError:
+            pass
+        else:
+            if view.format == typecode and view.contiguous:
+                out = array(typecode)
+                out.frombytes(view.cast("B"))
+                return out
+    return array(typecode, values)
@@ -0,0 +1,144 @@
+"""Multi-process audit sharded by factory.
+
+Factories never share state, so a cleaned table can be audited in parallel:
+1. Rows are assigned to shards by a stable hash of `factory_id` (pandas'
+   fixed-key SipHash — the same in every process and run, unlike the
+   builtin ``hash``), so each factory lives in exactly one shard
+2. Each shard is audited in a pool process — the vectorized engine sends
+   back `vectorized.FleetColumns` (NumPy columns, cheap to pickle), the
+   closure engine `Industry.snapshot` dicts
+3. Factories are rebuilt in first-appearance order and, if requested, the
+   per-month records are reassembled in input row order
+
+Output is identical to a serial `runner.run_audit` on the same table.
+"""
+
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .config import get_config
+from .models import Industry
+from .vectorized import FleetColumns, audit_columns
+
+
+def shard_codes(factory_ids: np.ndarray, shards: int) -> np.ndarray:
+    """Shard index (0 … shards-1) of every row, by hash of its factory_id."""
+    hashes = pd.util.hash_array(np.asarray(factory_ids, dtype=object))
+    return (hashes % np.uint64(shards)).astype(np.int64)
+
+
+def _id_key(fid: Any) -> Any:
+    """Lookup key for a factory_id — NaN never equals itself once unpickled."""
+    return None if pd.isna(fid) else fid
+
+
+def audit_parallel(
+    df: pd.DataFrame,
+    config_path: str,
+    workers: int,
+    engine: str = "vectorized",
+    with_records: bool = True,
+    executor: Optional[Executor] = None,
+) -> Tuple[Dict[str, Industry], List[Dict[str, Any]]]:
+    """
+    Audit a cleaned table in ``workers`` processes, one shard each.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Cleaned production data with the `web_pipeline.REQUIRED_COLUMNS`.
+    config_path : str
+        Path to sectors.json config (each worker compiles it once).
+    workers : int
+        Number of shards and pool processes.
+    engine : str
+        ``"vectorized"`` (default) or ``"closure"`` — how each shard is audited.
+    with_records : bool
+        Rebuild the flat per-month record list. Pass False when only the
+        factories are needed; this skips one dict per row in the parent.
+    executor : concurrent.futures.Executor, optional
+        Reuse an existing process pool instead of spawning one.
+
+    Returns
+    -------
+    tuple[dict[str, Industry], list[dict]]
+        Same as `runner.run_audit` (records empty when ``with_records=False``).
+    """
+    if engine not in ("closure", "vectorized"):
+        raise ValueError(f"Unknown audit engine: {engine!r}")
+    if len(df) == 0:
+        return {}, []
+
+    fids = df["factory_id"].to_numpy()
+    shard_of_row = shard_codes(fids, workers)
+    shards = [
+        df.iloc[idx] for idx in
+        (np.flatnonzero(shard_of_row == s) for s in range(workers))
+        if len(idx)
+    ]
+
+    own_pool = executor is None
+    if own_pool:
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, len(shards)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    try:
+        futures = [
+            executor.submit(_audit_shard, shard, config_path, engine)
+            for shard in shards
+        ]
+        # factory_id → (shard result, index within it)
+        located: Dict[str, Tuple[Any, int]] = {}
+        for future in futures:
+            shard = future.result()
+            if isinstance(shard, FleetColumns):
+                shard = shard.as_arrays()
+                ids = shard.factory_ids
+            else:
+                ids = [state["factory_id"] for state in shard]
+            for k, fid in enumerate(ids):
+                located[_id_key(fid)] = (shard, k)
+    finally:
+        if own_pool:
+            executor.shutdown()
+
+    # ── Merge: factories in first-appearance order of the input ──
+    config = get_config(config_path)
+    # Keep a missing id as its own factory, as `vectorized._audit_arrays` does
+    codes, uniques = pd.factorize(fids, sort=False, use_na_sentinel=False)
+    factories: Dict[str, Industry] = {}
+    for fid in uniques:
+        shard, k = located[_id_key(fid)]
+        state = shard.snapshot(k) if isinstance(shard, FleetColumns) else shard[k]
+        cfg = config.sector(state["sector"])
+        factories[fid] = Industry.from_snapshot(
+            state, cfg.emission_factor, cfg.carbon_cap_kg, config.energy_multipliers,
+        )
+
+    if not with_records:
+        return factories, []
+
+    # ── Records in input row order: row i is month #rank of its factory ──
+    histories = [factories[fid].history for fid in uniques]
+    ranks = pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy()
+    all_records = [
+        histories[code][rank] for code, rank in zip(codes.tolist(), ranks.tolist())
+    ]
+    return factories, all_records
+
+
+def _audit_shard(
+    df: pd.DataFrame, config_path: str, engine: str
+) -> Union[FleetColumns, List[Dict[str, Any]]]:
+    """Pool task: audit one shard and return its factories' state."""
+    from .runner import run_audit_frame
+
+    if engine == "vectorized":
+        return audit_columns(df, get_config(config_path))
+    factories, _ = run_audit_frame(df, config_path, factories={})
+    return [f.snapshot() for f in factories.values()]
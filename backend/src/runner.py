@@ -1,31 +1,58 @@
 """Main Carbon-Trace auditing engine.
 
 Orchestrates the end-to-end audit pipeline:
-1. Load config (sectors, emission factors, caps)
-2. Process monthly CSV through Industry closures
+1. Load config (sectors, emission factors, caps) from the compiled registry
+2. Process monthly CSV through Industry closures (or the vectorized engine)
 3. Write audit summary CSV
-4. Generate cumulative emissions chart
+4. Generate cumulative emissions chart (eagerly, or later from saved series)
+
+`run_audit` and `run_audit_frame` take an optional ``on_alert(factory,
+record)`` callback, called once per factory with the audit record of the
+month its running total first exceeds the cap. The closure engine calls it
+the moment that month is recorded; the batch engines once the (shard's)
+table is audited, in breach-month order.
+
+Carbon caps are annual. A multi-year table (cleaned with a ``year``
+column) is split with `split_years` and each calendar year is audited on
+its own, so every factory's running total starts from zero on January 1:
+`run_audit_years` does this for a cleaned CSV, callers of
+`run_audit_frame` for a frame. `run_audit` audits a single year.
 """
 
 import csv
 import json
-from typing import Dict, List, Any, Tuple
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
 from pathlib import Path
+import pandas as pd
 import matplotlib
 matplotlib.use("Agg")  # Non-interactive backend
 import matplotlib.pyplot as plt
 
+from .config import DEFAULT_YEAR, CompiledConfig, get_config
 from .models import Industry
+from .vectorized import audit_frame, read_audit_csv
+
+# on_alert(factory, record of its first ALERT month)
+AlertCallback = Callable[[Industry, Dict[str, Any]], None]
 
 
 def load_config(config_path: str) -> Dict[str, Any]:
-    """Load sector emission factors, caps, and energy multipliers from JSON."""
+    """
+    Load sector emission factors, caps, and energy multipliers from JSON.
+
+    Returns a fresh mutable dict. The audit itself uses the compiled,
+    cached `src.config.get_config` instead.
+    """
     with open(config_path, encoding="utf-8") as f:
         return json.load(f)
 
 
 def run_audit(
-    input_csv: str, config_path: str
+    input_csv: str,
+    config_path: str,
+    engine: str = "closure",
+    workers: int | None = None,
+    on_alert: Optional[AlertCallback] = None,
 ) -> Tuple[Dict[str, Industry], List[Dict[str, Any]]]:
     """
     Process all monthly data through per-factory Industry closures.
@@ -33,54 +60,240 @@ def run_audit(
     Parameters
     ----------
     input_csv : str
-        Path to monthly_production.csv.
+        Path to monthly_production.csv, one calendar year of it (see
+        `run_audit_years`).
     config_path : str
         Path to sectors.json config.
+    engine : str
+        ``"closure"`` (default) feeds rows one at a time through each
+        factory's auditor closure. ``"vectorized"`` computes the whole table
+        in NumPy batches (see `src.vectorized`) with identical results.
+    workers : int, optional
+        Split the factories across this many processes by a hash of
+        ``factory_id`` and audit the shards in parallel with ``engine``
+        (see `src.parallel`). Results and order are the same as serial.
+    on_alert : callable, optional
+        Called as ``on_alert(factory, record)`` when a factory first
+        exceeds its cap (see the module docstring).
 
     Returns
     -------
     tuple[dict[str, Industry], list[dict]]
         - Dictionary of factory_id → Industry instances
         - Flat list of all monthly audit records
+
+    Raises
+    ------
+    ValueError
+        If the CSV's ``year`` column holds more than one year.
     """
-    config = load_config(config_path)
-    sectors_config = config["sectors"]
-    energy_multipliers = config.get("energy_source_multipliers", {})
+    config = get_config(config_path)
 
-    factories: Dict[str, Industry] = {}
-    all_records: List[Dict[str, Any]] = []
+    if engine not in ("closure", "vectorized"):
+        raise ValueError(f"Unknown audit engine: {engine!r}")
+    with open(input_csv, newline="", encoding="utf-8") as f:
+        has_year = "year" in (next(csv.reader(f), None) or [])
+    if has_year:
+        audits = run_audit_years(input_csv, config_path, engine, workers, on_alert)
+        if len(audits) > 1:
+            raise ValueError(
+                f"{input_csv} spans the years {sorted(audits)}; "
+                "audit it one year at a time with run_audit_years."
+            )
+        return next(iter(audits.values()), ({}, []))
+    if workers and workers > 1:
+        from .parallel import audit_parallel
+        result = audit_parallel(read_audit_csv(input_csv), config_path, workers, engine=engine)
+        return notify_alerts(result[0], on_alert), result[1]
+    if engine == "vectorized":
+        result = audit_frame(read_audit_csv(input_csv), config)
+        return notify_alerts(result[0], on_alert), result[1]
 
+    factories: Dict[str, Industry] = {}
     with open(input_csv, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            fid = row["factory_id"]
-            month = int(row["month"])
-
-            # Lazily create Industry instance on first encounter
-            if fid not in factories:
-                sector = row["sector"]
-                sector_cfg = sectors_config.get(sector, {})
-                factories[fid] = Industry(
-                    factory_id=fid,
-                    sector=sector,
-                    emission_factor=sector_cfg.get("emission_factor", {}),
-                    carbon_cap_kg=sector_cfg.get("carbon_cap_kg", 1_000_000_000),
-                    energy_source_multipliers=energy_multipliers,
-                )
-
-            factory = factories[fid]
-            result = factory.record_month(
-                month=month,
-                monthly_production_tons=float(row["monthly_production_tons"]),
-                energy_used_mwh=float(row["energy_used_mwh"]),
-                energy_source_type=row.get("energy_source_type"),
-                raw_material_weight_tons=float(row.get("raw_material_weight_tons", 0)),
+        rows = (
+            (
+                row["factory_id"],
+                row["sector"],
+                int(row["month"]),
+                float(row["monthly_production_tons"]),
+                float(row["energy_used_mwh"]),
+                row.get("energy_source_type"),
+                float(row.get("raw_material_weight_tons", 0)),
             )
-            all_records.append(result)
+            for row in csv.DictReader(f)
+        )
+        all_records = _record_rows(factories, rows, config, on_alert)
 
     return factories, all_records
 
 
+def split_years(df: "pd.DataFrame") -> List[Tuple[int, "pd.DataFrame"]]:
+    """
+    Split a cleaned frame into (year, rows) per calendar year, oldest first.
+
+    A frame without a ``year`` column is a single year, `DEFAULT_YEAR`.
+    Row order within each year is kept.
+    """
+    if "year" not in df.columns:
+        return [(DEFAULT_YEAR, df)]
+    return [(int(year), part) for year, part in df.groupby("year", sort=True)]
+
+
+def run_audit_years(
+    input_csv: str,
+    config_path: str,
+    engine: str = "closure",
+    workers: int | None = None,
+    on_alert: Optional[AlertCallback] = None,
+) -> Dict[int, Tuple[Dict[str, Industry], List[Dict[str, Any]]]]:
+    """
+    Audit a cleaned CSV one calendar year at a time (see `split_years`).
+
+    Every year starts each factory's running total from zero. Parameters
+    are those of `run_audit`; ``on_alert`` is called once per factory and
+    year.
+
+    Returns
+    -------
+    dict[int, tuple[dict[str, Industry], list[dict]]]
+        Year → `run_audit`'s result for that year's rows, oldest first.
+    """
+    if engine not in ("closure", "vectorized"):
+        raise ValueError(f"Unknown audit engine: {engine!r}")
+    config = get_config(config_path)
+    audits = {}
+    for year, part in split_years(read_audit_csv(input_csv)):
+        if workers and workers > 1:
+            from .parallel import audit_parallel
+            factories, records = audit_parallel(part, config_path, workers, engine=engine)
+            notify_alerts(factories, on_alert)
+        elif engine == "vectorized":
+            factories, records = audit_frame(part, config)
+            notify_alerts(factories, on_alert)
+        else:
+            factories = {}
+            records = _record_rows(factories, _frame_rows(part), config, on_alert)
+        audits[year] = (factories, records)
+    return audits
+
+
+def run_audit_frame(
+    df: "pd.DataFrame",
+    config_path: str,
+    factories: Dict[str, Industry] | None = None,
+    workers: int | None = None,
+    on_alert: Optional[AlertCallback] = None,
+) -> Tuple[Dict[str, Industry], List[Dict[str, Any]]]:
+    """
+    Audit an already-cleaned DataFrame without a CSV round-trip.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Output of `web_pipeline.clean_frame`, one calendar year of it (see
+        `split_years`); a ``year`` column is ignored.
+    config_path : str
+        Path to sectors.json config.
+    factories : dict[str, Industry], optional
+        Factories restored from saved state (`Industry.from_snapshot`).
+        Rows then continue each factory's auditor closure instead of
+        starting a fresh year, so only the new rows are computed. The dict
+        is updated in place; factories first seen in ``df`` are added.
+    workers : int, optional
+        Audit in this many processes, sharded by ``factory_id`` (see
+        `src.parallel`). Ignored when resuming ``factories``.
+    on_alert : callable, optional
+        Called as ``on_alert(factory, record)`` when a factory first
+        exceeds its cap — for resumed ``factories``, only if that happens
+        in ``df``'s rows.
+
+    Returns
+    -------
+    tuple[dict[str, Industry], list[dict]]
+        Same as `run_audit`; the records cover ``df``'s rows only.
+    """
+    config = get_config(config_path)
+    if factories is not None:
+        return factories, _record_rows(factories, _frame_rows(df), config, on_alert)
+    if workers and workers > 1:
+        from .parallel import audit_parallel
+        result = audit_parallel(df, config_path, workers, engine="vectorized")
+    else:
+        result = audit_frame(df, config)
+    return notify_alerts(result[0], on_alert), result[1]
+
+
+def notify_alerts(
+    factories: Dict[str, Industry], on_alert: Optional[AlertCallback]
+) -> Dict[str, Industry]:
+    """Call ``on_alert`` for every audited factory over its cap, by breach month."""
+    if on_alert is not None:
+        breached = [f for f in factories.values() if f.first_breach_month is not None]
+        breached.sort(key=lambda f: f.first_breach_month)  # Stable: table order within a month
+        for factory in breached:
+            on_alert(factory, factory.first_alert)
+    return factories
+
+
+def _frame_rows(df: "pd.DataFrame") -> Iterable[tuple]:
+    """A cleaned frame's rows in the tuple layout of `_record_rows`."""
+    ids = df["factory_id"].tolist()
+    if df["factory_id"].hasnans:
+        # One NaN object for every missing id, so they key a single factory
+        # (an unpickled shard holds a distinct NaN per row)
+        missing = float("nan")
+        ids = [missing if fid != fid else fid for fid in ids]
+    return zip(
+        ids,
+        df["sector"].tolist(),
+        df["month"].astype("int64").tolist(),
+        df["monthly_production_tons"].tolist(),
+        df["energy_used_mwh"].tolist(),
+        df["energy_source_type"].fillna("").tolist(),
+        df["raw_material_weight_tons"].tolist(),
+    )
+
+
+def _record_rows(
+    factories: Dict[str, Industry],
+    rows: Iterable[tuple],
+    config: CompiledConfig,
+    on_alert: Optional[AlertCallback] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Feed ``(factory_id, sector, month, production, energy, source, material)``
+    rows through each factory's auditor closure, creating factories lazily.
+    ``on_alert`` is called as soon as a factory's closure flips to ALERT.
+    """
+    all_records: List[Dict[str, Any]] = []
+    for fid, sector, month, production, energy, source, material in rows:
+        # Lazily create Industry instance on first encounter
+        factory = factories.get(fid)
+        if factory is None:
+            sector_cfg = config.sector(sector)
+            factory = factories[fid] = Industry(
+                factory_id=fid,
+                sector=sector,
+                emission_factor=sector_cfg.emission_factor,
+                carbon_cap_kg=sector_cfg.carbon_cap_kg,
+                energy_source_multipliers=config.energy_multipliers,
+            )
+
+        breached = factory.first_breach_month is not None
+        record = factory.record_month(
+            month=month,
+            monthly_production_tons=production,
+            energy_used_mwh=energy,
+            energy_source_type=source,
+            raw_material_weight_tons=material,
+        )
+        all_records.append(record)
+        if on_alert is not None and not breached and record["status"] == "ALERT":
+            on_alert(factory, record)
+    return all_records
+
+
 def write_summary_csv(factories: Dict[str, Industry], output_path: str) -> None:
     """
     Write year-to-date audit summary per factory.
@@ -100,12 +313,10 @@ def write_summary_csv(factories: Dict[str, Industry], output_path: str) -> None:
         writer.writeheader()
 
         for factory in factories.values():
-            history = factory.history
-            if history:
+            if factory.months_recorded:
                 total = factory.total_emissions
-                monthly_vals = [r["monthly_emissions_kg"] for r in history]
-                max_monthly = max(monthly_vals)
-                avg_monthly = sum(monthly_vals) / len(monthly_vals)
+                max_monthly = factory.max_monthly_emissions
+                avg_monthly = factory.avg_monthly_emissions
                 alerts = factory.alerts_count
                 status = "EXCEEDED" if factory.is_over_cap else "COMPLIANT"
             else:
@@ -129,30 +340,38 @@ def plot_emissions(
     factories: Dict[str, Industry],
     output_path: str,
     config_path: str | None = None,
+    dpi: int = 300,
+    figsize: Tuple[float, float] = (15, 9),
+    year: int = DEFAULT_YEAR,
 ) -> None:
     """
-    Generate a cumulative emissions line chart.
+    Generate a cumulative emissions line chart for one year of ``factories``.
 
     Picks the top 4 highest-emitting factories from each sector (up to 12 total)
     so all three industries are visually represented.  Optionally draws dashed
     horizontal lines at each sector's carbon cap.
     """
-    from collections import defaultdict
+    caps = None
+    if config_path:
+        try:
+            caps = get_config(config_path).caps
+        except Exception:
+            pass  # Config not available — skip cap lines
 
-    sector_colors = {
-        "Steel": "#E63946",       # Red
-        "Textile": "#457B9D",     # Blue
-        "Electronics": "#2A9D8F", # Teal
-    }
-    sector_markers = {
-        "Steel": "s",       # square
-        "Textile": "^",     # triangle
-        "Electronics": "o", # circle
-    }
+    render_chart(
+        select_chart_series(factories), output_path,
+        caps=caps, dpi=dpi, figsize=figsize, year=year,
+    )
 
-    fig, ax = plt.subplots(figsize=(15, 9))
-    fig.patch.set_facecolor("#1a1a2e")
-    ax.set_facecolor("#16213e")
+
+def select_chart_series(factories: Dict[str, Industry]) -> List[Dict[str, Any]]:
+    """
+    Pick the chart's lines: the top 4 emitters of each sector.
+
+    Returns small JSON-serializable series (month → cumulative tonnes), so a
+    chart can be rendered later without keeping the factories around.
+    """
+    from collections import defaultdict
 
     # ── Group factories by sector, then pick top 4 per sector ──
     by_sector: Dict[str, List] = defaultdict(list)
@@ -167,42 +386,74 @@ def plot_emissions(
     # Sort selected by total for legend ordering
     selected.sort(key=lambda x: x[1].total_emissions, reverse=True)
 
+    series = []
     for fid, factory in selected:
-        history = factory.history
-        monthly = sorted(history, key=lambda r: r["month"])
-        months = [r["month"] for r in monthly]
-        cumulative = [r["total_emissions_kg"] / 1000 for r in monthly]
+        points = sorted(factory.cumulative_series, key=lambda p: p[0])
+        series.append({
+            "factory_id": fid,
+            "sector": factory.sector,
+            "months": [month for month, _ in points],
+            "cumulative_tons": [total / 1000 for _, total in points],
+        })
+    return series
+
+
+def render_chart(
+    series: List[Dict[str, Any]],
+    output_path: str,
+    caps: Dict[str, float] | None = None,
+    dpi: int = 300,
+    figsize: Tuple[float, float] = (15, 9),
+    fmt: str | None = None,
+    year: int | None = None,
+) -> None:
+    """
+    Draw chart ``series`` (from `select_chart_series`) to ``output_path``.
+
+    ``caps`` maps sector → cap in kg and adds dashed cap lines. ``fmt``
+    (``"png"``, ``"svg"``, ``"webp"``, ...) defaults to the file extension.
+    ``year`` labels the month axis.
+    """
+    sector_colors = {
+        "Steel": "#E63946",       # Red
+        "Textile": "#457B9D",     # Blue
+        "Electronics": "#2A9D8F", # Teal
+    }
+    sector_markers = {
+        "Steel": "s",       # square
+        "Textile": "^",     # triangle
+        "Electronics": "o", # circle
+    }
+
+    fig, ax = plt.subplots(figsize=figsize)
+    fig.patch.set_facecolor("#1a1a2e")
+    ax.set_facecolor("#16213e")
 
-        color = sector_colors.get(factory.sector, "#FFFFFF")
-        marker = sector_markers.get(factory.sector, "o")
+    for line in series:
+        sector = line["sector"]
+        color = sector_colors.get(sector, "#FFFFFF")
+        marker = sector_markers.get(sector, "o")
 
         ax.plot(
-            months, cumulative,
+            line["months"], line["cumulative_tons"],
             marker=marker, linewidth=2.2, markersize=5,
             color=color, alpha=0.85,
-            label=f"{fid} ({factory.sector})",
+            label=f"{line['factory_id']} ({sector})",
         )
 
-    # ── Draw carbon cap lines if config is available ──
-    if config_path:
-        try:
-            cfg = load_config(config_path)
-            caps_drawn = set()
-            for sector, sec_cfg in cfg.get("sectors", {}).items():
-                cap_kg = sec_cfg.get("carbon_cap_kg", 0)
-                cap_tons = cap_kg / 1000
-                if sector not in caps_drawn and cap_tons > 0:
-                    color = sector_colors.get(sector, "#FFFFFF")
-                    ax.axhline(
-                        y=cap_tons, color=color, linestyle="--",
-                        linewidth=1.5, alpha=0.5,
-                        label=f"{sector} Cap ({cap_tons:,.0f} t)",
-                    )
-                    caps_drawn.add(sector)
-        except Exception:
-            pass  # Config not available — skip cap lines
+    # ── Draw carbon cap lines if caps are available ──
+    for sector, cap_kg in (caps or {}).items():
+        cap_tons = cap_kg / 1000
+        if cap_tons > 0:
+            color = sector_colors.get(sector, "#FFFFFF")
+            ax.axhline(
+                y=cap_tons, color=color, linestyle="--",
+                linewidth=1.5, alpha=0.5,
+                label=f"{sector} Cap ({cap_tons:,.0f} t)",
+            )
 
-    ax.set_xlabel("Month (2026)", fontsize=13, color="#e0e0e0", fontweight="bold")
+    xlabel = f"Month ({year})" if year is not None else "Month"
+    ax.set_xlabel(xlabel, fontsize=13, color="#e0e0e0", fontweight="bold")
     ax.set_ylabel("Cumulative Emissions (metric tons CO₂)", fontsize=13, color="#e0e0e0", fontweight="bold")
     ax.set_title(
         "Carbon-Trace: Cumulative Emissions Growth by Factory",
@@ -229,7 +480,10 @@ def plot_emissions(
     ax.spines["bottom"].set_color("#444")
 
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches="tight", facecolor=fig.get_facecolor())
-    plt.close()
+    plt.savefig(
+        output_path, dpi=dpi, format=fmt,
+        bbox_inches="tight", facecolor=fig.get_facecolor(),
+    )
+    plt.close(fig)
 
     print(f"✅ Chart saved → {output_path}")
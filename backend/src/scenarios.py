@@ -0,0 +1,378 @@
+"""What-if scenarios: re-audit a job's inputs under other factors and caps.
+
+A factory-year's emissions are linear in the config:
+
+    total = Fp·P + Fm·M + Fe·Σ_source multiplier(source)·E_source
+
+where P and M are the year's production and (positive) raw-material tons
+and E_source its energy use (MWh) per energy source. `aggregate_inputs`
+reduces a job's rows to those sums once — G factory-years × (2 + K
+sources). Within a sector the total is a dot product of those sums with
+(Fp, Fm, Fe·multiplier per source), so a batch of S scenarios is one
+(S × (2 + K)) @ ((2 + K) × G) matrix product per sector, compared with the
+caps as an (S × G) array. Hundreds of scenarios cost about as much as one
+audit pass over the rows.
+
+A job's cleaned rows are saved as `audit_inputs.npz` (`save_inputs`),
+together with the config they were audited under, so scenarios always
+start from the job's own baseline.
+"""
+
+import json
+import math
+from typing import Any, Dict, List, Mapping, NamedTuple, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import DEFAULT_YEAR, CompiledConfig, EmissionFactors, compile_config
+
+INPUTS_FILE = "audit_inputs.npz"
+
+# Scenarios per request
+MAX_SCENARIOS = 1000
+# Scenario × factory-year cells evaluated at once (bounds peak memory)
+CHUNK_CELLS = 4_000_000
+
+_FACTOR_FIELDS = EmissionFactors._fields
+
+
+class AuditInputs(NamedTuple):
+    """A job's cleaned rows, column-wise, with text columns factorized."""
+    factory_codes: np.ndarray   # int32, index into factory_ids
+    factory_ids: np.ndarray     # str
+    sector_codes: np.ndarray    # int8, index into sectors
+    sectors: np.ndarray         # str
+    source_codes: np.ndarray    # int8, index into sources
+    sources: np.ndarray         # str ("" when not given)
+    years: np.ndarray           # int16
+    months: np.ndarray          # int8
+    production_tons: np.ndarray
+    energy_mwh: np.ndarray
+    material_tons: np.ndarray
+    config: Dict[str, Any]      # sectors.json layout of the job's config
+
+
+class Aggregates(NamedTuple):
+    """Per factory-year sums of `AuditInputs` (G groups, K energy sources)."""
+    factory_ids: np.ndarray     # (G,) str
+    years: np.ndarray           # (G,) int
+    sector_codes: np.ndarray    # (G,) int, index into sectors
+    sectors: List[str]
+    sources: List[str]
+    production_tons: np.ndarray  # (G,)
+    material_tons: np.ndarray    # (G,) positive material only, as audited
+    energy_mwh: np.ndarray       # (G, K) by energy source
+
+
+# ── Saving and loading a job's inputs ──
+
+def config_dict(config: CompiledConfig) -> Dict[str, Any]:
+    """A compiled config back in the sectors.json layout."""
+    return {
+        "sectors": {
+            sector: {
+                "emission_factor": cfg.emission_factor._asdict(),
+                "carbon_cap_kg": cfg.carbon_cap_kg,
+            }
+            for sector, cfg in config.sectors.items()
+        },
+        "energy_source_multipliers": dict(config.energy_multipliers),
+    }
+
+
+def save_inputs(df: pd.DataFrame, path: str, config: CompiledConfig) -> None:
+    """Save a cleaned frame (and the config it is audited with) as `INPUTS_FILE`."""
+    # A missing id is the factory "" (as audited), never code -1: that
+    # would alias factory_ids[-1] once codes are combined with years
+    factory_codes, factory_ids = pd.factorize(
+        df["factory_id"].fillna(""), sort=True, use_na_sentinel=False
+    )
+    if len(factory_codes) and factory_codes.min() < 0:
+        raise ValueError("Every row needs a factory code to save audit inputs.")
+    sector_codes, sectors = pd.factorize(df["sector"], sort=True)
+    source_codes, sources = pd.factorize(df["energy_source_type"].fillna(""), sort=True)
+    years = df["year"] if "year" in df else np.full(len(df), DEFAULT_YEAR)
+    material = df["raw_material_weight_tons"].fillna(0.0)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            factory_codes=factory_codes.astype(np.int32),
+            factory_ids=np.asarray(factory_ids, dtype=str),
+            sector_codes=sector_codes.astype(np.int8),
+            sectors=np.asarray(sectors, dtype=str),
+            source_codes=source_codes.astype(np.int8),
+            sources=np.asarray(sources, dtype=str),
+            years=np.asarray(years, dtype=np.int16),
+            months=df["month"].to_numpy(dtype=np.int8),
+            production_tons=df["monthly_production_tons"].to_numpy(dtype=np.float64),
+            energy_mwh=df["energy_used_mwh"].to_numpy(dtype=np.float64),
+            material_tons=material.to_numpy(dtype=np.float64),
+            config=np.asarray(json.dumps(config_dict(config))),
+        )
+
+
+def load_inputs(path: str) -> AuditInputs:
+    """Load a job's saved inputs (FileNotFoundError if it has none)."""
+    with np.load(path, allow_pickle=False) as data:
+        fields = {name: data[name] for name in AuditInputs._fields if name != "config"}
+        config = json.loads(str(data["config"]))
+    return AuditInputs(**fields, config=config)
+
+
+def aggregate_inputs(inputs: AuditInputs) -> Aggregates:
+    """Reduce rows to per factory-year sums (one `np.bincount` per column)."""
+    n_factories = len(inputs.factory_ids)
+    year_values, year_codes = np.unique(inputs.years, return_inverse=True)
+    keys = year_codes.astype(np.int64) * n_factories + inputs.factory_codes
+    group_keys, groups = np.unique(keys, return_inverse=True)
+    n_groups, n_sources = len(group_keys), len(inputs.sources)
+
+    def sums(values: np.ndarray) -> np.ndarray:
+        return np.bincount(groups, weights=values, minlength=n_groups)
+
+    # A factory-year's sector is the one of its first row, as in the audit
+    first_row = np.full(n_groups, len(groups), dtype=np.int64)
+    np.minimum.at(first_row, groups, np.arange(len(groups)))
+    sector_codes = inputs.sector_codes[first_row].astype(np.int64)
+    energy = np.bincount(
+        groups * n_sources + inputs.source_codes,
+        weights=inputs.energy_mwh,
+        minlength=n_groups * n_sources,
+    ).reshape(n_groups, n_sources)
+
+    return Aggregates(
+        factory_ids=inputs.factory_ids[group_keys % n_factories],
+        years=year_values[group_keys // n_factories].astype(np.int64),
+        sector_codes=sector_codes,
+        sectors=inputs.sectors.tolist(),
+        sources=inputs.sources.tolist(),
+        production_tons=sums(inputs.production_tons),
+        material_tons=sums(np.where(inputs.material_tons > 0, inputs.material_tons, 0.0)),
+        energy_mwh=energy,
+    )
+
+
+# ── Scenario configs ──
+
+def scenario_config(base: Mapping[str, Any], overrides: Mapping[str, Any]) -> CompiledConfig:
+    """
+    Compile ``base`` (sectors.json layout) with a scenario's overrides.
+
+    ``overrides`` uses the same layout, partially: any sector's
+    ``emission_factor`` entries and ``carbon_cap_kg``, and any
+    ``energy_source_multipliers`` entries. Everything else keeps the base value.
+
+    Raises
+    ------
+    ValueError
+        If an override is unknown or not a finite, non-negative number.
+    """
+    unknown = set(overrides) - {"name", "sectors", "energy_source_multipliers"}
+    if unknown:
+        raise ValueError(f"Unknown scenario keys: {sorted(unknown)}")
+
+    sectors = {s: {"emission_factor": dict(c["emission_factor"]), "carbon_cap_kg": c["carbon_cap_kg"]}
+               for s, c in base["sectors"].items()}
+    for sector, changes in check_mapping(overrides.get("sectors"), "sectors").items():
+        changes = check_mapping(changes, f"sectors.{sector}")
+        target = sectors.setdefault(sector, {"emission_factor": {}})
+        for key, value in changes.items():
+            if key == "carbon_cap_kg":
+                target["carbon_cap_kg"] = check_number(value, f"sectors.{sector}.carbon_cap_kg")
+            elif key == "emission_factor":
+                for factor, v in check_mapping(value, f"sectors.{sector}.emission_factor").items():
+                    if factor not in _FACTOR_FIELDS:
+                        raise ValueError(
+                            f"Unknown emission factor {factor!r}. Use one of: {list(_FACTOR_FIELDS)}"
+                        )
+                    target["emission_factor"][factor] = check_number(
+                        v, f"sectors.{sector}.emission_factor.{factor}"
+                    )
+            else:
+                raise ValueError(f"Unknown sector setting {key!r} in sectors.{sector}")
+
+    multipliers = dict(base["energy_source_multipliers"])
+    for source, value in check_mapping(
+        overrides.get("energy_source_multipliers"), "energy_source_multipliers"
+    ).items():
+        multipliers[source] = check_number(value, f"energy_source_multipliers.{source}")
+
+    return compile_config({"sectors": sectors, "energy_source_multipliers": multipliers})
+
+
+def check_mapping(value: Any, where: str) -> Mapping[str, Any]:
+    """``value`` as a mapping (``{}`` if None); ValueError naming ``where`` otherwise."""
+    if value is None:
+        return {}
+    if not isinstance(value, Mapping):
+        raise ValueError(f"{where} must be an object")
+    return value
+
+
+def check_number(value: Any, where: str) -> float:
+    """``value`` as a finite, non-negative float; ValueError naming ``where`` otherwise."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{where} must be a number")
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"{where} must be finite and non-negative")
+    return float(value)
+
+
+# ── Evaluation ──
+
+def parameter_matrices(agg: Aggregates, configs: Sequence[CompiledConfig]) -> Dict[str, np.ndarray]:
+    """
+    Per-scenario parameters as arrays: ``Fp``/``Fe``/``Fm``/``cap`` are
+    (S × sectors), ``multiplier`` is (S × K sources). Sources a config does
+    not list (and rows without one) get a multiplier of 1, as in the audit.
+    """
+    shape = (len(configs), len(agg.sectors))
+    params = {name: np.empty(shape) for name in ("Fp", "Fe", "Fm", "cap")}
+    multiplier = np.ones((len(configs), len(agg.sources)))
+    for s, config in enumerate(configs):
+        for j, sector in enumerate(agg.sectors):
+            cfg = config.sector(sector)
+            params["Fp"][s, j] = cfg.emission_factor.production_per_ton
+            params["Fe"][s, j] = cfg.emission_factor.energy_per_mwh
+            params["Fm"][s, j] = cfg.emission_factor.material_processing_per_ton
+            params["cap"][s, j] = cfg.carbon_cap_kg
+        for k, source in enumerate(agg.sources):
+            if source and source in config.energy_multipliers:
+                multiplier[s, k] = config.energy_multipliers[source]
+    params["multiplier"] = multiplier
+    return params
+
+
+def features(agg: Aggregates) -> np.ndarray:
+    """(G × (2 + K)) sums per factory-year: production, material, energy by source."""
+    return np.column_stack([agg.production_tons, agg.material_tons, agg.energy_mwh])
+
+
+def coefficients(params: Mapping[str, np.ndarray], sector: int) -> np.ndarray:
+    """(S × (2 + K)) kg per unit of each `features` column, for one sector."""
+    return np.column_stack([
+        params["Fp"][:, sector],
+        params["Fm"][:, sector],
+        params["Fe"][:, sector, None] * params["multiplier"],
+    ])
+
+
+def factory_totals(agg: Aggregates, params: Mapping[str, np.ndarray]) -> np.ndarray:
+    """(S × G) annual totals of every factory-year under each parameter set."""
+    x = features(agg)
+    totals = np.empty((len(params["multiplier"]), len(x)))
+    for j in range(len(agg.sectors)):
+        rows = np.flatnonzero(agg.sector_codes == j)
+        totals[:, rows] = coefficients(params, j) @ x[rows].T
+    return totals
+
+
+def evaluate(agg: Aggregates, configs: Sequence[CompiledConfig]) -> Dict[str, np.ndarray]:
+    """
+    Totals and breaches of every scenario, reduced over factory-years.
+
+    Returns (S × …) arrays: ``total`` and ``over`` (factory-years over cap),
+    per sector (``sector_total``, ``sector_over``), per year
+    (``year_total``, ``year_over``), plus ``newly_over`` / ``back_under``
+    counts against scenario 0 (the baseline).
+    """
+    n_groups = len(agg.factory_ids)
+    year_values, year_codes = np.unique(agg.years, return_inverse=True)
+    sector_onehot = np.zeros((n_groups, len(agg.sectors)))
+    sector_onehot[np.arange(n_groups), agg.sector_codes] = 1.0
+    year_onehot = np.zeros((n_groups, len(year_values)))
+    year_onehot[np.arange(n_groups), year_codes] = 1.0
+
+    params = parameter_matrices(agg, configs)
+    base_over = None
+    out: Dict[str, List[np.ndarray]] = {
+        k: [] for k in ("total", "over", "sector_total", "sector_over",
+                        "year_total", "year_over", "newly_over", "back_under")
+    }
+    step = max(1, CHUNK_CELLS // max(n_groups, 1))
+    for start in range(0, len(configs), step):
+        chunk = {k: v[start:start + step] for k, v in params.items()}
+        totals = factory_totals(agg, chunk)
+        over = totals > chunk["cap"][:, agg.sector_codes]
+        if base_over is None:
+            base_over = over[0]
+        out["total"].append(totals.sum(axis=1))
+        out["over"].append(over.sum(axis=1))
+        out["sector_total"].append(totals @ sector_onehot)
+        out["sector_over"].append(over @ sector_onehot)
+        out["year_total"].append(totals @ year_onehot)
+        out["year_over"].append(over @ year_onehot)
+        out["newly_over"].append((over & ~base_over).sum(axis=1))
+        out["back_under"].append((~over & base_over).sum(axis=1))
+    result = {k: np.concatenate(v) for k, v in out.items()}
+    result["year_values"] = year_values
+    return result
+
+
+def run_scenarios(inputs_path: str, scenarios: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
+    """
+    Evaluate ``scenarios`` against a job's saved inputs.
+
+    Each scenario is ``{"name": ..., "sectors": {...},
+    "energy_source_multipliers": {...}}`` — overrides of the job's config
+    (see `scenario_config`). The job's own config is evaluated first as
+    ``"baseline"``; deltas and breach changes are relative to it.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the job has no saved inputs.
+    ValueError
+        If a scenario is invalid.
+    """
+    if not isinstance(scenarios, Sequence) or isinstance(scenarios, (str, bytes)):
+        raise ValueError("scenarios must be a list")
+    if not 1 <= len(scenarios) <= MAX_SCENARIOS:
+        raise ValueError(f"Send between 1 and {MAX_SCENARIOS} scenarios.")
+
+    inputs = load_inputs(inputs_path)
+    names = ["baseline"]
+    configs = [compile_config(inputs.config)]
+    for i, scenario in enumerate(scenarios):
+        scenario = check_mapping(scenario, f"scenarios[{i}]")
+        names.append(str(scenario.get("name") or f"scenario_{i + 1}"))
+        try:
+            configs.append(scenario_config(inputs.config, scenario))
+        except ValueError as e:
+            raise ValueError(f"scenarios[{i}]: {e}")
+
+    agg = aggregate_inputs(inputs)
+    r = evaluate(agg, configs)
+    base_total = r["total"][0]
+
+    results = []
+    for s, name in enumerate(names):
+        results.append({
+            "name": name,
+            "total_emissions_kg": round(float(r["total"][s]), 2),
+            "delta_kg": round(float(r["total"][s] - base_total), 2),
+            "delta_pct": round(float((r["total"][s] / base_total - 1) * 100), 4) if base_total else None,
+            "factories_over_cap": int(r["over"][s]),
+            "newly_over_cap": int(r["newly_over"][s]),
+            "back_under_cap": int(r["back_under"][s]),
+            "sectors": {
+                sector: {
+                    "total_emissions_kg": round(float(r["sector_total"][s, j]), 2),
+                    "factories_over_cap": int(r["sector_over"][s, j]),
+                }
+                for j, sector in enumerate(agg.sectors)
+            },
+            "years": {
+                str(int(year)): {
+                    "total_emissions_kg": round(float(r["year_total"][s, y]), 2),
+                    "factories_over_cap": int(r["year_over"][s, y]),
+                }
+                for y, year in enumerate(r["year_values"])
+            },
+        })
+    return {
+        "factory_years": len(agg.factory_ids),
+        "baseline": results[0],
+        "scenarios": results[1:],
+    }
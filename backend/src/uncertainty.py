@@ -0,0 +1,253 @@
+"""Monte Carlo uncertainty bands for a job's emission totals.
+
+The factors in sectors.json are point estimates. `run_uncertainty` gives
+chosen factors and energy multipliers a standard deviation σ, draws
+thousands of alternative configs at once (one ``rng.normal`` call, normal
+around the job's value and clipped at zero) and evaluates them with the
+scenario engine's linear model (`src.scenarios.coefficients`): one
+(factory-years × draws) matrix product per sector and chunk of factories.
+A factor's draw is shared by every factory of its sector, and a
+multiplier's by every factory using that source — the uncertainty is in
+the estimate, which all of them use.
+
+Reported per factory-year: the point estimate, mean, percentiles and
+probability of breaching the cap. Per sector (and for the fleet):
+percentiles of the total and of the number of factory-years over cap, and
+the probability that any is.
+"""
+
+import secrets
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import CompiledConfig, EmissionFactors, compile_config
+from .scenarios import (
+    Aggregates, aggregate_inputs, check_mapping, check_number, coefficients, factory_totals,
+    features, load_inputs, parameter_matrices,
+)
+
+DEFAULT_DRAWS = 1000
+MAX_DRAWS = 20_000
+DEFAULT_PERCENTILES = (5.0, 50.0, 95.0)
+MAX_PERCENTILES = 20
+# Draw × factory-year cells evaluated at once (bounds peak memory)
+CHUNK_CELLS = 4_000_000
+
+# Emission factor → its parameter matrix in `parameter_matrices`
+_FACTOR_PARAMS = {
+    "production_per_ton": "Fp",
+    "energy_per_mwh": "Fe",
+    "material_processing_per_ton": "Fm",
+}
+
+# (parameter, column, σ) of one sampled value
+Sampled = Tuple[str, int, float]
+
+
+# ── Distributions ──
+
+def parse_sigma(sigma: Mapping[str, Any], agg: Aggregates) -> List[Sampled]:
+    """
+    The sampled parameters of a σ spec, in sectors.json layout::
+
+        {"sectors": {"Steel": {"emission_factor": {"energy_per_mwh": 40.0}}},
+         "energy_source_multipliers": {"coal": 0.1}}
+
+    σ is in the factor's own units. Sectors and sources the job does not
+    contain are ignored.
+
+    Raises
+    ------
+    ValueError
+        If the spec is malformed or a σ is not a finite, non-negative number.
+    """
+    sigma = check_mapping(sigma, "sigma")
+    unknown = set(sigma) - {"sectors", "energy_source_multipliers"}
+    if unknown:
+        raise ValueError(f"Unknown sigma keys: {sorted(unknown)}")
+
+    sampled: List[Sampled] = []
+    for sector, spec in check_mapping(sigma.get("sectors"), "sigma.sectors").items():
+        spec = check_mapping(spec, f"sigma.sectors.{sector}")
+        if set(spec) - {"emission_factor"}:
+            raise ValueError(f"sigma.sectors.{sector} only takes 'emission_factor'")
+        factors = check_mapping(spec.get("emission_factor"), f"sigma.sectors.{sector}.emission_factor")
+        for factor, value in factors.items():
+            if factor not in _FACTOR_PARAMS:
+                raise ValueError(
+                    f"Unknown emission factor {factor!r}. Use one of: {list(EmissionFactors._fields)}"
+                )
+            sd = check_number(value, f"sigma.sectors.{sector}.emission_factor.{factor}")
+            if sector in agg.sectors and sd > 0:
+                sampled.append((_FACTOR_PARAMS[factor], agg.sectors.index(sector), sd))
+
+    multipliers = check_mapping(
+        sigma.get("energy_source_multipliers"), "sigma.energy_source_multipliers"
+    )
+    for source, value in multipliers.items():
+        sd = check_number(value, f"sigma.energy_source_multipliers.{source}")
+        if source and source in agg.sources and sd > 0:
+            sampled.append(("multiplier", agg.sources.index(source), sd))
+    return sampled
+
+
+def sample_parameters(
+    agg: Aggregates,
+    config: CompiledConfig,
+    sampled: Sequence[Sampled],
+    draws: int,
+    rng: np.random.Generator,
+) -> Dict[str, np.ndarray]:
+    """
+    ``draws`` parameter sets (rows of `parameter_matrices`) around ``config``.
+
+    Every sampled value is drawn in a single ``rng.normal`` call of shape
+    (draws × sampled values); everything else keeps the config's value.
+    """
+    base = parameter_matrices(agg, [config])
+    params = {name: np.repeat(m, draws, axis=0) for name, m in base.items()}
+    if sampled:
+        means = np.array([base[name][0, col] for name, col, _ in sampled])
+        sds = np.array([sd for _, _, sd in sampled])
+        values = np.maximum(rng.normal(means, sds, size=(draws, len(sampled))), 0.0)
+        for i, (name, col, _) in enumerate(sampled):
+            params[name][:, col] = values[:, i]
+    return params
+
+
+# ── Evaluation ──
+
+def evaluate_draws(
+    agg: Aggregates,
+    params: Mapping[str, np.ndarray],
+    percentiles: Sequence[float],
+) -> Dict[str, np.ndarray]:
+    """
+    Per factory-year statistics over the draws, and per sector totals per draw.
+
+    Each sector's factory-years are evaluated ``CHUNK_CELLS // draws`` at a
+    time as one (chunk × features) @ (features × draws) product, laid out
+    so every factory's draws are contiguous for the percentile selection.
+    Returns ``mean``, ``percentiles`` (Q × G) and ``p_over`` per
+    factory-year, and ``sector_total`` / ``sector_over`` (draws × sectors).
+    """
+    draws = len(params["multiplier"])
+    n_groups, n_sectors = len(agg.factory_ids), len(agg.sectors)
+    x = features(agg)
+
+    mean = np.empty(n_groups)
+    pct = np.empty((len(percentiles), n_groups))
+    p_over = np.empty(n_groups)
+    sector_total = np.zeros((draws, n_sectors))
+    sector_over = np.zeros((draws, n_sectors))
+    step = max(1, CHUNK_CELLS // draws)
+    for j in range(n_sectors):
+        coef = coefficients(params, j).T          # (features, draws)
+        cap = params["cap"][0, j]                 # caps are not sampled
+        rows = np.flatnonzero(agg.sector_codes == j)
+        for start in range(0, len(rows), step):
+            part = rows[start:start + step]
+            totals = x[part] @ coef               # (chunk, draws)
+            over = totals > cap
+            mean[part] = totals.mean(axis=1)
+            pct[:, part] = np.percentile(totals, percentiles, axis=1)
+            p_over[part] = over.mean(axis=1)
+            sector_total[:, j] += totals.sum(axis=0)
+            sector_over[:, j] += over.sum(axis=0)
+    return {
+        "mean": mean,
+        "percentiles": pct,
+        "p_over": p_over,
+        "sector_total": sector_total,
+        "sector_over": sector_over,
+    }
+
+
+def run_uncertainty(
+    inputs_path: str,
+    sigma: Mapping[str, Any],
+    draws: int = DEFAULT_DRAWS,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Monte Carlo bands for a job's saved inputs (see the module docstring).
+
+    ``seed`` makes the draws reproducible; without one a random seed is
+    chosen and returned.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the job has no saved inputs.
+    ValueError
+        If ``sigma``, ``draws``, ``percentiles`` or ``seed`` is invalid.
+    """
+    if isinstance(draws, bool) or not isinstance(draws, int) or not 1 <= draws <= MAX_DRAWS:
+        raise ValueError(f"draws must be an integer from 1 to {MAX_DRAWS}")
+    if not isinstance(percentiles, Sequence) or not 1 <= len(percentiles) <= MAX_PERCENTILES:
+        raise ValueError(f"percentiles must be a list of 1 to {MAX_PERCENTILES} numbers")
+    percentiles = [check_number(q, "percentiles") for q in percentiles]
+    if any(q > 100 for q in percentiles):
+        raise ValueError("percentiles must be between 0 and 100")
+    if seed is None:
+        seed = secrets.randbits(32)
+    elif isinstance(seed, bool) or not isinstance(seed, int) or seed < 0:
+        raise ValueError("seed must be a non-negative integer")
+
+    inputs = load_inputs(inputs_path)
+    agg = aggregate_inputs(inputs)
+    config = compile_config(inputs.config)
+    sampled = parse_sigma(sigma, agg)
+
+    params = sample_parameters(agg, config, sampled, draws, np.random.default_rng(seed))
+    r = evaluate_draws(agg, params, percentiles)
+    point = factory_totals(agg, parameter_matrices(agg, [config]))[0]
+    point_over = point > params["cap"][0, agg.sector_codes]
+    names = [f"p{q:g}" for q in percentiles]
+
+    def band(values: np.ndarray, point_value: float, digits: int = 2) -> Dict[str, Any]:
+        qs = np.percentile(values, percentiles)
+        return {
+            "point": round(float(point_value), digits),
+            "mean": round(float(values.mean()), digits),
+            **{name: round(float(q), digits) for name, q in zip(names, qs)},
+        }
+
+    sectors = {}
+    for j, sector in enumerate(agg.sectors):
+        in_sector = agg.sector_codes == j
+        sectors[sector] = {
+            "total_emissions_kg": band(r["sector_total"][:, j], point[in_sector].sum()),
+            "factories_over_cap": band(r["sector_over"][:, j], point_over[in_sector].sum(), 3),
+            "p_any_over_cap": round(float((r["sector_over"][:, j] > 0).mean()), 4),
+        }
+    fleet_over = r["sector_over"].sum(axis=1)
+    fleet = {
+        "total_emissions_kg": band(r["sector_total"].sum(axis=1), point.sum()),
+        "factories_over_cap": band(fleet_over, point_over.sum(), 3),
+        "p_any_over_cap": round(float((fleet_over > 0).mean()), 4),
+    }
+
+    columns = {
+        "factory_id": agg.factory_ids.tolist(),
+        "sector": [agg.sectors[j] for j in agg.sector_codes],
+        "year": agg.years.tolist(),
+        "point_kg": np.round(point, 2).tolist(),
+        "mean_kg": np.round(r["mean"], 2).tolist(),
+        **{f"{name}_kg": np.round(row, 2).tolist() for name, row in zip(names, r["percentiles"])},
+        "p_over_cap": np.round(r["p_over"], 4).tolist(),
+    }
+    factories = [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    return {
+        "draws": draws,
+        "seed": seed,
+        "percentiles": percentiles,
+        "sampled": len(sampled),
+        "factory_years": len(agg.factory_ids),
+        "fleet": fleet,
+        "sectors": sectors,
+        "factories": factories,
+    }
@@ -0,0 +1,445 @@
+"""Vectorized columnar audit engine.
+
+Computes the same per-month records and `Industry` aggregates as the
+closure path in `runner.run_audit`, but in whole-table NumPy passes:
+1. Emission components for every row at once (production, energy ×
+   source multiplier, raw material)
+2. Running totals per factory via an exact segmented cumsum
+3. ALERT months by comparing running totals against each sector's cap
+
+Arithmetic is performed in the same order as the closure, and reported
+values are rounded exactly like ``round(v, 2)`` (`round2`), so results are
+bit-for-bit identical rather than merely close.
+
+`audit_columns` returns the same results as flat per-factory columns
+(`FleetColumns`) instead of records and `Industry` objects.
+"""
+
+from array import array
+from typing import Dict, List, Any, NamedTuple, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+from .config import CompiledConfig, compile_config
+from .models import Industry
+
+# Declared schema of a cleaned CSV; other columns are inferred
+_AUDIT_DTYPES = {
+    "factory_id": "str",
+    "sector": "category",
+    "month": "int8",
+    "monthly_production_tons": "float64",
+    "energy_used_mwh": "float64",
+    "energy_source_type": "category",
+    "raw_material_weight_tons": "float64",
+}
+
+
+def read_audit_csv(input_csv: str) -> pd.DataFrame:
+    """
+    Read a cleaned CSV with the parsing rules of the closure path.
+
+    Columns are parsed as `_AUDIT_DTYPES`: text verbatim (no NaN
+    inference), ``sector`` and ``energy_source_type`` as categories, and
+    floats exactly like Python's ``float()`` — by pyarrow when it is
+    installed, else by pandas with round-trip precision.
+    """
+    if pa is None:
+        return pd.read_csv(
+            input_csv,
+            dtype=_AUDIT_DTYPES,
+            keep_default_na=False,
+            na_values={"raw_material_weight_tons": [""]},
+            float_precision="round_trip",
+            encoding="utf-8",
+        )
+
+    table = pa_csv.read_csv(
+        input_csv,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={col: _arrow_type(dtype) for col, dtype in _AUDIT_DTYPES.items()},
+            null_values=[""],  # Numeric columns only: text stays verbatim
+            strings_can_be_null=False,
+            timestamp_parsers=[],
+        ),
+    )
+    return table.to_pandas()
+
+
+def _arrow_type(dtype: str) -> Any:
+    """The pyarrow column type parsing straight into pandas ``dtype``."""
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return {"str": pa.string(), "int8": pa.int8(), "float64": pa.float64()}[dtype]
+
+
+def segmented_cumsum(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """
+    Running sum of ``values`` within each group of ``codes``, in row order.
+
+    Unlike ``DataFrame.groupby().cumsum()`` (which uses compensated
+    summation), this adds left-to-right exactly like ``total += monthly``,
+    so totals match the closure to the last bit. The loop runs once per
+    month position (≈12), not once per factory.
+    """
+    n = len(values)
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    sorted_vals = values[order]
+
+    # Position of each row within its group (0 = first month seen)
+    starts = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]
+    start_idx = np.flatnonzero(starts)
+    group_start = np.repeat(start_idx, np.diff(np.r_[start_idx, n]))
+    rank = np.arange(n) - group_start
+
+    totals = sorted_vals.copy()
+    by_rank = np.argsort(rank, kind="stable")
+    bounds = np.searchsorted(rank[by_rank], np.arange(1, rank.max() + 2))
+    for k in range(len(bounds) - 1):
+        idx = by_rank[bounds[k]:bounds[k + 1]]
+        totals[idx] = totals[idx - 1] + sorted_vals[idx]
+
+    out[order] = totals
+    return out
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """
+    ``round(v, 2)`` for every value, bit-for-bit.
+
+    ``np.round`` is not correctly rounded, so values whose scaled product
+    lies too close to a .5 tie to be sure of (or is too large) fall back to
+    Python's ``round``; everything else is exact in one NumPy pass.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100.0
+    out = np.rint(scaled) / 100.0
+    with np.errstate(invalid="ignore"):  # inf/NaN → unsure
+        tie_distance = np.abs(scaled - np.floor(scaled) - 0.5)
+        unsure = ~(tie_distance > np.abs(scaled) * 2.0**-50) | ~(np.abs(scaled) < 2.0**51)
+    if unsure.any():
+        idx = np.flatnonzero(unsure)
+        out[idx] = [round(v, 2) for v in values[idx].tolist()]
+    return out
+
+
+def audit_frame(
+    df: pd.DataFrame, config: Union[CompiledConfig, Dict[str, Any]]
+) -> Tuple[Dict[str, Industry], List[Dict[str, Any]]]:
+    """
+    Audit a whole cleaned table in one batch.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Cleaned production data with the `web_pipeline.REQUIRED_COLUMNS`.
+        Rows are audited in frame order, as the closure path does.
+    config : CompiledConfig or dict
+        Compiled config from `src.config`, or parsed sectors.json contents.
+
+    Returns
+    -------
+    tuple[dict[str, Industry], list[dict]]
+        Same shape as `runner.run_audit`.
+    """
+    if not isinstance(config, CompiledConfig):
+        config = compile_config(config)
+    if len(df) == 0:
+        return {}, []
+    a = _audit_arrays(df, config)
+    uniques = a["uniques"]
+    factory_sectors = a["factory_sectors"]
+
+    # ── Materialize per-month records ──
+    months = a["months"].tolist()
+    monthly_l = round2(a["monthly"]).tolist()
+    totals_l = a["totals"].tolist()
+    rounded_totals_l = round2(a["totals"]).tolist()
+    prod_l = round2(a["production"]).tolist()
+    energy_l = round2(a["energy"]).tolist()
+    mat_l = round2(a["material"]).tolist()
+    mult_l = a["multiplier"].tolist()
+    caps_l = a["caps"][a["row_sector"]].tolist()
+    alert_l = a["is_alert"].tolist()
+    number_l = a["month_number"].tolist()
+    codes_l = a["codes"].tolist()
+
+    all_records: List[Dict[str, Any]] = []
+    for i in range(len(df)):
+        total = totals_l[i]
+        if alert_l[i]:
+            status = "ALERT"
+            alert = (
+                f"🚨 Carbon cap exceeded! "
+                f"Total: {total:,.0f} kg CO₂ "
+                f"(cap: {caps_l[i]:,.0f} kg)"
+            )
+        else:
+            status = "OK"
+            alert = None
+        code = codes_l[i]
+        all_records.append({
+            "month_number": number_l[i],
+            "monthly_emissions_kg": monthly_l[i],
+            "total_emissions_kg": rounded_totals_l[i],
+            "status": status,
+            "alert": alert,
+            "breakdown": {
+                "production_kg": prod_l[i],
+                "energy_kg": energy_l[i],
+                "material_kg": mat_l[i],
+                "source_multiplier": mult_l[i],
+            },
+            "factory_id": uniques[code],
+            "sector": factory_sectors[code],
+            "month": months[i],
+        })
+
+    # ── One Industry per factory, restored from its columns ──
+    columns = _columns(a).as_arrays()
+    factories: Dict[str, Industry] = {}
+    for code, fid in enumerate(uniques):
+        cfg = a["sector_cfgs"][a["sector_codes"][code]]
+        factories[fid] = Industry.from_snapshot(
+            columns.snapshot(code),
+            emission_factor=cfg.emission_factor,
+            carbon_cap_kg=cfg.carbon_cap_kg,
+            energy_source_multipliers=config.energy_multipliers,
+        )
+
+    return factories, all_records
+
+
+class FleetColumns(NamedTuple):
+    """
+    Audited factories as flat columns, grouped by factory.
+
+    Factory ``k``'s months are rows ``bounds[k]:bounds[k + 1]`` of every
+    per-month column. Values are rounded as in the records; NumPy arrays
+    make this cheap to send between processes (see `src.parallel`).
+    """
+    factory_ids: List[str]
+    sectors: List[str]
+    caps: List[float]
+    total_emissions_kg: List[float]          # unrounded running totals
+    bounds: np.ndarray
+    months: np.ndarray                       # int16
+    monthly_emissions_kg: np.ndarray
+    cumulative_emissions_kg: np.ndarray
+    production_kg: np.ndarray
+    energy_kg: np.ndarray
+    material_kg: np.ndarray
+    source_multiplier: np.ndarray
+    source_codes: np.ndarray                 # int16 codes into source_levels
+    source_levels: List[str]                 # energy_source_type values
+    alerts: np.ndarray                       # int8
+    alert_text: Dict[int, Dict[str, str]]    # only where not rebuildable
+
+    def as_arrays(self) -> "FleetColumns":
+        """
+        The same columns as typed `array.array`s.
+
+        Slices of these are adopted by `Industry.from_snapshot` as-is, which
+        is much cheaper per factory than slicing NumPy arrays.
+        """
+        def typed(code: str, values: np.ndarray) -> array:
+            return array(code, values.tobytes())
+
+        return self._replace(
+            bounds=self.bounds.tolist(),
+            months=typed("h", self.months),
+            monthly_emissions_kg=typed("d", self.monthly_emissions_kg),
+            cumulative_emissions_kg=typed("d", self.cumulative_emissions_kg),
+            production_kg=typed("d", self.production_kg),
+            energy_kg=typed("d", self.energy_kg),
+            material_kg=typed("d", self.material_kg),
+            source_multiplier=typed("d", self.source_multiplier),
+            source_codes=typed("h", self.source_codes),
+            alerts=typed("b", self.alerts),
+        )
+
+    def snapshot(self, k: int) -> Dict[str, Any]:
+        """Factory ``k`` in `Industry.snapshot` layout (columns sliced)."""
+        lo, hi = int(self.bounds[k]), int(self.bounds[k + 1])
+        return {
+            "factory_id": self.factory_ids[k],
+            "sector": self.sectors[k],
+            "carbon_cap_kg": self.caps[k],
+            "total_emissions_kg": self.total_emissions_kg[k],
+            "months": self.months[lo:hi],
+            "monthly_emissions_kg": self.monthly_emissions_kg[lo:hi],
+            "cumulative_emissions_kg": self.cumulative_emissions_kg[lo:hi],
+            "breakdown": {
+                "production_kg": self.production_kg[lo:hi],
+                "energy_kg": self.energy_kg[lo:hi],
+                "material_kg": self.material_kg[lo:hi],
+                "source_multiplier": self.source_multiplier[lo:hi],
+            },
+            "energy_source_type": [self.source_levels[c] for c in self.source_codes[lo:hi]],
+            "alerts": self.alerts[lo:hi],
+            "alert_text": self.alert_text.get(k, {}),
+        }
+
+
+def audit_columns(
+    df: pd.DataFrame, config: Union[CompiledConfig, Dict[str, Any]]
+) -> FleetColumns:
+    """
+    Audit a cleaned table into `FleetColumns`, in first-appearance order.
+
+    Same numbers as `audit_frame`, but no record dict per row and no
+    `Industry` objects — the cheap form to return from a worker process.
+    `Industry.from_snapshot(columns.snapshot(k), ...)` rebuilds factory k.
+    """
+    if not isinstance(config, CompiledConfig):
+        config = compile_config(config)
+    if len(df) == 0:
+        empty = np.empty(0)
+        return FleetColumns(
+            [], [], [], [], np.zeros(1, dtype=np.int64), empty.astype(np.int16),
+            empty, empty, empty, empty, empty, empty, empty.astype(np.int16), [],
+            empty.astype(np.int8), {},
+        )
+    return _columns(_audit_arrays(df, config))
+
+
+def _columns(a: Dict[str, Any]) -> FleetColumns:
+    """Group `_audit_arrays` output by factory into `FleetColumns`."""
+    codes = a["codes"]
+
+    # Rows grouped by factory, each group in month (= row) order
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(a["uniques"]) + 1))
+    raw_totals = a["totals"][order]
+    totals = round2(raw_totals)
+    caps = a["caps"][a["sector_codes"]].tolist()
+
+    # Alert text that the rounded total would not reproduce (rare)
+    alert_text: Dict[int, Dict[str, str]] = {}
+    alerts = a["is_alert"][order]
+    for i in np.flatnonzero(alerts).tolist():
+        text = f"{raw_totals[i]:,.0f}"
+        if text != f"{totals[i]:,.0f}":
+            code = int(codes[order[i]])
+            alert_text.setdefault(code, {})[str(i - int(bounds[code]))] = (
+                f"🚨 Carbon cap exceeded! Total: {text} kg CO₂ (cap: {caps[code]:,.0f} kg)"
+            )
+
+    return FleetColumns(
+        factory_ids=list(a["uniques"]),
+        sectors=a["factory_sectors"],
+        caps=caps,
+        total_emissions_kg=raw_totals[bounds[1:] - 1].tolist(),
+        bounds=bounds,
+        months=a["months"][order].astype(np.int16),
+        monthly_emissions_kg=round2(a["monthly"][order]),
+        cumulative_emissions_kg=totals,
+        production_kg=round2(a["production"][order]),
+        energy_kg=round2(a["energy"][order]),
+        material_kg=round2(a["material"][order]),
+        source_multiplier=a["multiplier"][order],
+        source_codes=a["source_codes"][order].astype(np.int16),
+        source_levels=a["source_levels"],
+        alerts=alerts.astype(np.int8),
+        alert_text=alert_text,
+    )
+
+
+def _audit_arrays(df: pd.DataFrame, config: CompiledConfig) -> Dict[str, Any]:
+    """Whole-table emission arrays shared by `audit_frame` and `audit_columns`."""
+    energy_multipliers = config.energy_multipliers
+    n = len(df)
+
+    fids = df["factory_id"].to_numpy()
+    # A missing id is a factory of its own, not code -1 (``uniques[-1]``)
+    codes, uniques = pd.factorize(fids, sort=False, use_na_sentinel=False)
+
+    # A factory keeps the sector of the first row it appeared in
+    first_row = np.full(len(uniques), n, dtype=np.int64)
+    np.minimum.at(first_row, codes, np.arange(n))
+    factory_sectors = [str(s) for s in df["sector"].take(first_row)]
+
+    # ── Per-sector factor tables, broadcast through factory codes ──
+    sector_codes, sector_levels = pd.factorize(pd.Index(factory_sectors), sort=False)
+    sector_cfgs = [config.sector(s) for s in sector_levels]
+    prod_f = np.array([c.emission_factor.production_per_ton for c in sector_cfgs])
+    energy_f = np.array([c.emission_factor.energy_per_mwh for c in sector_cfgs])
+    mat_f = np.array([c.emission_factor.material_processing_per_ton for c in sector_cfgs])
+    caps = np.array([c.carbon_cap_kg for c in sector_cfgs])
+
+    row_sector = sector_codes[codes]
+
+    # ── Energy source multiplier: resolved once per distinct source ──
+    if "energy_source_type" in df.columns:
+        sources = df["energy_source_type"]
+        if isinstance(sources.dtype, pd.CategoricalDtype) and "" not in sources.cat.categories:
+            sources = sources.cat.add_categories("")  # So missing can become ""
+        # Factorizes the integer codes of a categorical, not its strings
+        src_codes, src_levels = pd.factorize(sources.fillna(""))
+        level_mults = np.array(
+            [
+                energy_multipliers[s] if s and s in energy_multipliers else 1.0
+                for s in src_levels
+            ]
+            + [1.0]  # code -1 (missing) → neutral multiplier
+        )
+        multiplier = level_mults[src_codes]
+        source_levels = [str(s) for s in src_levels]
+    else:
+        src_codes = np.zeros(n, dtype=np.int64)
+        source_levels = [""]
+        multiplier = np.ones(n)
+
+    production = df["monthly_production_tons"].to_numpy(dtype=np.float64)
+    energy = df["energy_used_mwh"].to_numpy(dtype=np.float64)
+    if "raw_material_weight_tons" in df.columns:
+        material = df["raw_material_weight_tons"].to_numpy(dtype=np.float64)
+    else:
+        material = np.zeros(n)
+
+    # ── Components (same operation order as the closure) ──
+    emissions_production = production * prod_f[row_sector]
+    emissions_energy = energy * energy_f[row_sector]
+    emissions_material = np.where(material > 0, material * mat_f[row_sector], 0.0)
+    adjusted_energy = emissions_energy * multiplier
+    monthly = emissions_production + adjusted_energy + emissions_material
+
+    totals = segmented_cumsum(monthly, codes)
+    is_alert = totals > caps[row_sector]
+
+    month_number = (
+        pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy() + 1
+    )
+
+    return {
+        "codes": codes,
+        "uniques": uniques,
+        "factory_sectors": factory_sectors,
+        "sector_codes": sector_codes,
+        "sector_cfgs": sector_cfgs,
+        "caps": caps,
+        "row_sector": row_sector,
+        "months": df["month"].to_numpy().astype(np.int64),
+        "monthly": monthly,
+        "totals": totals,
+        "production": emissions_production,
+        "energy": adjusted_energy,
+        "material": emissions_material,
+        "multiplier": multiplier,
+        "source_codes": src_codes,
+        "source_levels": source_levels,
+        "is_alert": is_alert,
+        "month_number": month_number,
+    }
@@ -0,0 +1,867 @@
+"""Carbon-Trace: API endpoint tests.
+
+Test Suite:
+  ✅ Synchronous upload returns the full audit result
+  ✅ Async upload returns a job_id and GET /jobs/{job_id} reports completion
+  ✅ GET /jobs/{job_id}/events streams stages, row progress, alerts and results
+  ✅ GET /jobs lists indexed jobs with their TTL; DELETE unindexes them
+  ✅ Invalid CSVs fail with 422 in both modes
+  ✅ A zip or tar of CSVs is audited as one fleet, with per-file reports
+  ✅ Uploads are streamed off the event loop with a header check and a size limit
+  ✅ Charts are rendered lazily and cached per variant
+  ✅ Per-month records download as Parquet and as streamed CSV
+  ✅ Per-factory results are paged, sorted, filtered and streamed as NDJSON
+  ✅ Multi-year uploads reset caps each year, with per-year summaries and charts
+  ✅ Partial-year uploads project year-end totals and breach months per factory
+  ✅ POST /jobs/{job_id}/scenarios evaluates what-if factor and cap sets
+  ✅ POST /jobs/{job_id}/uncertainty returns Monte Carlo bands
+  ✅ /metrics reports request, stage, row and job metrics
+  ✅ profile=1 saves a per-stage cProfile/tracemalloc artifact
+  ✅ Identical uploads reuse the cached job
+  ✅ Appending months to a tenant's saved state equals a full upload
+  ✅ Appending a new year to a tenant's state starts its totals from zero
+  ✅ Tenant state can be downloaded, deleted and restored from a snapshot
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import pstats
+import shutil
+import sys
+import tarfile
+import time
+import zipfile
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("CARBON_TRACE_WORKERS", "2")
+os.environ.setdefault("CARBON_TRACE_GC_INTERVAL_S", "0")  # Keep the repo's sample outputs
+
+from fastapi.testclient import TestClient
+
+import api.main
+from api.main import app, OUTPUT_DIR
+
+SAMPLE_CSV = Path(__file__).resolve().parent.parent / "data" / "monthly_production.csv"
+BAD_CSV = b"a,b\n1,2\n"
+NO_VALID_ROWS_CSV = (
+    b"factory_id,sector,month,monthly_production_tons,energy_used_mwh,"
+    b"energy_source_type,raw_material_weight_tons\n"
+    b"F1,Cement,1,10,10,coal,1\n"
+)
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def job_ids():
+    """Collect job ids and remove their output directories afterwards."""
+    ids = []
+    yield ids
+    for job_id in ids:
+        shutil.rmtree(OUTPUT_DIR / job_id, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    """Disable the result cache so each upload runs the pipeline."""
+    monkeypatch.setattr(api.main.results, "max_bytes", 0)
+
+
+@pytest.fixture
+def result_cache(no_result_cache, monkeypatch, tmp_path):
+    """Re-enable the result cache with a throwaway cache directory."""
+    monkeypatch.setattr(api.main.results, "max_bytes", 10 * 1024**2)
+    monkeypatch.setattr(api.main.results, "_cache_dir", tmp_path)
+    return api.main.results
+
+
+@pytest.fixture
+def tenant_state(monkeypatch, tmp_path):
+    """Keep tenant state snapshots in a throwaway directory."""
+    monkeypatch.setattr(api.main, "STATE_DIR", tmp_path / "tenants")
+    return tmp_path / "tenants"
+
+
+def _upload(client, content: bytes, **params):
+    return client.post(
+        "/upload-csv",
+        params=params,
+        files={"file": ("upload.csv", content, "text/csv")},
+    )
+
+
+def _wait_for(client, job_id: str, timeout: float = 30.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["status"] in ("completed", "failed"):
+            return status
+        time.sleep(0.1)
+    raise AssertionError(f"Job {job_id} did not finish in {timeout}s")
+
+
+def _factories(client, job_id: str, **params) -> list:
+    """Every per-factory row of a job, via the NDJSON stream."""
+    res = client.get(f"/jobs/{job_id}/factories", params={"format": "ndjson", **params})
+    assert res.status_code == 200
+    return [json.loads(line) for line in res.text.splitlines()]
+
+
+def test_sync_upload(client, job_ids):
+    res = _upload(client, SAMPLE_CSV.read_bytes())
+    assert res.status_code == 200
+    data = res.json()
+    job_ids.append(data["job_id"])
+
+    assert data["summary"]["total_factories"] == 50
+    assert data["summary"]["total_emissions_kg"] == 2034611129.6
+    assert client.get(f"/jobs/{data['job_id']}").json()["status"] == "completed"
+
+
+def test_async_upload(client, job_ids):
+    res = _upload(client, SAMPLE_CSV.read_bytes(), wait="false")
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+    job_ids.append(job_id)
+
+    status = _wait_for(client, job_id)
+    assert status["status"] == "completed"
+    assert status["result"]["summary"]["total_factories"] == 50
+
+
+def _events(client, job_id: str, **headers) -> list:
+    """(id, event, data) of every message on a job's event stream."""
+    res = client.get(f"/jobs/{job_id}/events", headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    messages = []
+    for block in res.text.split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if not line.startswith(":")
+        )
+        if fields:
+            messages.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return messages
+
+
+def test_job_events(client, job_ids):
+    res = _upload(client, SAMPLE_CSV.read_bytes(), wait="false")
+    job_id = res.json()["job_id"]
+    job_ids.append(job_id)
+    assert res.json()["events_url"] == f"/jobs/{job_id}/events"
+
+    # Opened while the job runs; ends with its final event
+    messages = _events(client, job_id)
+    ids = [m[0] for m in messages]
+    assert ids == list(range(1, len(ids) + 1))
+    kinds = [m[1] for m in messages]
+    assert kinds[-1] == "completed" and "failed" not in kinds
+    stages = [data["stage"] for _, kind, data in messages if kind == "stage"]
+    assert stages == ["queued", "clean", "audit", "summary", "response"]
+
+    progress = [data for _, kind, data in messages if kind == "progress"]
+    assert progress[0] == {**progress[0], "stage": "clean", "rows": 600}
+    assert progress[-1] == {**progress[-1], "stage": "audit", "rows": 600, "total": 600}
+
+    # Alerts and the year's results arrive during the audit, before any file
+    result = client.get(f"/jobs/{job_id}").json()["result"]
+    over_cap = {v["id"] for v in result["violators"]}
+    alerts = [data for _, kind, data in messages if kind == "alert"]
+    assert len(alerts) == result["summary"]["factories_over_cap"]
+    assert {a["factory_id"] for a in alerts} >= over_cap
+    assert all(a["total_emissions_kg"] > a["carbon_cap_kg"] for a in alerts)
+    (partial,) = [data for _, kind, data in messages if kind == "results"]
+    assert partial["summary"] == result["summary"]
+    assert partial["violators"] == result["violators"]
+    assert kinds.index("results") < kinds.index("stage", kinds.index("results"))
+
+    # Reconnecting resumes after Last-Event-ID
+    assert _events(client, job_id, **{"Last-Event-ID": str(ids[-3])}) == messages[-2:]
+    assert client.get("/jobs/nonexistent/events").status_code == 404
+
+
+def test_job_events_without_log(client, job_ids):
+    """A job that finished without a final event still ends its stream."""
+    data = _upload(client, SAMPLE_CSV.read_bytes()).json()
+    job_ids.append(data["job_id"])
+    (OUTPUT_DIR / data["job_id"] / "events.ndjson").unlink()
+
+    messages = _events(client, data["job_id"])
+    assert [(m[0], m[1]) for m in messages] == [(1, "completed")]
+    assert messages[0][2]["rows"]["input"] == 600
+
+
+def test_job_listing(client, job_ids):
+    first = _upload(client, SAMPLE_CSV.read_bytes(), ttl=600).json()["job_id"]
+    job_ids.append(first)
+    res = _upload(client, SAMPLE_CSV.read_bytes(), wait="false")
+    second = res.json()["job_id"]
+    job_ids.append(second)
+    _wait_for(client, second)
+
+    listing = client.get("/jobs", params={"limit": 2}).json()
+    jobs = {j["job_id"]: j for j in listing["jobs"]}
+    assert set(jobs) == {first, second}
+    assert jobs[first]["kind"] == "upload"
+    assert jobs[first]["filename"] == "upload.csv"
+    assert jobs[first]["ttl_s"] == 600
+    assert jobs[first]["rows"] == 600
+    assert jobs[first]["size_bytes"] > 0
+    assert jobs[first]["expires_at"] > time.time()
+    assert listing["disk"]["used_bytes"] >= jobs[first]["size_bytes"]
+    assert listing["next_cursor"]
+
+    # Let the background job's done-callback record its completion
+    for _ in range(50):
+        if api.main.job_index.get(second)["status"] == "completed":
+            break
+        time.sleep(0.05)
+    assert api.main.job_index.get(second)["status"] == "completed"
+
+    assert client.delete(f"/outputs/{first}").status_code == 200
+    assert api.main.job_index.get(first) is None
+    assert client.get("/jobs", params={"cursor": "garbage"}).status_code == 400
+    assert _upload(client, SAMPLE_CSV.read_bytes(), ttl=5).status_code == 422
+
+
+def test_invalid_csv(client, job_ids):
+    res = _upload(client, BAD_CSV)
+    assert res.status_code == 422
+    assert "Missing required columns" in res.json()["detail"]
+
+    # Header problems are caught while streaming, before a job is queued
+    res = _upload(client, BAD_CSV, wait="false")
+    assert res.status_code == 422
+
+    # Row-level problems surface through the job status
+    res = _upload(client, NO_VALID_ROWS_CSV, wait="false")
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+    job_ids.append(job_id)
+    status = _wait_for(client, job_id)
+    assert status["status"] == "failed"
+    assert status["status_code"] == 422
+
+
+def test_archive_upload(client, job_ids):
+    import pandas as pd
+
+    single = _upload(client, SAMPLE_CSV.read_bytes()).json()
+    job_ids.append(single["job_id"])
+
+    # One CSV per sector plus an invalid one and a non-CSV file
+    df = pd.read_csv(SAMPLE_CSV)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for sector, part in df.groupby("sector"):
+            z.writestr(f"sites/{sector}.csv", part.to_csv(index=False))
+        z.writestr("sites/broken.csv", BAD_CSV)
+        z.writestr("README.txt", "monthly batch")
+    res = client.post(
+        "/upload-archive", files={"file": ("batch.zip", buf.getvalue(), "application/zip")}
+    )
+    assert res.status_code == 200
+    data = res.json()
+    job_ids.append(data["job_id"])
+
+    assert data["summary"] == single["summary"]
+    assert data["sector_breakdown"] == single["sector_breakdown"]
+    assert [m["file"] for m in data["members"]] == [
+        "sites/Electronics.csv", "sites/Steel.csv", "sites/Textile.csv", "sites/broken.csv",
+    ]
+    assert "Missing required columns" in data["members"][3]["error"]
+    assert sum(m["cleaning_report"]["cleaned_rows"] for m in data["members"][:3]) == 600
+    assert data["cleaning_report"]["cleaned_rows"] == 600
+    assert not (OUTPUT_DIR / data["job_id"] / "members").exists()
+    assert len(_factories(client, data["job_id"])) == 50
+    listed = {j["job_id"]: j for j in client.get("/jobs").json()["jobs"]}
+    assert listed[data["job_id"]]["kind"] == "archive"
+
+    # A tar.gz in the background: overlapping files, later one wins
+    tar_buf = io.BytesIO()
+    with tarfile.open(fileobj=tar_buf, mode="w:gz") as t:
+        for name, part in [("a.csv", df.iloc[:400]), ("b.csv", df.iloc[300:])]:
+            content = part.to_csv(index=False).encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            t.addfile(info, io.BytesIO(content))
+    res = client.post(
+        "/upload-archive", params={"wait": "false"},
+        files={"file": ("batch.tar.gz", tar_buf.getvalue(), "application/gzip")},
+    )
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+    job_ids.append(job_id)
+    messages = _events(client, job_id)
+    files = [data.get("file") for _, kind, data in messages if kind == "progress"]
+    assert set(files) >= {"a.csv", "b.csv"}  # In the order they finish cleaning
+    status = _wait_for(client, job_id)
+    assert status["status"] == "completed"
+    assert status["result"]["summary"] == single["summary"]
+    assert status["rows"] == {"input": 700, "cleaned": 600, "dropped": 100}
+    assert "clean" in status["timings"]
+
+    # Not an archive, or not a readable one
+    assert client.post(
+        "/upload-archive", files={"file": ("batch.csv", b"x", "text/csv")}
+    ).status_code == 400
+    res = client.post(
+        "/upload-archive", files={"file": ("batch.zip", b"not a zip", "application/zip")}
+    )
+    assert res.status_code == 422
+
+
+def test_unknown_job(client):
+    assert client.get("/jobs/doesnotexist").status_code == 404
+
+
+def test_named_config_selection(client):
+    configs = client.get("/configs").json()["configs"]
+    assert "default" in configs
+    assert configs["default"]["sectors"]["Steel"]["carbon_cap_kg"] == 90000000
+
+    res = _upload(client, SAMPLE_CSV.read_bytes(), config="nope")
+    assert res.status_code == 400
+
+
+def test_upload_size_limit(client, monkeypatch):
+    monkeypatch.setattr(api.main, "MAX_UPLOAD_BYTES", 1024)
+    before = set(OUTPUT_DIR.iterdir())
+
+    res = _upload(client, SAMPLE_CSV.read_bytes())
+    assert res.status_code == 413
+    assert set(OUTPUT_DIR.iterdir()) == before, "rejected upload left files behind"
+
+
+def test_streamed_upload_checks_header_first(client, job_ids, monkeypatch):
+    # Tiny chunks force the header to span several reads
+    monkeypatch.setattr(api.main, "UPLOAD_CHUNK_BYTES", 7)
+    content = SAMPLE_CSV.read_bytes()
+
+    # Every chunk is written and hashed off the event loop
+    write_chunk = api.main._write_chunk
+    on_loop = []
+
+    def checked_write(f, digest, chunk):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(len(chunk))
+        except RuntimeError:
+            pass
+        write_chunk(f, digest, chunk)
+
+    monkeypatch.setattr(api.main, "_write_chunk", checked_write)
+
+    res = _upload(client, content)
+    assert res.status_code == 200
+    job_id = res.json()["job_id"]
+    job_ids.append(job_id)
+    assert (OUTPUT_DIR / job_id / "raw_upload.csv").read_bytes() == content
+    assert on_loop == []
+
+    res = _upload(client, b"factory_id,sector\n" + b"x,y\n" * 1000)
+    assert res.status_code == 422
+
+
+def test_lazy_chart_variants(client, job_ids):
+    res = _upload(client, SAMPLE_CSV.read_bytes())
+    job_id = res.json()["job_id"]
+    job_ids.append(job_id)
+    job_dir = OUTPUT_DIR / job_id
+    assert not (job_dir / "emissions_chart.png").exists(), "upload should skip chart work"
+
+    res = client.get(res.json()["files"]["chart"])
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "image/png"
+    assert res.content.startswith(b"\x89PNG")
+    assert (job_dir / "emissions_chart.png").exists()
+
+    res = client.get(f"/outputs/{job_id}/emissions_chart.svg", params={"width": 8, "height": 5})
+    assert res.status_code == 200
+    assert b"<svg" in res.content
+    cached = job_dir / "emissions_chart_8x5_300dpi.svg"
+    mtime = cached.stat().st_mtime_ns
+
+    # Second request is served from the cache
+    assert client.get(f"/outputs/{job_id}/emissions_chart.svg", params={"width": 8, "height": 5}).status_code == 200
+    assert cached.stat().st_mtime_ns == mtime
+
+    res = client.get(f"/outputs/{job_id}/emissions_chart.webp", params={"dpi": 72})
+    assert res.status_code == 200
+    assert res.content[8:12] == b"WEBP"
+
+    assert client.get(f"/outputs/{job_id}/emissions_chart.gif").status_code == 400
+    assert client.get("/outputs/nojob/emissions_chart.png").status_code == 404
+
+
+def test_records_export(client, job_ids):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    res = _upload(client, SAMPLE_CSV.read_bytes())
+    data = res.json()
+    job_id = data["job_id"]
+    job_ids.append(job_id)
+    assert data["files"]["records_parquet"] == f"/outputs/{job_id}/records.parquet"
+
+    res = client.get(data["files"]["records_parquet"])
+    assert res.status_code == 200
+    table = pq.read_table(io.BytesIO(res.content))
+    assert table.num_rows == 50 * 12
+    for name in ("factory_id", "sector", "energy_source_type", "status"):
+        assert str(table.schema.field(name).type).startswith("dictionary")
+
+    # Last cumulative total of each factory equals the summary total
+    totals = {}
+    for fid, total in zip(table["factory_id"].to_pylist(), table["total_emissions_kg"].to_pylist()):
+        totals[fid] = total
+    for factory in _factories(client, job_id):
+        assert round(totals[factory["factory_id"]], 2) == factory["total_emissions_kg"]
+
+    res = client.get(data["files"]["records_csv"])
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert len(rows) == table.num_rows
+    assert rows[0]["factory_id"] == table["factory_id"][0].as_py()
+    assert {r["status"] for r in rows} <= {"OK", "ALERT"}
+
+    assert client.get(f"/outputs/{job_id}/records.json").status_code == 400
+    assert client.get("/outputs/nojob/records.csv").status_code == 404
+
+
+def test_factory_pages(client, job_ids):
+    data = _upload(client, SAMPLE_CSV.read_bytes()).json()
+    job_id = data["job_id"]
+    job_ids.append(job_id)
+    assert "factories" not in data
+    assert data["factories_url"] == f"/jobs/{job_id}/factories"
+
+    # Walking the cursor visits every factory once, in order
+    items, cursor = [], None
+    while True:
+        params = {"limit": 7, "sort": "-total_emissions_kg"}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get(data["factories_url"], params=params).json()
+        assert page["total"] == 50
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(items) == 50
+    totals = [f["total_emissions_kg"] for f in items]
+    assert totals == sorted(totals, reverse=True)
+    assert sorted(f["factory_id"] for f in items) == [f["factory_id"] for f in _factories(client, job_id)]
+
+    # Filters, and the violators are the top of the EXCEEDED factories
+    exceeded = _factories(client, job_id, status="exceeded", sort="-total_emissions_kg")
+    assert len(exceeded) == data["summary"]["factories_over_cap"]
+    assert [f["factory_id"] for f in exceeded[:10]] == [v["id"] for v in data["violators"]]
+    steel = client.get(data["factories_url"], params={"sector": "Steel", "limit": 1000}).json()
+    assert steel["total"] == data["sector_breakdown"]["Steel"]["factories"]
+    assert steel["next_cursor"] is None
+    assert {f["sector"] for f in steel["items"]} == {"Steel"}
+
+    res = client.get(data["factories_url"], params={"format": "ndjson", "limit": 5})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert res.headers["x-total-count"] == "50"
+    assert len(res.text.splitlines()) == 5
+
+    # A cursor only continues the query it came from
+    cursor = client.get(data["factories_url"], params={"limit": 5}).json()["next_cursor"]
+    assert client.get(data["factories_url"], params={"cursor": cursor, "sort": "alerts"}).status_code == 400
+    assert client.get(data["factories_url"], params={"cursor": "garbage"}).status_code == 400
+    assert client.get(data["factories_url"], params={"sort": "nope"}).status_code == 400
+    assert client.get(data["factories_url"], params={"status": "nope"}).status_code == 400
+    assert client.get(data["factories_url"], params={"format": "xml"}).status_code == 400
+    assert client.get("/jobs/nojob/factories").status_code == 404
+
+
+def _two_years(tmp_path) -> bytes:
+    """Two years (2026–2027) of a 30-factory fleet, with a year column."""
+    from src.data_gen import generate_monthly_data
+
+    path = tmp_path / "two_years.csv"
+    generate_monthly_data(str(path), n_factories=30, years=2, seed=5)
+    return path.read_bytes()
+
+
+def _year_rows(content: bytes, year: int, keep_year: bool = True) -> bytes:
+    """The rows of one year of a multi-year CSV."""
+    import pandas as pd
+
+    df = pd.read_csv(io.BytesIO(content))
+    df = df[df["year"] == year]
+    if not keep_year:
+        df = df.drop(columns="year")
+    return df.to_csv(index=False).encode()
+
+
+def test_multi_year_upload(client, job_ids, tmp_path):
+    content = _two_years(tmp_path)
+    data = _upload(client, content).json()
+    job_id = data["job_id"]
+    job_ids.append(job_id)
+
+    assert data["year"] == 2027
+    assert list(data["years"]) == ["2026", "2027"]
+    assert data["summary"] == data["years"]["2027"]["summary"]
+    report = data["cleaning_report"]
+    assert report["years_found"] == [2026, 2027]
+    assert report["cleaned_rows"] == 30 * 24, "same month in two years is not a duplicate"
+
+    # Caps reset on January 1: each year equals that year uploaded alone
+    for year in (2026, 2027):
+        alone = _upload(client, _year_rows(content, year, keep_year=False)).json()
+        job_ids.append(alone["job_id"])
+        for key in ("summary", "sector_breakdown", "violators"):
+            assert data["years"][str(year)][key] == alone[key], (year, key)
+
+    for year in ("2026", "2027"):
+        res = client.get(data["years"][year]["files"]["audit_csv"])
+        assert res.status_code == 200
+        assert len(res.text.splitlines()) == 31
+    assert data["files"]["audit_csv"] == f"/outputs/{job_id}/audit_summary_2027.csv"
+    assert client.get(f"/outputs/{job_id}/audit_summary_2025.csv").status_code == 404
+
+    res = client.get(data["years"]["2026"]["files"]["chart"])
+    assert res.status_code == 200
+    assert res.content.startswith(b"\x89PNG")
+    assert (OUTPUT_DIR / job_id / "emissions_chart_2026_15x9_300dpi.png").exists()
+    res = client.get(f"/outputs/{job_id}/emissions_chart.png", params={"year": 1999})
+    assert res.status_code == 404
+
+    rows = _factories(client, job_id, sort="year")
+    assert len(rows) == 60
+    assert [r["year"] for r in rows] == [2026] * 30 + [2027] * 30
+    assert {r["year"] for r in _factories(client, job_id, year="2026")} == {2026}
+    assert client.get(data["factories_url"], params={"year": "next"}).status_code == 400
+
+
+def test_partial_year_forecast(client, job_ids):
+    import pandas as pd
+
+    full = pd.read_csv(SAMPLE_CSV)
+    partial = full[full["month"] <= 5].to_csv(index=False).encode()
+    data = _upload(client, partial).json()
+    job_ids.append(data["job_id"])
+
+    rows = _factories(client, data["job_id"], sort="projected_breach_month")
+    assert len(rows) == 50
+    for row in rows:
+        assert row["projected_total_kg"] > row["total_emissions_kg"]
+        if row["status"] == "EXCEEDED":
+            assert row["projected_breach_month"] <= 5
+    months = [r["projected_breach_month"] for r in rows]
+    expected = [m for m in months if m is not None]
+    assert months == expected + [None] * (len(months) - len(expected)), "nulls sort last"
+    assert any(m > 5 for m in expected), "some breaches are still ahead"
+
+    # Descending too: latest expected breach first, still nulls last
+    rows = _factories(client, data["job_id"], sort="-projected_breach_month")
+    months = [r["projected_breach_month"] for r in rows]
+    assert months == sorted(expected, reverse=True) + [None] * (len(months) - len(expected))
+    page = client.get(
+        f"/jobs/{data['job_id']}/factories",
+        params={"sort": "-projected_breach_month", "limit": len(expected) + 1},
+    ).json()
+    assert page["items"][-1]["projected_breach_month"] is None
+
+    # A complete year projects nothing
+    data = _upload(client, SAMPLE_CSV.read_bytes()).json()
+    job_ids.append(data["job_id"])
+    for row in _factories(client, data["job_id"]):
+        assert row["projected_total_kg"] == row["total_emissions_kg"]
+
+
+def test_scenarios_endpoint(client, job_ids):
+    data = _upload(client, SAMPLE_CSV.read_bytes()).json()
+    job_id = data["job_id"]
+    job_ids.append(job_id)
+    url = f"/jobs/{job_id}/scenarios"
+
+    res = client.post(url, json={"scenarios": [
+        {"name": "coal_up", "energy_source_multipliers": {"coal": 1.4}},
+        {"name": "caps_down", "sectors": {
+            sector: {"carbon_cap_kg": 0} for sector in data["sector_breakdown"]
+        }},
+    ]})
+    assert res.status_code == 200
+    result = res.json()
+    baseline = result["baseline"]
+    assert result["factory_years"] == 50
+    assert baseline["total_emissions_kg"] == pytest.approx(data["summary"]["total_emissions_kg"])
+    assert baseline["factories_over_cap"] == data["summary"]["factories_over_cap"]
+
+    coal_up, caps_down = result["scenarios"]
+    assert coal_up["name"] == "coal_up"
+    assert coal_up["delta_kg"] > 0
+    assert caps_down["delta_kg"] == 0
+    assert caps_down["factories_over_cap"] == 50
+    assert caps_down["newly_over_cap"] == 50 - baseline["factories_over_cap"]
+
+    bad = {"scenarios": [{"sectors": {"Steel": {"emission_factor": {"nope": 1}}}}]}
+    assert client.post(url, json=bad).status_code == 422
+    assert client.post(url, json={}).status_code == 422
+    assert client.post("/jobs/nojob/scenarios", json={"scenarios": [{}]}).status_code == 404
+
+
+def test_uncertainty_endpoint(client, job_ids):
+    data = _upload(client, SAMPLE_CSV.read_bytes()).json()
+    job_id = data["job_id"]
+    job_ids.append(job_id)
+    url = f"/jobs/{job_id}/uncertainty"
+
+    body = {"sigma": {"energy_source_multipliers": {"coal": 0.1}}, "draws": 2000, "seed": 3}
+    res = client.post(url, json=body)
+    assert res.status_code == 200
+    result = res.json()
+    assert result["draws"] == 2000 and result["seed"] == 3
+    assert result["percentiles"] == [5, 50, 95]
+    assert len(result["factories"]) == 50
+    total = result["fleet"]["total_emissions_kg"]
+    assert total["point"] == pytest.approx(data["summary"]["total_emissions_kg"])
+    assert total["p5"] < total["point"] < total["p95"]
+    assert set(result["sectors"]) == set(data["sector_breakdown"])
+    assert client.post(url, json=body).json() == result
+
+    assert client.post(url, json={"draws": 10}).status_code == 422
+    assert client.post(url, json={"sigma": {}, "samples": 10}).status_code == 422
+    assert client.post(url, json={"sigma": {}, "draws": 0}).status_code == 422
+    assert client.post("/jobs/nojob/uncertainty", json={"sigma": {}}).status_code == 404
+
+
+def test_metrics_endpoint(client, job_ids, monkeypatch):
+    from api import metrics
+
+    uploads = metrics.REQUESTS.value(method="POST", route="/upload-csv", status="200")
+    cleaned = metrics.STAGE_SECONDS.count(stage="clean")
+    rows = metrics.ROWS_PROCESSED.value()
+
+    res = _upload(client, SAMPLE_CSV.read_bytes())
+    job_id = res.json()["job_id"]
+    job_ids.append(job_id)
+    status = client.get(f"/jobs/{job_id}").json()
+    assert set(status["timings"]) == {"clean", "audit", "summary", "response"}
+    assert status["rows"] == {"input": 600, "cleaned": 600, "dropped": 0}
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = res.text
+    assert 'carbon_trace_http_requests_total{method="POST",route="/upload-csv",status="200"}' in text
+    assert 'carbon_trace_stage_duration_seconds_bucket{stage="save",le="+Inf"}' in text
+    assert "carbon_trace_jobs_in_flight 0" in text
+    assert "carbon_trace_output_dir_bytes " in text
+
+    assert metrics.REQUESTS.value(method="POST", route="/upload-csv", status="200") == uploads + 1
+    assert metrics.STAGE_SECONDS.count(stage="clean") == cleaned + 1
+    assert metrics.ROWS_PROCESSED.value() == rows + 600
+
+    # Unknown job ids share one route label
+    client.get("/jobs/nope1")
+    client.get("/jobs/nope2")
+    assert metrics.REQUESTS.value(method="GET", route="/jobs/{job_id}", status="404") >= 2
+
+    # A job is in flight from its submission until it finishes
+    held = Future()
+    monkeypatch.setattr(api.main.jobs, "submit", lambda *args: held)
+    res = _upload(client, SAMPLE_CSV.read_bytes(), wait="false")
+    job_ids.append(res.json()["job_id"])
+    assert metrics.JOBS_IN_FLIGHT.value() == 1
+    held.set_result({})
+    assert metrics.JOBS_IN_FLIGHT.value() == 0
+
+
+def test_profiled_upload(client, job_ids, tmp_path):
+    res = _upload(client, SAMPLE_CSV.read_bytes(), profile="1")
+    assert res.status_code == 200
+    assert res.headers["X-Cache"] == "BYPASS"
+    data = res.json()
+    job_ids.append(data["job_id"])
+
+    res = client.get(data["files"]["profile"])
+    assert res.status_code == 200
+    bundle = zipfile.ZipFile(io.BytesIO(res.content))
+    profile = json.loads(bundle.read("profile.json"))
+    stages = profile["stages"]
+    assert list(stages) == ["clean", "audit", "summary", "plot", "response"]
+    for entry in stages.values():
+        assert entry["seconds"] > 0
+        assert entry["peak_memory_bytes"] > 0
+        assert entry["top_functions"]
+    assert any("run_audit_frame" in f["function"] for f in stages["audit"]["top_functions"])
+
+    # Raw captures load with pstats
+    prof = tmp_path / "audit.prof"
+    prof.write_bytes(bundle.read("audit.prof"))
+    assert pstats.Stats(str(prof)).total_calls > 0
+
+    # The chart was drawn during the profiled job
+    assert (OUTPUT_DIR / data["job_id"] / "emissions_chart.png").exists()
+
+    # Unprofiled jobs have no artifact
+    res = _upload(client, SAMPLE_CSV.read_bytes())
+    job_ids.append(res.json()["job_id"])
+    assert "profile" not in res.json()["files"]
+
+
+def test_identical_upload_hits_cache(client, job_ids, result_cache):
+    content = SAMPLE_CSV.read_bytes()
+
+    first = _upload(client, content)
+    assert first.headers["x-cache"] == "MISS"
+    job_ids.append(first.json()["job_id"])
+
+    second = _upload(client, content)
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+
+    async_hit = _upload(client, content, wait="false")
+    assert async_hit.status_code == 200
+    assert async_hit.json()["job_id"] == first.json()["job_id"]
+
+    # Different options or bytes are different entries
+    with_cleaned = _upload(client, content, keep_cleaned="true")
+    assert with_cleaned.headers["x-cache"] == "MISS"
+    job_ids.append(with_cleaned.json()["job_id"])
+
+    changed = _upload(client, content + b"FAC_NEW,Steel,1,10,10,coal,1\n")
+    assert changed.headers["x-cache"] == "MISS"
+    job_ids.append(changed.json()["job_id"])
+
+
+def test_result_cache_eviction(tmp_path):
+    from api.result_cache import ResultCache
+    from api.pipeline import write_status
+
+    outputs = tmp_path / "outputs"
+    cache = ResultCache(tmp_path / "cache", outputs, max_bytes=2500, max_age_s=3600)
+    for i in range(3):
+        job_dir = outputs / f"job{i}"
+        job_dir.mkdir(parents=True)
+        (job_dir / "raw_upload.csv").write_bytes(b"x" * 1000)
+        write_status(job_dir, f"job{i}", "completed")
+        cache.store(f"key{i}", f"job{i}")
+        time.sleep(0.01)
+
+    # Oldest entry exceeded the budget and was evicted with its outputs
+    assert cache.lookup("key0") is None
+    assert not (outputs / "job0").exists()
+    assert cache.lookup("key2") == "job2"
+
+    cache.max_age_s = 0
+    cache.evict()
+    assert cache.lookup("key2") is None
+
+
+def _split_by_month(tmp_path, last_month: int):
+    """Cleaned sample rows as CSV bytes: months ≤ last_month, and the rest."""
+    from web_pipeline import clean_frame
+
+    df, _ = clean_frame(str(SAMPLE_CSV))
+    early = df[df["month"] <= last_month].to_csv(index=False).encode()
+    late = df[df["month"] > last_month].to_csv(index=False).encode()
+    return early, late
+
+
+def _append(client, tenant: str, content: bytes, **params):
+    return client.post(
+        f"/tenants/{tenant}/months",
+        params=params,
+        files={"file": ("months.csv", content, "text/csv")},
+    )
+
+
+def test_append_months_matches_full_upload(client, job_ids, tenant_state, tmp_path):
+    early, late = _split_by_month(tmp_path, last_month=6)
+    full = _upload(client, SAMPLE_CSV.read_bytes()).json()
+    job_ids.append(full["job_id"])
+
+    seeded = _upload(client, early, tenant="acme")
+    assert seeded.status_code == 200
+    assert seeded.headers["x-cache"] == "BYPASS"
+    job_ids.append(seeded.json()["job_id"])
+    assert (tenant_state / "acme" / "state.json").exists()
+
+    res = _append(client, "acme", late)
+    assert res.status_code == 200
+    appended = res.json()
+    job_ids.append(appended["job_id"])
+
+    for key in ("summary", "sector_breakdown", "violators"):
+        assert appended[key] == full[key], key
+    assert _factories(client, appended["job_id"]) == _factories(client, full["job_id"])
+    assert appended["state"]["months_appended"] == late.count(b"\n") - 1
+    assert appended["state"]["rows_skipped"] == 0
+
+    # Re-sending months the state already has changes nothing
+    res = _append(client, "acme", late, wait="false")
+    assert res.status_code == 202
+    job_ids.append(res.json()["job_id"])
+    status = _wait_for(client, res.json()["job_id"])
+    assert status["result"]["summary"] == full["summary"]
+    assert status["result"]["state"]["months_appended"] == 0
+    assert status["result"]["state"]["rows_skipped"] > 0
+
+
+def test_append_next_year(client, job_ids, tenant_state, tmp_path):
+    content = _two_years(tmp_path)
+    full = _upload(client, content).json()
+    job_ids.append(full["job_id"])
+
+    job_ids.append(_append(client, "gamma", _year_rows(content, 2026)).json()["job_id"])
+    appended = _append(client, "gamma", _year_rows(content, 2027)).json()
+    job_ids.append(appended["job_id"])
+
+    for year in ("2026", "2027"):
+        for key in ("summary", "sector_breakdown", "violators"):
+            assert appended["years"][year][key] == full["years"][year][key], (year, key)
+    assert _factories(client, appended["job_id"]) == _factories(client, full["job_id"])
+    assert appended["state"]["months_appended"] == 30 * 12
+
+    # Months of a year the state has moved past are skipped
+    stale = _append(client, "gamma", _year_rows(content, 2026)).json()
+    job_ids.append(stale["job_id"])
+    assert stale["state"]["rows_skipped"] == 30 * 12
+    assert stale["years"]["2027"]["summary"] == full["years"]["2027"]["summary"]
+
+
+def test_tenant_state_snapshot_restore(client, job_ids, tenant_state, tmp_path):
+    early, late = _split_by_month(tmp_path, last_month=9)
+    job_ids.append(_append(client, "beta", early).json()["job_id"])
+
+    snapshot = client.get("/tenants/beta/state")
+    assert snapshot.status_code == 200
+    assert client.delete("/tenants/beta/state").status_code == 200
+    assert client.get("/tenants/beta/state").status_code == 404
+
+    res = client.put(
+        "/tenants/beta/state",
+        files={"file": ("state.json", snapshot.content, "application/json")},
+    )
+    assert res.status_code == 200
+    assert res.json()["factories"] == 50
+
+    res = _append(client, "beta", late)
+    job_ids.append(res.json()["job_id"])
+    assert res.json()["summary"]["total_emissions_kg"] == 2034611129.6
+
+    bad = client.put(
+        "/tenants/beta/state",
+        files={"file": ("state.json", b"{not json", "application/json")},
+    )
+    assert bad.status_code == 422
+    assert client.get("/tenants/bad%20name/state").status_code == 400
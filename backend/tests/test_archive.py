@@ -0,0 +1,135 @@
+"""Carbon-Trace: Archive upload reading and merging tests.
+
+Test Suite:
+  ✅ Zip and tar (compressed or not) members are read in order, CSVs only
+  ✅ Corrupt, empty and oversized archives are rejected with ValueError
+  ✅ Cleaned members merge into the single-file result; later files win
+     (spilled as Parquet, or as CSV without pyarrow)
+"""
+
+import io
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api import archive
+from src import export
+from api.archive import archive_format, clean_member, iter_members, merge_members
+from web_pipeline import clean_frame
+
+SAMPLE_CSV = Path(__file__).resolve().parent.parent / "data" / "monthly_production.csv"
+MEMBERS = {
+    "north/a.csv": b"factory_id,sector\n",
+    "__MACOSX/north/._a.csv": b"metadata",
+    "notes.txt": b"not a csv",
+    "south/B.CSV": b"factory_id,sector\nF1,Steel\n",
+}
+
+
+def _zip(path: Path, members: dict) -> Path:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+    return path
+
+
+def _tar(path: Path, members: dict, mode: str = "w:gz") -> Path:
+    with tarfile.open(path, mode) as t:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            t.addfile(info, io.BytesIO(data))
+    return path
+
+
+@pytest.mark.parametrize("name, mode", [
+    ("batch.zip", None), ("batch.tar", "w"), ("batch.tar.gz", "w:gz"),
+    ("batch.tgz", "w:gz"), ("batch.tar.xz", "w:xz"),
+])
+def test_members_in_order(tmp_path, name, mode):
+    path = _zip(tmp_path / name, MEMBERS) if mode is None else _tar(tmp_path / name, MEMBERS, mode)
+    fmt = archive_format(name.upper())
+    assert fmt == ("zip" if mode is None else "tar")
+    assert list(iter_members(str(path), fmt, max_member_bytes=1024)) == [
+        ("north/a.csv", MEMBERS["north/a.csv"]),
+        ("south/B.CSV", MEMBERS["south/B.CSV"]),
+    ]
+    assert archive_format("batch.csv") is None
+
+
+def test_invalid_archives(tmp_path, monkeypatch):
+    bad = tmp_path / "bad.zip"
+    bad.write_bytes(b"not a zip")
+    truncated = tmp_path / "truncated.tar.gz"
+    truncated.write_bytes(_tar(tmp_path / "whole.tar.gz", MEMBERS).read_bytes()[:60])
+    empty = _zip(tmp_path / "empty.zip", {"notes.txt": b"x"})
+    cases = [(bad, "zip"), (truncated, "tar"), (empty, "zip")]
+    for path, fmt in cases:
+        with pytest.raises(ValueError):
+            list(iter_members(str(path), fmt, max_member_bytes=1024))
+
+    # A member inflating past its limit is refused, however well it compresses
+    bomb = _zip(tmp_path / "bomb.zip", {"big.csv": b"0" * 10_000_000})
+    assert bomb.stat().st_size < 100_000
+    with pytest.raises(ValueError, match="decompressed size"):
+        list(iter_members(str(bomb), "zip", max_member_bytes=1_000_000))
+    monkeypatch.setattr(archive, "MAX_MEMBERS", 1)
+    with pytest.raises(ValueError, match="more than 1"):
+        list(iter_members(str(_zip(tmp_path / "two.zip", MEMBERS)), "zip", max_member_bytes=1024))
+
+
+@pytest.mark.parametrize("parquet", [True, False])
+def test_merge_matches_single_file(tmp_path, monkeypatch, parquet):
+    if parquet and not export.AVAILABLE:
+        pytest.skip("pyarrow not installed")
+    monkeypatch.setattr(export, "AVAILABLE", parquet)
+    expected, expected_report = clean_frame(str(SAMPLE_CSV))
+    df = pd.read_csv(SAMPLE_CSV)
+
+    # Split by sector, the Steel file repeated later with doubled energy
+    parts = [part for _, part in df.groupby("sector")]
+    steel = df[df["sector"] == "Steel"].assign(energy_used_mwh=lambda d: d["energy_used_mwh"] * 2)
+    files = [p.to_csv(index=False).encode() for p in parts]
+    files += [b"a,b\n1,2\n", steel.to_csv(index=False).encode()]
+    members = [
+        clean_member(str(tmp_path), i, f"site_{i}.csv", data) for i, data in enumerate(files)
+    ]
+    assert all(archive.member_path(tmp_path, i).exists() for i in (0, 1, 2, 4))
+    assert "Missing required columns" in members[3]["error"]
+    assert [m["cleaning_report"]["original_rows"] for m in members if "error" not in m] == [
+        len(parts[0]), len(parts[1]), len(parts[2]), len(steel),
+    ]
+
+    merged, report = merge_members(tmp_path, members)
+    steel_rows = expected["sector"] == "Steel"
+    expected.loc[steel_rows, "energy_used_mwh"] = expected.loc[steel_rows, "energy_used_mwh"] * 2
+    pd.testing.assert_frame_equal(merged, expected, check_dtype=False)
+    assert report["original_rows"] == len(df) + len(steel)
+    assert report["cleaned_rows"] == expected_report["cleaned_rows"]
+    assert report["factories_found"] == expected_report["factories_found"]
+    assert report["actions"] == [
+        "Cleaned 4 of 5 CSV files",
+        "Skipped 1 invalid file(s) (see members)",
+        f"Removed {len(steel)} rows repeated in a later file",
+    ]
+
+    # Files without a year column join multi-year ones as DEFAULT_YEAR
+    (tmp_path / "years").mkdir()
+    dated = df.iloc[:100].assign(year=2027).to_csv(index=False).encode()
+    members = [
+        clean_member(str(tmp_path / "years"), 0, "undated.csv", files[0]),
+        clean_member(str(tmp_path / "years"), 1, "dated.csv", dated),
+    ]
+    merged, report = merge_members(tmp_path / "years", members)
+    assert report["years_found"] == [2026, 2027]
+    assert list(merged.columns)[-1] == "year"
+
+    with pytest.raises(ValueError, match="No valid CSV files"):
+        merge_members(tmp_path, [{"file": "bad.csv", "error": "Missing required columns"}])
@@ -0,0 +1,37 @@
+"""Carbon-Trace: Benchmark suite smoke tests.
+
+Test Suite:
+  ✅ A small benchmark run times every stage and writes comparable results
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_pipeline import compare_results, main
+
+
+def test_benchmark_results_file(tmp_path):
+    output = tmp_path / "results.json"
+
+    doc = main(["--sizes", "50", "--no-upload", "--output", str(output)])
+
+    saved = json.loads(output.read_text(encoding="utf-8"))
+    assert saved == json.loads(json.dumps(doc))
+    assert saved["environment"]["python"]
+    stages = [r["stage"] for r in saved["results"]]
+    assert stages == [
+        "clean_csv", "run_audit[closure]", "run_audit[vectorized]",
+        "write_summary_csv", "plot_emissions", "scenarios[500]", "uncertainty[10000]",
+    ]
+    for r in saved["results"]:
+        assert r["rows"] == 50
+        assert r["seconds"] > 0
+        assert r["peak_memory_mb"] > 0
+
+    rows = compare_results(saved, saved)
+    assert len(rows) == len(stages)
+    assert all(r["speedup"] == 1.0 for r in rows)
@@ -7,6 +7,8 @@ Test Suite:
   ✅ Test 4 — Factory Independence: Two factories maintain separate state
   ✅ Test 5 — Raw Material Impact: raw_material_weight affects emissions
   ✅ Test 6 — Energy Source Multiplier: coal vs renewable produce different emissions
+  ✅ Test 7 — Incremental Aggregates: O(1) summaries match a scan of the history
+  ✅ Test 8 — Snapshot Restore: a restored factory continues bit-for-bit
 """
 
 import sys
@@ -274,6 +276,81 @@ def test_energy_source_multiplier():
     print(f"   Renewable total: {result_renewable['monthly_emissions_kg']:,.0f} kg (×{result_renewable['breakdown']['source_multiplier']})")
 
 
+def test_incremental_aggregates():
+    """
+    Test 7: Incremental Aggregates
+    Running max / average / alert count / first breach month must equal what
+    a full scan of the history gives, and a factory rebuilt from its history
+    must report the same aggregates and records.
+    """
+    factory = Industry("FAC_AGG", "Steel", STEEL_FACTOR, 30_000_000, ENERGY_MULTIPLIERS)
+    assert factory.months_recorded == 0
+    assert factory.max_monthly_emissions == 0.0
+    assert factory.avg_monthly_emissions == 0.0
+    assert factory.first_breach_month is None
+
+    sources = ["coal", "renewable", "grid", None]
+    for month in range(1, 13):
+        factory.record_month(
+            month, 800.0 + 97.3 * (month % 5), 3000.0 + 11.1 * month,
+            sources[month % 4], 2.5 * month,
+        )
+
+    history = factory.history
+    monthly = [r["monthly_emissions_kg"] for r in history]
+    alert_months = [r["month"] for r in history if r["status"] == "ALERT"]
+
+    assert factory.months_recorded == 12
+    assert factory.max_monthly_emissions == max(monthly)
+    assert factory.avg_monthly_emissions == sum(monthly) / len(monthly)
+    assert factory.alerts_count == len(alert_months) > 0
+    assert factory.first_breach_month == alert_months[0]
+    assert factory.cumulative_series == [(r["month"], r["total_emissions_kg"]) for r in history]
+    assert not hasattr(factory, "__dict__"), "Industry should use __slots__"
+
+    rebuilt = Industry(
+        "FAC_AGG", "Steel", STEEL_FACTOR, 30_000_000, ENERGY_MULTIPLIERS,
+        history=history,
+    )
+    assert rebuilt.history == history
+    assert rebuilt.max_monthly_emissions == factory.max_monthly_emissions
+    assert rebuilt.first_breach_month == factory.first_breach_month
+
+    print(f"✅ Test 7 — Incremental Aggregates: PASS")
+    print(f"   First breach: month {factory.first_breach_month}, alerts: {factory.alerts_count}")
+
+
+def test_snapshot_restore():
+    """
+    Test 8: Snapshot Restore
+    A factory rebuilt from its snapshot must resume from the unrounded
+    running total, so later months match a factory that never stopped.
+    """
+    months = [(m, 900.0 + 13.7 * m, 3100.0 + 7.9 * m, "coal", 1.3 * m) for m in range(1, 13)]
+    live = Industry("FAC_SNAP", "Steel", STEEL_FACTOR, 30_000_000, ENERGY_MULTIPLIERS)
+    for row in months[:5]:
+        live.record_month(*row)
+
+    restored = Industry.from_snapshot(
+        live.snapshot(), STEEL_FACTOR, 30_000_000, ENERGY_MULTIPLIERS
+    )
+    assert restored.history == live.history
+    for row in months[5:]:
+        assert restored.record_month(*row) == live.record_month(*row)
+    assert restored.snapshot() == live.snapshot()
+
+    # The auditor's snapshot is a copy — it cannot change the running state
+    auditor = make_emission_auditor("Steel", STEEL_FACTOR, 999_999_999)
+    auditor(10, 10)
+    state = auditor.snapshot()
+    state["total_emissions_kg"] = 0.0
+    state["monthly_log"].clear()
+    assert auditor(10, 10)["month_number"] == 2
+
+    print(f"✅ Test 8 — Snapshot Restore: PASS")
+    print(f"   Restored total after 12 months: {restored.total_emissions:,.2f} kg")
+
+
 if __name__ == "__main__":
     print("=" * 55)
     print("  🧪 CARBON-TRACE TEST SUITE")
@@ -291,8 +368,12 @@ if __name__ == "__main__":
     test_raw_material_impact()
     print()
     test_energy_source_multiplier()
+    print()
+    test_incremental_aggregates()
+    print()
+    test_snapshot_restore()
 
     print()
     print("=" * 55)
-    print("  🎉 ALL 6 TESTS PASSED!")
+    print("  🎉 ALL 8 TESTS PASSED!")
     print("=" * 55)
@@ -0,0 +1,89 @@
+"""Carbon-Trace: Config registry tests.
+
+Test Suite:
+  ✅ Configs compile once and reload only when the file changes
+  ✅ Named configs (sectors_<name>.json) are selectable
+  ✅ Auditors share the compiled, immutable factor records
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import ConfigRegistry, EmissionFactors, UNKNOWN_SECTOR
+from src.models import Industry
+
+CONFIG = {
+    "sectors": {
+        "Steel": {
+            "emission_factor": {
+                "production_per_ton": 1850.0,
+                "energy_per_mwh": 820.0,
+                "material_processing_per_ton": 120.0,
+            },
+            "carbon_cap_kg": 90000000,
+        },
+    },
+    "energy_source_multipliers": {"coal": 1.25},
+}
+
+
+def _write(path: Path, config: dict) -> None:
+    path.write_text(json.dumps(config), encoding="utf-8")
+
+
+def test_compiles_once_and_reloads_on_change(tmp_path):
+    _write(tmp_path / "sectors.json", CONFIG)
+    registry = ConfigRegistry(tmp_path)
+
+    first = registry.get()
+    assert registry.get() is first, "unchanged file should not be re-parsed"
+    assert first.sector("Steel").emission_factor == EmissionFactors(1850.0, 820.0, 120.0)
+    assert first.sector("Cement") is UNKNOWN_SECTOR
+
+    changed = json.loads(json.dumps(CONFIG))
+    changed["sectors"]["Steel"]["carbon_cap_kg"] = 1
+    _write(tmp_path / "sectors.json", changed)
+    st = os.stat(tmp_path / "sectors.json")
+    os.utime(tmp_path / "sectors.json", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    reloaded = registry.get()
+    assert reloaded is not first
+    assert reloaded.sector("Steel").carbon_cap_kg == 1
+    assert reloaded.digest != first.digest
+
+
+def test_named_configs(tmp_path):
+    _write(tmp_path / "sectors.json", CONFIG)
+    _write(tmp_path / "sectors_eu.json", {"sectors": {}, "energy_source_multipliers": {}})
+    registry = ConfigRegistry(tmp_path)
+
+    assert registry.names() == ["default", "eu"]
+    assert registry.get("eu").sectors == {}
+    with pytest.raises(KeyError):
+        registry.get("missing")
+    with pytest.raises(KeyError):
+        registry.path_for("../sectors")
+
+
+def test_factors_are_shared_and_immutable(tmp_path):
+    _write(tmp_path / "sectors.json", CONFIG)
+    compiled = ConfigRegistry(tmp_path).get()
+    steel = compiled.sector("Steel")
+
+    with pytest.raises(AttributeError):
+        steel.emission_factor.production_per_ton = 0.0
+    with pytest.raises(TypeError):
+        compiled.energy_multipliers["coal"] = 0.0
+
+    a = Industry("A", "Steel", steel.emission_factor, steel.carbon_cap_kg, compiled.energy_multipliers)
+    b = Industry("B", "Steel", steel.emission_factor, steel.carbon_cap_kg, compiled.energy_multipliers)
+    ra = a.record_month(1, 1000, 4000, "coal")
+    rb = b.record_month(1, 1000, 4000, "coal")
+    assert ra["monthly_emissions_kg"] == rb["monthly_emissions_kg"] == 1000 * 1850 + 4000 * 820 * 1.25
@@ -0,0 +1,84 @@
+"""Carbon-Trace: Synthetic data generator tests.
+
+Test Suite:
+  ✅ The default fleet keeps the original 50-factory, 12-month layout
+  ✅ Sector mix, years and exact row counts are honored
+  ✅ Output is reproducible and the same with or without pyarrow
+  ✅ Dirty rows are the ones clean_csv repairs or drops
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.data_gen as data_gen
+from src.data_gen import generate_monthly_data
+from web_pipeline import clean_csv
+
+
+def test_default_fleet(tmp_path):
+    path = tmp_path / "fleet.csv"
+    assert generate_monthly_data(str(path)) == 600
+
+    df = pd.read_csv(path)
+    assert list(df.columns) == data_gen.FIELDNAMES
+    assert df.groupby("sector")["factory_id"].nunique().to_dict() == {
+        "Steel": 20, "Textile": 15, "Electronics": 15,
+    }
+    assert df["factory_id"].iloc[0] == "FAC_STEEL_01"
+    months = df.groupby("factory_id")["month"].apply(list)
+    assert all(m == list(range(1, 13)) for m in months)
+    assert (df["raw_material_weight_tons"] > df["monthly_production_tons"]).all()
+
+
+def test_sector_mix_years_and_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_gen, "CHUNK_ROWS", 100)  # several chunks
+    path = tmp_path / "fleet.csv"
+    generate_monthly_data(
+        str(path), n_factories=10, sector_mix={"Steel": 3, "Textile": 1}, years=3,
+    )
+    df = pd.read_csv(path)
+    assert df.groupby("sector")["factory_id"].nunique().to_dict() == {"Steel": 8, "Textile": 2}
+    assert len(df) == 10 * 36
+    assert sorted(df["year"].unique()) == [2026, 2027, 2028]
+    assert not df.duplicated(["factory_id", "year", "month"]).any()
+
+    assert generate_monthly_data(str(path), total_rows=1001) == 1001
+
+
+def test_reproducible_with_and_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_gen, "CHUNK_ROWS", 500)
+    first, second, fallback = (tmp_path / f"{n}.csv" for n in ("a", "b", "c"))
+    generate_monthly_data(str(first), n_factories=200, dirty_rate=0.1, seed=7)
+    generate_monthly_data(str(second), n_factories=200, dirty_rate=0.1, seed=7)
+    assert first.read_bytes() == second.read_bytes()
+
+    monkeypatch.setattr(data_gen, "pa", None)
+    generate_monthly_data(str(fallback), n_factories=200, dirty_rate=0.1, seed=7)
+    pd.testing.assert_frame_equal(pd.read_csv(first), pd.read_csv(fallback))
+
+
+def test_dirty_rows_exercise_cleaning(tmp_path):
+    raw, cleaned = tmp_path / "dirty.csv", tmp_path / "clean.csv"
+    written = generate_monthly_data(str(raw), n_factories=500, dirty_rate=0.2)
+    assert written > 500 * 12  # duplicated rows
+
+    df = pd.read_csv(raw, dtype=str, keep_default_na=False)
+    assert not df["sector"].isin({"Steel", "Textile", "Electronics"}).all()
+    assert (~df["energy_source_type"].isin(data_gen.ENERGY_SOURCES)).any()
+
+    _, report = clean_csv(str(raw), str(cleaned))
+    actions = " ".join(report["actions"])
+    for issue in ("invalid sectors", "negative", "duplicate"):
+        assert issue in actions
+    assert report["factories_found"] == 500
+
+    # Every surviving row is canonical again
+    out = pd.read_csv(cleaned)
+    assert set(out["sector"]) == {"Steel", "Textile", "Electronics"}
+    assert set(out["energy_source_type"]) <= set(data_gen.ENERGY_SOURCES)
+    assert len(out) > 500 * 12 * 0.85
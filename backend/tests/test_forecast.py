@@ -0,0 +1,135 @@
+"""Carbon-Trace: Cap-breach forecasting tests.
+
+Test Suite:
+  ✅ An exact trend × seasonality is projected exactly, breach month included
+  ✅ Real trends survive the fleet-wide slope shrinkage
+  ✅ Seasonality is learned from complete factory-years only
+  ✅ Complete years are not projected; already breached factories keep their month
+  ✅ Months 1–5 of a real fleet project close to its actual year-end totals
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_gen import generate_monthly_data
+from src.forecast import MONTHS, forecast, forecast_years, seasonal_indices
+from src.runner import run_audit_frame
+from web_pipeline import clean_frame
+
+CONFIG_PATH = str(Path(__file__).resolve().parent.parent / "config" / "sectors.json")
+
+SEASON = np.array([1.1, 1.1, 1.0, 1.0, 1.0, 0.9, 0.9, 1.0, 1.0, 1.0, 1.0, 1.0])
+SEASON = SEASON / SEASON.mean()
+
+
+def _fleet(series, caps):
+    """`forecast` inputs for one sector: series[k] is factory-year k's monthly values."""
+    groups = np.concatenate([np.full(len(s), k) for k, s in enumerate(series)])
+    months = np.concatenate([np.arange(1, len(s) + 1) for s in series])
+    monthly = np.concatenate(series)
+    totals = np.array([s.sum() for s in series])
+    first_breach = np.array([
+        int(np.argmax(np.cumsum(s) > cap)) + 1 if s.sum() > cap else 0
+        for s, cap in zip(series, caps)
+    ])
+    return dict(
+        groups=groups, group_sectors=np.zeros(len(series), dtype=np.int64),
+        months=months, monthly=monthly, totals=totals, caps=np.asarray(caps, dtype=float),
+        first_breach=first_breach, sectors=["Steel"],
+    )
+
+
+def test_exact_trend_and_season():
+    calendar = np.arange(1, MONTHS + 1)
+    full = [(1000 + 10 * k) * SEASON for k in range(3)]             # teach the season
+    line = (500 + 40 * calendar) * SEASON                           # partial: months 1–5
+    result = forecast(**_fleet(full + [line[:5]], caps=[1e9, 1e9, 1e9, 6000]))
+
+    assert result.season[0] == pytest.approx(SEASON)
+    assert result.months_projected.tolist() == [0, 0, 0, 7]
+    assert result.projected_total_kg[3] == pytest.approx(line.sum())
+    assert result.projected_total_kg[:3] == pytest.approx([s.sum() for s in full])
+    # The running total first exceeds 6000 in the month the true series does
+    assert result.breach_month[3] == np.argmax(np.cumsum(line) > 6000) + 1 > 5
+    assert result.breach_month[:3].tolist() == [0, 0, 0]
+
+
+def test_real_trends_are_kept():
+    rng = np.random.default_rng(4)
+    calendar = np.arange(1, MONTHS + 1)
+    growth = rng.uniform(-0.06, 0.06, 200)
+    series = [
+        1000 * (1 + g * (calendar - 1)) * rng.uniform(0.97, 1.03, MONTHS) for g in growth
+    ]
+    result = forecast(**_fleet([s[:6] for s in series], caps=[1e9] * len(series)))
+
+    actual = np.array([s.sum() for s in series])
+    error = np.abs(result.projected_total_kg / actual - 1)
+    flat = np.abs(np.array([s[:6].mean() * MONTHS for s in series]) / actual - 1)
+    assert np.median(error) < 0.02
+    assert np.median(error) < np.median(flat) / 3
+
+
+def test_season_needs_complete_years():
+    partial = [np.full(6, 100.0), np.full(11, 100.0)]
+    inputs = _fleet(partial, caps=[1e9, 1e9])
+    season = seasonal_indices(
+        inputs["groups"], inputs["group_sectors"], inputs["months"], inputs["monthly"], 1
+    )
+    assert season.tolist() == [[1.0] * MONTHS]
+
+    # Flat season and too few months for a trend → the mean carries forward
+    short = forecast(**_fleet([np.array([100.0, 300.0])], caps=[1e9]))
+    assert short.projected_total_kg[0] == pytest.approx(400 + 10 * 200)
+
+
+def test_already_breached_keeps_actual_month():
+    rising = np.array([100.0, 200.0, 300.0, 400.0])
+    result = forecast(**_fleet([rising], caps=[250.0]))
+    assert result.breach_month[0] == 2
+    assert result.projected_total_kg[0] > rising.sum()
+
+
+def test_partial_year_projection(tmp_path):
+    raw = tmp_path / "fleet.csv"
+    generate_monthly_data(str(raw), n_factories=300, seed=21)
+    df, _ = clean_frame(str(raw))
+    full, _ = run_audit_frame(df, CONFIG_PATH)
+
+    # Complete years are returned unchanged
+    result = forecast_years({2026: full})
+    factories = list(full.values())
+    assert result.months_projected.tolist() == [0] * len(factories)
+    assert result.projected_total_kg == pytest.approx([f.total_emissions for f in factories])
+    assert result.breach_month.tolist() == [f.first_breach_month or 0 for f in factories]
+
+    # Half the fleet has reported months 1–5, the other half the full year
+    ids = sorted(full)
+    partial_ids = set(ids[::2])
+    kept = df[~df["factory_id"].isin(partial_ids) | (df["month"] <= 5)]
+    partial, _ = run_audit_frame(kept, CONFIG_PATH)
+    result = forecast_years({2026: partial})
+
+    projected = pd.Series(result.projected_total_kg, index=list(partial))
+    months = pd.Series(result.months_projected, index=list(partial))
+    breach = pd.Series(result.breach_month, index=list(partial))
+    actual = pd.Series({fid: f.total_emissions for fid, f in full.items()})
+    actual_breach = pd.Series({fid: f.first_breach_month or 0 for fid, f in full.items()})
+
+    partial_ids = sorted(partial_ids)
+    assert (months[partial_ids] == 7).all()
+    # Months are noisy (a random energy source each), so seven of them
+    # cannot be known exactly — but the fleet has no trend to extrapolate
+    error = (projected[partial_ids] / actual[partial_ids] - 1).abs()
+    assert error.median() < 0.06
+    assert error.max() < 0.35
+    # Breach / no breach is predicted right for most factories, ahead of time
+    will_breach = breach[partial_ids] > 0
+    assert (will_breach == (actual_breach[partial_ids] > 0)).mean() > 0.8
@@ -0,0 +1,224 @@
+"""Carbon-Trace: Job index and output garbage collection tests.
+
+Test Suite:
+  ✅ Jobs are listed newest first with a cursor and filters
+  ✅ Expired jobs are collected; using a job restarts its TTL
+  ✅ Over the quota, least recently used jobs are collected first
+  ✅ Running jobs are never collected
+  ✅ A job is listed as running from its first stage until it finishes
+  ✅ sync indexes unknown job directories (with a fresh TTL) and forgets deleted ones
+  ✅ sync fails jobs a restart left queued or running, so their TTL applies
+  ✅ sync leaves the jobs of other live API processes alone
+  ✅ Result-cache eviction deletes jobs through the index
+"""
+
+import os
+import pickle
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.job_index import JobIndex
+import api.pipeline
+from api.pipeline import StageTimer, read_status, warm_worker, write_status
+from api.result_cache import ResultCache
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    path = tmp_path / "outputs"
+    path.mkdir()
+    return path
+
+
+def _job(index: JobIndex, output_dir: Path, job_id: str, size: int = 100,
+         status: str = "completed", **fields) -> None:
+    """Create a job directory of about ``size`` bytes and index it."""
+    job_dir = output_dir / job_id
+    job_dir.mkdir()
+    (job_dir / "payload.bin").write_bytes(b"x" * size)
+    index.add(job_id, "upload", **fields)
+    write_status(job_dir, job_id, status, rows={"input": 10})
+    index.finish(job_id)
+
+
+def test_list_jobs(tmp_path, output_dir):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir)
+    for i in range(5):
+        _job(index, output_dir, f"job{i}", tenant="acme" if i % 2 else None)
+        time.sleep(0.001)
+
+    records, cursor = index.list(limit=2)
+    assert [r["job_id"] for r in records] == ["job4", "job3"]
+    assert records[0]["status"] == "completed"
+    assert records[0]["rows"] == 10
+    assert records[0]["size_bytes"] > 100
+    assert records[0]["expires_at"] == records[0]["last_used_at"] + index.ttl_s
+
+    seen = [r["job_id"] for r in records]
+    while cursor:
+        records, cursor = index.list(limit=2, cursor=cursor)
+        seen += [r["job_id"] for r in records]
+    assert seen == ["job4", "job3", "job2", "job1", "job0"]
+
+    assert [r["job_id"] for r in index.list(tenant="acme")[0]] == ["job3", "job1"]
+    assert index.list(status="failed")[0] == []
+    with pytest.raises(ValueError):
+        index.list(cursor="garbage")
+
+
+def test_collect_expired(tmp_path, output_dir):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir, ttl_s=3600, max_bytes=0)
+    _job(index, output_dir, "old")
+    _job(index, output_dir, "short", ttl_s=60)
+    _job(index, output_dir, "kept")
+
+    now = time.time() + 1800
+    assert index.collect(now=now) == ["short"]
+    assert not (output_dir / "short").exists()
+    assert index.get("short") is None
+
+    index.touch("kept")
+    assert index.collect(now=time.time() + 3500) == []
+    assert sorted(index.collect(now=time.time() + 7200)) == ["kept", "old"]
+    assert index.total_bytes() == 0
+
+
+def test_collect_over_quota_lru(tmp_path, output_dir):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir, max_bytes=10_000)
+    for job_id in ("a", "b", "c"):
+        _job(index, output_dir, job_id, size=4_000)
+        time.sleep(0.001)
+    index.touch("a")  # b is now the least recently used
+
+    assert index.collect() == ["b"]
+    assert (output_dir / "a").exists() and (output_dir / "c").exists()
+    assert index.total_bytes() <= 10_000
+
+
+def test_running_jobs_are_kept(tmp_path, output_dir):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir, ttl_s=60, max_bytes=1)
+    (output_dir / "busy").mkdir()
+    index.add("busy", "upload")
+    write_status(output_dir / "busy", "busy", "running")
+    index.finish("busy")
+
+    assert index.collect(now=time.time() + 3600) == []
+    assert index.get("busy")["status"] == "queued"
+
+
+def test_started_jobs_are_running(tmp_path, output_dir, monkeypatch):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir)
+    monkeypatch.setattr(api.pipeline, "_job_index", None)
+    warm_worker(pickle.loads(pickle.dumps(index)))  # As a pool worker receives it
+    (output_dir / "job").mkdir()
+    index.add("job", "upload")
+    write_status(output_dir / "job", "job", "queued")
+    assert index.list(status="running")[0] == []
+    assert index.get("job")["status"] == "queued"
+
+    timer = StageTimer(output_dir / "job", "job")
+    timer.stage("clean")
+    assert [r["job_id"] for r in index.list(status="running")[0]] == ["job"]
+    timer.stage("audit")
+    assert index.get("job")["status"] == "running"
+    assert index.collect(now=time.time() + 10 * index.ttl_s) == []
+
+    timer.stop()
+    write_status(output_dir / "job", "job", "completed")
+    index.finish("job")
+    assert index.list(status="running")[0] == []
+    assert index.get("job")["status"] == "completed"
+
+
+def test_sync(tmp_path, output_dir):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir)
+    _job(index, output_dir, "indexed")
+    _job(index, output_dir, "gone")
+    (output_dir / "gone" / "payload.bin").unlink()
+    (output_dir / "gone" / "status.json").unlink()
+    (output_dir / "gone").rmdir()
+
+    orphan = output_dir / "orphan"
+    orphan.mkdir()
+    write_status(orphan, "orphan", "completed", rows={"input": 3})
+    week_ago = time.time() - 7 * 24 * 3600
+    os.utime(orphan, (week_ago, week_ago))
+
+    assert index.sync() == {"added": 1, "removed": 1}
+    assert index.get("gone") is None
+    record = index.get("orphan")
+    assert record["kind"] == "unknown"
+    assert record["status"] == "completed"
+    assert record["rows"] == 3
+    assert record["created_at"] == pytest.approx(week_ago)
+    assert index.collect() == []
+
+
+def test_sync_fails_interrupted_jobs(tmp_path, output_dir):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir, ttl_s=60, max_bytes=0)
+    for job_id, status in (("crashed", "running"), ("waiting", "queued")):
+        (output_dir / job_id).mkdir()
+        index.add(job_id, "upload")
+        write_status(output_dir / job_id, job_id, status)
+    index.add("finished", "upload")  # Completed while the index was not told
+    (output_dir / "finished").mkdir()
+    write_status(output_dir / "finished", "finished", "completed", rows={"input": 5})
+
+    index.sync()  # The same server: its jobs are still live
+    assert index.get("crashed")["status"] == index.get("waiting")["status"] == "queued"
+
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir, ttl_s=60, max_bytes=0)  # Restarted
+    index.sync()
+    for job_id in ("crashed", "waiting"):
+        assert index.get(job_id)["status"] == "failed"
+        status = read_status(output_dir / job_id)
+        assert status["status"] == "failed" and status["status_code"] == 500
+    assert index.get("finished")["status"] == "completed"
+    assert sorted(index.collect(now=time.time() + 3600)) == ["crashed", "finished", "waiting"]
+
+
+def test_sync_keeps_other_processes_jobs(tmp_path, output_dir):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir, max_bytes=0)
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    gone = subprocess.Popen([sys.executable, "-c", "pass"])
+    gone.wait()
+    try:
+        for job_id, pid in (("live", other.pid), ("dead", gone.pid), ("legacy", None)):
+            (output_dir / job_id).mkdir()
+            index.add(job_id, "upload")
+            write_status(output_dir / job_id, job_id, "running")
+            with index._connect() as db:
+                db.execute(
+                    "UPDATE jobs SET owner_pid = ?, owner_boot = 'other' WHERE job_id = ?",
+                    (pid, job_id),
+                )
+
+        JobIndex(tmp_path / "jobs.sqlite3", output_dir).sync()
+        assert index.get("live")["status"] == "queued"
+        assert read_status(output_dir / "live")["status"] == "running"
+        assert index.get("dead")["status"] == index.get("legacy")["status"] == "failed"
+    finally:
+        other.kill()
+        other.wait()
+
+
+def test_cache_eviction_updates_index(tmp_path, output_dir):
+    index = JobIndex(tmp_path / "jobs.sqlite3", output_dir, max_bytes=0)
+    cache = ResultCache(tmp_path / "cache", output_dir, max_bytes=2500, delete_job=index.delete)
+    for i in range(3):
+        _job(index, output_dir, f"job{i}", size=1000)
+        cache.store(f"key{i}", f"job{i}")
+        time.sleep(0.01)
+
+    assert cache.lookup("key0") is None
+    assert not (output_dir / "job0").exists()
+    assert index.get("job0") is None
+    assert [r["job_id"] for r in index.list()[0]] == ["job2", "job1"]
+    assert index.total_bytes() == sum(index.get(j)["size_bytes"] for j in ("job1", "job2"))
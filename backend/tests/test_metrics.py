@@ -0,0 +1,68 @@
+"""Carbon-Trace: Metrics registry tests.
+
+Test Suite:
+  ✅ Counters and histograms render in the Prometheus text format
+  ✅ Histogram buckets are cumulative and end with +Inf
+  ✅ Finished jobs feed stage timings and row counts into the metrics
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api import metrics
+from api.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_render_text_format():
+    registry = Registry()
+    requests = registry.register(Counter("req_total", "Requests.", ("route",)))
+    rows = registry.register(Counter("rows_total", "Rows."))
+    gauge = registry.register(Gauge("in_flight", "Jobs.", function=lambda: 3))
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"x')
+
+    text = registry.render()
+    assert "# TYPE req_total counter" in text
+    assert 'req_total{route="/a"} 1\n' in text
+    assert 'req_total{route="/b\\"x"} 2\n' in text
+    assert "rows_total 0\n" in text  # unlabeled counters start at zero
+    assert "in_flight 3\n" in text
+    assert gauge.value() == 3
+
+
+def test_histogram_buckets():
+    hist = Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        hist.observe(value, stage="audit")
+
+    lines = hist.samples()
+    assert lines == [
+        'latency_seconds_bucket{stage="audit",le="0.1"} 2',
+        'latency_seconds_bucket{stage="audit",le="1"} 3',
+        'latency_seconds_bucket{stage="audit",le="+Inf"} 4',
+        'latency_seconds_sum{stage="audit"} 5.65',
+        'latency_seconds_count{stage="audit"} 4',
+    ]
+    assert hist.count(stage="audit") == 4
+
+
+def test_observe_job():
+    before_rows = metrics.ROWS_PROCESSED.value()
+    before_dropped = metrics.ROWS_DROPPED.value()
+    before_audit = metrics.STAGE_SECONDS.count(stage="audit")
+    before_done = metrics.JOBS.value(status="completed")
+
+    metrics.observe_job({"status": "running", "timings": {"clean": 1.0}})  # ignored
+    metrics.observe_job({
+        "status": "completed",
+        "timings": {"clean": 0.2, "audit": 0.5},
+        "rows": {"input": 120, "cleaned": 100, "dropped": 20},
+    })
+
+    assert metrics.ROWS_PROCESSED.value() == before_rows + 120
+    assert metrics.ROWS_DROPPED.value() == before_dropped + 20
+    assert metrics.STAGE_SECONDS.count(stage="audit") == before_audit + 1
+    assert metrics.JOBS.value(status="completed") == before_done + 1
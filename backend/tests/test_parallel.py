@@ -0,0 +1,77 @@
+"""Carbon-Trace: Sharded multi-process audit tests.
+
+The parallel audit must be indistinguishable from the serial one:
+  ✅ Same records (in input row order) and factories (in first-appearance order)
+  ✅ Same results with the closure and vectorized engines inside the shards
+  ✅ A blank or missing (NaN) factory_id is one factory in both paths
+  ✅ Every factory lands in exactly one shard, independent of row order
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.parallel import audit_parallel, shard_codes
+from src.runner import run_audit, run_audit_frame
+from test_vectorized import CONFIG_PATH, _write_random_csv
+
+
+def test_parallel_matches_serial(tmp_path):
+    input_csv = tmp_path / "random.csv"
+    _write_random_csv(input_csv, n_factories=1500, seed=5)
+    serial_factories, serial_records = run_audit(str(input_csv), CONFIG_PATH)
+
+    for engine in ("vectorized", "closure"):
+        factories, records = run_audit(
+            str(input_csv), CONFIG_PATH, engine=engine, workers=3
+        )
+        assert records == serial_records, engine
+        assert list(factories) == list(serial_factories), engine
+        for fid, expected in serial_factories.items():
+            actual = factories[fid]
+            assert actual.snapshot() == expected.snapshot(), (engine, fid)
+            assert actual.max_monthly_emissions == expected.max_monthly_emissions
+            assert actual.first_breach_month == expected.first_breach_month
+
+    print(f"✅ Parallel audit matches serial on {len(serial_records):,} records")
+
+
+def test_parallel_matches_serial_with_missing_ids(tmp_path):
+    input_csv = tmp_path / "random.csv"
+    _write_random_csv(input_csv, n_factories=200, seed=11)
+    df = pd.read_csv(input_csv, dtype={"factory_id": object})
+    df["factory_id"] = df["factory_id"].astype(object)
+    df.loc[df["factory_id"] == "FAC_00003", "factory_id"] = ""
+    df.loc[df["factory_id"] == "FAC_00007", "factory_id"] = np.nan
+    serial_factories, serial_records = run_audit_frame(df, CONFIG_PATH)
+    assert "" in serial_factories and any(pd.isna(f) for f in serial_factories)
+
+    for engine in ("vectorized", "closure"):
+        factories, records = audit_parallel(df, CONFIG_PATH, 3, engine=engine)
+        # NaN ≠ NaN, so compare as frames (equal NA masks) rather than dicts
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(records), pd.DataFrame(serial_records), obj=engine
+        )
+        assert len(factories) == len(serial_factories), engine
+        pd.testing.assert_index_equal(pd.Index(factories), pd.Index(serial_factories))
+        for actual, expected in zip(factories.values(), serial_factories.values()):
+            assert pd.Index([actual.factory_id]).equals(pd.Index([expected.factory_id]))
+            assert actual.total_emissions == expected.total_emissions, engine
+            assert actual.alerts_count == expected.alerts_count, engine
+
+
+def test_shard_assignment_is_stable():
+    ids = np.array([f"FAC_{i:05d}" for i in range(5000)], dtype=object)
+    shards = shard_codes(ids, 8)
+    assert shards.min() >= 0 and shards.max() < 8
+    assert len(set(shards.tolist())) == 8, "hash should spread factories over all shards"
+
+    # Same factory → same shard, whatever the row order or repetition
+    shuffled = np.random.default_rng(0).permutation(np.repeat(ids, 3))
+    lookup = dict(zip(ids.tolist(), shards.tolist()))
+    assert shard_codes(shuffled, 8).tolist() == [lookup[f] for f in shuffled]
@@ -0,0 +1,183 @@
+"""Carbon-Trace: What-if scenario engine tests.
+
+Test Suite:
+  ✅ The baseline reproduces the audit's totals and breaches per factory-year
+  ✅ A factory whose rows name several sectors takes its first row's, as in the audit
+  ✅ A missing factory_id is saved as its own factory, not aliased to another
+  ✅ A scenario equals re-auditing with the overridden config
+  ✅ Results do not depend on how scenarios are chunked
+  ✅ Invalid scenarios are rejected with ValueError
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import scenarios
+from src.config import get_config
+from src.data_gen import generate_monthly_data
+from src.runner import run_audit_frame, split_years
+from src.scenarios import (
+    aggregate_inputs, evaluate, load_inputs, run_scenarios, save_inputs, scenario_config,
+)
+from web_pipeline import clean_frame
+
+CONFIG_PATH = str(Path(__file__).resolve().parent.parent / "config" / "sectors.json")
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    """Two years of a 40-factory fleet: (cleaned frame, saved inputs path)."""
+    raw = tmp_path / "fleet.csv"
+    generate_monthly_data(str(raw), n_factories=40, years=2, seed=11)
+    df, _ = clean_frame(str(raw))
+    path = tmp_path / scenarios.INPUTS_FILE
+    save_inputs(df, str(path), get_config(CONFIG_PATH))
+    return df, str(path)
+
+
+def _audited(df, config_path):
+    """{(factory_id, year): (total, over cap)} from the audit engine."""
+    out = {}
+    for year, part in split_years(df):
+        factories, _ = run_audit_frame(part, config_path)
+        for fid, f in factories.items():
+            out[fid, year] = (f.total_emissions, f.is_over_cap)
+    return out
+
+
+def _evaluated(path, overrides):
+    """{(factory_id, year): (total, over cap)} for one scenario, per factory-year."""
+    inputs = load_inputs(path)
+    agg = aggregate_inputs(inputs)
+    config = scenario_config(inputs.config, overrides)
+    params = scenarios.parameter_matrices(agg, [config])
+    totals = scenarios.factory_totals(agg, params)[0]
+    caps = params["cap"][0, agg.sector_codes]
+    return {
+        (fid, int(year)): (total, total > cap)
+        for fid, year, total, cap in zip(agg.factory_ids, agg.years, totals, caps)
+    }
+
+
+def _assert_same(expected, actual):
+    assert expected.keys() == actual.keys()
+    for key, (total, over) in expected.items():
+        assert actual[key][0] == pytest.approx(total, rel=1e-9), key
+        assert actual[key][1] == over, key
+
+
+def test_baseline_matches_audit(fleet):
+    df, path = fleet
+    _assert_same(_audited(df, CONFIG_PATH), _evaluated(path, {}))
+
+
+def test_mixed_sector_factory(fleet, tmp_path):
+    df, _ = fleet
+    df = df.copy()
+    fid = df["factory_id"].iloc[0]
+    rows = df.index[df["factory_id"] == fid]
+    sector = df.loc[rows[0], "sector"]
+    other = next(s for s in df["sector"].unique() if s != sector)
+    # Its first row per year keeps the sector, the rest name another one
+    df.loc[rows[1:], "sector"] = other
+    df.loc[df.index[(df["factory_id"] == fid) & (df["month"] == 1)], "sector"] = sector
+    path = tmp_path / "mixed_sector.npz"
+    save_inputs(df, str(path), get_config(CONFIG_PATH))
+    _assert_same(_audited(df, CONFIG_PATH), _evaluated(str(path), {}))
+
+
+def test_missing_factory_id(fleet, tmp_path):
+    df, _ = fleet
+    df = df.copy()
+    df.loc[df["factory_id"] == df["factory_id"].iloc[-1], "factory_id"] = np.nan
+    path = tmp_path / "missing_id.npz"
+    save_inputs(df, str(path), get_config(CONFIG_PATH))
+
+    inputs = load_inputs(str(path))
+    assert (inputs.factory_codes >= 0).all()
+    assert inputs.factory_ids[0] == ""
+    expected = _audited(df.fillna({"factory_id": ""}), CONFIG_PATH)
+    _assert_same(expected, _evaluated(str(path), {}))
+
+
+def test_scenario_matches_reaudit(fleet, tmp_path):
+    df, path = fleet
+    overrides = {
+        "sectors": {
+            "Steel": {"carbon_cap_kg": 81_000_000, "emission_factor": {"energy_per_mwh": 900.0}},
+            "Textile": {"carbon_cap_kg": 5_000_000},
+        },
+        "energy_source_multipliers": {"coal": 1.4, "grid": 0.9},
+    }
+    raw = json.loads(Path(CONFIG_PATH).read_text())
+    raw["sectors"]["Steel"]["carbon_cap_kg"] = 81_000_000
+    raw["sectors"]["Steel"]["emission_factor"]["energy_per_mwh"] = 900.0
+    raw["sectors"]["Textile"]["carbon_cap_kg"] = 5_000_000
+    raw["energy_source_multipliers"].update(coal=1.4, grid=0.9)
+    changed = tmp_path / "changed.json"
+    changed.write_text(json.dumps(raw))
+
+    _assert_same(_audited(df, str(changed)), _evaluated(path, overrides))
+
+    result = run_scenarios(path, [{"name": "tighter", **overrides}])
+    base, scenario = result["baseline"], result["scenarios"][0]
+    assert result["factory_years"] == 80
+    assert scenario["name"] == "tighter"
+    assert list(scenario["years"]) == ["2026", "2027"]
+    assert scenario["factories_over_cap"] == base["factories_over_cap"] + (
+        scenario["newly_over_cap"] - scenario["back_under_cap"]
+    )
+    assert scenario["delta_kg"] == pytest.approx(
+        scenario["total_emissions_kg"] - base["total_emissions_kg"], abs=0.01
+    )
+    assert sum(s["factories_over_cap"] for s in scenario["sectors"].values()) == (
+        scenario["factories_over_cap"]
+    )
+
+
+def test_chunking(fleet, monkeypatch):
+    _, path = fleet
+    batch = [
+        {"energy_source_multipliers": {"coal": 1.0 + i / 10}, "sectors": {"Steel": {"carbon_cap_kg": 6e7 + i * 1e6}}}
+        for i in range(25)
+    ]
+    whole = run_scenarios(path, batch)
+    monkeypatch.setattr(scenarios, "CHUNK_CELLS", 100)  # one or two scenarios per chunk
+    assert run_scenarios(path, batch) == whole
+
+    agg = aggregate_inputs(load_inputs(path))
+    configs = [scenario_config(load_inputs(path).config, s) for s in batch]
+    r = evaluate(agg, configs)
+    assert np.all(np.diff(r["total"]) > 0), "totals grow with the coal multiplier"
+
+
+@pytest.mark.parametrize("scenario", [
+    {"sectors": {"Steel": {"emission_factor": {"per_widget": 1.0}}}},
+    {"sectors": {"Steel": {"carbon_cap_kg": -1}}},
+    {"sectors": {"Steel": {"carbon_cap": 1}}},
+    {"energy_source_multipliers": {"coal": "high"}},
+    {"energy_source_multipliers": {"coal": float("nan")}},
+    {"sectors": ["Steel"]},
+    {"discount": 0.5},
+    "coal=1.4",
+])
+def test_invalid_scenarios(fleet, scenario):
+    _, path = fleet
+    with pytest.raises(ValueError):
+        run_scenarios(path, [scenario])
+
+
+def test_scenario_count_limit(fleet, monkeypatch):
+    _, path = fleet
+    with pytest.raises(ValueError):
+        run_scenarios(path, [])
+    monkeypatch.setattr(scenarios, "MAX_SCENARIOS", 2)
+    with pytest.raises(ValueError):
+        run_scenarios(path, [{}, {}, {}])
@@ -0,0 +1,124 @@
+"""Carbon-Trace: Monte Carlo uncertainty tests.
+
+Test Suite:
+  ✅ Without any σ every draw is the point estimate
+  ✅ Bands match the analytical normal distribution of a linear total
+  ✅ Draws are reproducible with a seed and independent of chunking
+  ✅ Invalid σ specs and options are rejected with ValueError
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import uncertainty
+from src.config import get_config
+from src.data_gen import generate_monthly_data
+from src.scenarios import INPUTS_FILE, aggregate_inputs, load_inputs, save_inputs
+from src.uncertainty import run_uncertainty
+from web_pipeline import clean_frame
+
+CONFIG_PATH = str(Path(__file__).resolve().parent.parent / "config" / "sectors.json")
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    """Saved inputs of a 60-factory fleet."""
+    raw = tmp_path / "fleet.csv"
+    generate_monthly_data(str(raw), n_factories=60, seed=3)
+    df, _ = clean_frame(str(raw))
+    path = tmp_path / INPUTS_FILE
+    save_inputs(df, str(path), get_config(CONFIG_PATH))
+    return str(path)
+
+
+def test_zero_sigma_is_point_estimate(inputs):
+    result = run_uncertainty(inputs, {}, draws=50, seed=1)
+    assert result["sampled"] == 0
+    for row in result["factories"]:
+        assert row["p5_kg"] == row["p50_kg"] == row["p95_kg"] == row["point_kg"]
+        assert row["mean_kg"] == pytest.approx(row["point_kg"])
+        assert row["p_over_cap"] in (0.0, 1.0)
+    fleet = result["fleet"]
+    assert fleet["total_emissions_kg"]["p5"] == pytest.approx(fleet["total_emissions_kg"]["point"])
+    assert fleet["factories_over_cap"]["mean"] == fleet["factories_over_cap"]["point"]
+    assert sum(r["p_over_cap"] for r in result["factories"]) == fleet["factories_over_cap"]["point"]
+
+
+def test_bands_match_normal_distribution(inputs):
+    sd = 40.0
+    result = run_uncertainty(
+        inputs, {"sectors": {"Steel": {"emission_factor": {"energy_per_mwh": sd}}}},
+        draws=20_000, percentiles=[2.5, 97.5], seed=7,
+    )
+    assert result["sampled"] == 1
+
+    # A Steel factory's total is point + (Fe − 820) · weighted MWh, so its
+    # 95% band is ±1.96 σ · weighted MWh
+    agg = aggregate_inputs(load_inputs(inputs))
+    multipliers = get_config(CONFIG_PATH).energy_multipliers
+    weights = np.array([multipliers.get(s, 1.0) if s else 1.0 for s in agg.sources])
+    weighted_mwh = dict(zip(agg.factory_ids, agg.energy_mwh @ weights))
+
+    steel = [r for r in result["factories"] if r["sector"] == "Steel"]
+    assert steel
+    for row in steel:
+        half_width = (row["p97.5_kg"] - row["p2.5_kg"]) / 2
+        assert half_width == pytest.approx(1.96 * sd * weighted_mwh[row["factory_id"]], rel=0.05)
+        assert row["mean_kg"] == pytest.approx(row["point_kg"], rel=1e-3)
+        assert 0.0 <= row["p_over_cap"] <= 1.0
+    for row in result["factories"]:
+        if row["sector"] != "Steel":
+            assert row["p2.5_kg"] == row["p97.5_kg"] == row["point_kg"]
+
+    sectors = result["sectors"]
+    assert sectors["Steel"]["total_emissions_kg"]["p2.5"] < sectors["Steel"]["total_emissions_kg"]["p97.5"]
+    assert sectors["Textile"]["total_emissions_kg"]["p2.5"] == pytest.approx(
+        sectors["Textile"]["total_emissions_kg"]["point"]
+    )
+
+
+def test_seed_and_chunking(inputs, monkeypatch):
+    sigma = {
+        "sectors": {"Textile": {"emission_factor": {"production_per_ton": 30.0}}},
+        "energy_source_multipliers": {"coal": 0.1, "grid": 0.05},
+    }
+    first = run_uncertainty(inputs, sigma, draws=500, seed=11)
+    assert run_uncertainty(inputs, sigma, draws=500, seed=11) == first
+    assert run_uncertainty(inputs, sigma, draws=500, seed=12) != first
+
+    monkeypatch.setattr(uncertainty, "CHUNK_CELLS", 1000)  # two factories per chunk
+    chunked = run_uncertainty(inputs, sigma, draws=500, seed=11)
+    for sector, stats in first["sectors"].items():
+        for key in ("total_emissions_kg", "factories_over_cap"):
+            assert chunked["sectors"][sector][key] == pytest.approx(stats[key])
+    for a, b in zip(chunked["factories"], first["factories"]):
+        assert a["factory_id"] == b["factory_id"]
+        assert a["p95_kg"] == pytest.approx(b["p95_kg"])
+        assert a["p_over_cap"] == b["p_over_cap"]
+
+    unseeded = run_uncertainty(inputs, sigma, draws=10)
+    assert isinstance(unseeded["seed"], int)
+
+
+@pytest.mark.parametrize("sigma, options", [
+    ({"sectors": {"Steel": {"emission_factor": {"per_widget": 1.0}}}}, {}),
+    ({"sectors": {"Steel": {"carbon_cap_kg": 1.0}}}, {}),
+    ({"energy_source_multipliers": {"coal": -0.1}}, {}),
+    ({"factors": {}}, {}),
+    ([], {}),
+    ({}, {"draws": 0}),
+    ({}, {"draws": uncertainty.MAX_DRAWS + 1}),
+    ({}, {"draws": 10.5}),
+    ({}, {"percentiles": [101]}),
+    ({}, {"percentiles": []}),
+    ({}, {"seed": -1}),
+])
+def test_invalid_specs(inputs, sigma, options):
+    with pytest.raises(ValueError):
+        run_uncertainty(inputs, sigma, **options)
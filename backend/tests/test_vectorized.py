@@ -0,0 +1,260 @@
+"""Carbon-Trace: Differential tests for the vectorized audit engine.
+
+The vectorized engine must reproduce the closure path exactly:
+  ✅ Same per-month records (values, statuses, alert text, order)
+  ✅ Same Industry aggregates (totals, alert counts, over-cap flags)
+  ✅ Closures resume correctly after a vectorized batch
+  ✅ Vectorized rounding matches Python's round() bit for bit
+  ✅ Columnar factory snapshots match Industry.snapshot()
+  ✅ Both engines report each factory's first ALERT month to on_alert
+  ✅ Cleaned CSVs parse identically with and without pyarrow
+  ✅ A blank factory_id is its own factory in memory, as in the closure path
+  ✅ A two-year cleaned CSV is audited per year, like a split cleaned frame
+"""
+
+import csv
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.runner import run_audit
+
+CONFIG_PATH = str(Path(__file__).resolve().parent.parent / "config" / "sectors.json")
+
+SECTORS = ["Steel", "Textile", "Electronics", "Cement"]  # Cement → unknown sector
+SOURCES = ["coal", "natural_gas", "grid", "renewable", "nuclear", "diesel", ""]
+
+
+def _write_random_csv(path: Path, n_factories: int, seed: int) -> None:
+    """Write a shuffled multi-factory CSV with interleaved rows."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_factories):
+        sector = rng.choice(SECTORS)
+        scale = rng.uniform(0.1, 3.0)
+        for month in range(1, rng.randint(1, 12) + 1):
+            rows.append({
+                "factory_id": f"FAC_{i:05d}",
+                "sector": sector,
+                "month": month,
+                "monthly_production_tons": round(rng.uniform(0, 2000) * scale, rng.randint(0, 6)),
+                "energy_used_mwh": rng.uniform(0, 7000) * scale,
+                "energy_source_type": rng.choice(SOURCES),
+                "raw_material_weight_tons": rng.choice([0.0, rng.uniform(0, 3000)]),
+            })
+    rng.shuffle(rows)
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_vectorized_matches_closure(tmp_path):
+    """Records and aggregates must be identical on a large random fleet."""
+    input_csv = tmp_path / "random.csv"
+    _write_random_csv(input_csv, n_factories=3000, seed=7)
+
+    closure_factories, closure_records = run_audit(str(input_csv), CONFIG_PATH)
+    vector_factories, vector_records = run_audit(
+        str(input_csv), CONFIG_PATH, engine="vectorized"
+    )
+
+    assert vector_records == closure_records
+    assert list(vector_factories) == list(closure_factories)
+    assert any(r["status"] == "ALERT" for r in closure_records), "fixture should breach caps"
+
+    for fid, expected in closure_factories.items():
+        actual = vector_factories[fid]
+        assert actual.sector == expected.sector
+        assert actual.total_emissions == expected.total_emissions
+        assert actual.alerts_count == expected.alerts_count
+        assert actual.is_over_cap == expected.is_over_cap
+        assert actual.history == expected.history
+
+    print(f"✅ Vectorized engine matches closure path on {len(closure_records):,} records")
+
+
+def test_vectorized_industry_resumes(tmp_path):
+    """An Industry built by the engine keeps accumulating from its total."""
+    input_csv = tmp_path / "random.csv"
+    _write_random_csv(input_csv, n_factories=20, seed=11)
+
+    closure_factories, _ = run_audit(str(input_csv), CONFIG_PATH)
+    vector_factories, _ = run_audit(str(input_csv), CONFIG_PATH, engine="vectorized")
+
+    for fid in closure_factories:
+        expected = closure_factories[fid].record_month(13, 500.0, 900.0, "coal", 10.0)
+        actual = vector_factories[fid].record_month(13, 500.0, 900.0, "coal", 10.0)
+        assert actual == expected
+
+
+def test_in_memory_handoff_matches_csv_roundtrip(tmp_path):
+    """clean_frame → run_audit_frame equals clean_csv → run_audit."""
+    from web_pipeline import clean_csv, clean_frame
+    from src.runner import run_audit_frame
+
+    raw_csv = tmp_path / "raw.csv"
+    cleaned_csv = tmp_path / "cleaned.csv"
+    _write_random_csv(raw_csv, n_factories=500, seed=3)
+
+    _, csv_report = clean_csv(str(raw_csv), str(cleaned_csv))
+    _, csv_records = run_audit(str(cleaned_csv), CONFIG_PATH)
+
+    df, frame_report = clean_frame(str(raw_csv))
+    _, frame_records = run_audit_frame(df, CONFIG_PATH)
+
+    assert frame_report == csv_report
+    assert frame_records == csv_records
+
+
+def test_read_audit_csv_parsers_agree(tmp_path, monkeypatch):
+    """pyarrow and round-trip pandas parse a cleaned CSV identically."""
+    from src import vectorized
+    from src.vectorized import read_audit_csv
+
+    if vectorized.pa is None:
+        pytest.skip("pyarrow not installed")
+    input_csv = tmp_path / "random.csv"
+    _write_random_csv(input_csv, n_factories=500, seed=9)
+
+    arrow_df = read_audit_csv(str(input_csv))
+    monkeypatch.setattr(vectorized, "pa", None)
+    pandas_df = read_audit_csv(str(input_csv))
+
+    pd.testing.assert_frame_equal(arrow_df, pandas_df, check_categorical=False)
+    with open(input_csv, newline="", encoding="utf-8") as f:
+        expected = [float(row["energy_used_mwh"]) for row in csv.DictReader(f)]
+    assert arrow_df["energy_used_mwh"].tolist() == expected
+    assert arrow_df["sector"].dtype == "category"
+
+
+def test_blank_factory_id(tmp_path):
+    """clean_frame → run_audit_frame audits a blank id like clean_csv → run_audit."""
+    from web_pipeline import clean_csv, clean_frame
+    from src.runner import run_audit_frame
+
+    raw_csv = tmp_path / "raw.csv"
+    cleaned_csv = tmp_path / "cleaned.csv"
+    raw_csv.write_text(
+        "factory_id,sector,month,monthly_production_tons,energy_used_mwh,"
+        "energy_source_type,raw_material_weight_tons\n"
+        "FAC_A,Steel,1,10,10,coal,1\n"
+        "FAC_B,Textile,1,10,10,coal,1\n"
+        ",Steel,2,999999,10,coal,1\n",
+        encoding="utf-8",
+    )
+
+    _, csv_report = clean_csv(str(raw_csv), str(cleaned_csv))
+    csv_factories, csv_records = run_audit(str(cleaned_csv), CONFIG_PATH)
+    df, frame_report = clean_frame(str(raw_csv))
+    frame_factories, frame_records = run_audit_frame(df, CONFIG_PATH)
+
+    assert frame_report == csv_report
+    assert frame_report["factories_found"] == 3
+    assert frame_records == csv_records
+    assert list(frame_factories) == list(csv_factories) == ["", "FAC_A", "FAC_B"]
+    for fid, expected in csv_factories.items():
+        assert frame_factories[fid].total_emissions == expected.total_emissions
+        assert frame_factories[fid].alerts_count == expected.alerts_count
+    assert frame_factories["FAC_B"].alerts_count == 0
+
+
+def test_alert_callbacks_match(tmp_path):
+    """The closure path reports a breach as it happens, the batch once audited."""
+    input_csv = tmp_path / "random.csv"
+    _write_random_csv(input_csv, n_factories=300, seed=5)
+
+    alerts = {"closure": [], "vectorized": []}
+    for engine, seen in alerts.items():
+        factories, _ = run_audit(
+            str(input_csv), CONFIG_PATH, engine=engine,
+            on_alert=lambda f, record, seen=seen: seen.append((f.factory_id, record)),
+        )
+    breached = {fid for fid, f in factories.items() if f.is_over_cap}
+
+    closure, vectorized = alerts["closure"], alerts["vectorized"]
+    assert breached and len(closure) == len(breached), "one alert per breached factory"
+    assert dict(closure) == dict(vectorized)
+    for fid, record in closure:
+        assert record["status"] == "ALERT"
+        assert record["month"] == factories[fid].first_breach_month
+        assert record == factories[fid].first_alert
+    months = [record["month"] for _, record in vectorized]
+    assert months == sorted(months), "batch alerts come in breach-month order"
+
+
+def test_round2_matches_round():
+    """Vectorized 2-decimal rounding equals round(v, 2), including ties."""
+    import numpy as np
+    from src.vectorized import round2
+
+    rng = np.random.default_rng(3)
+    values = np.concatenate([
+        rng.uniform(-1e7, 1e7, 200_000),
+        np.arange(-20_000, 20_000) / 1000.0,   # many exact and near ties
+        np.arange(0, 20_000) / 200.0,
+        [0.125, 0.375, 2.675, 1.005, -0.0, 1e300, 5e-324, float("inf")],
+    ])
+    expected = np.array([round(v, 2) for v in values.tolist()])
+    assert np.array_equal(round2(values).view(np.int64), expected.view(np.int64))
+
+
+def test_columnar_snapshots_match_industry(tmp_path):
+    """`audit_columns` rebuilds the same factories as `audit_frame`."""
+    from src.config import get_config
+    from src.models import Industry
+    from src.vectorized import audit_columns, audit_frame, read_audit_csv
+
+    input_csv = tmp_path / "random.csv"
+    _write_random_csv(input_csv, n_factories=500, seed=13)
+    df = read_audit_csv(str(input_csv))
+    config = get_config(CONFIG_PATH)
+
+    factories, _ = audit_frame(df, config)
+    columns = audit_columns(df, config)
+    assert columns.factory_ids == list(factories)
+
+    for packed in (columns, columns.as_arrays()):
+        for k, fid in enumerate(packed.factory_ids):
+            cfg = config.sector(packed.sectors[k])
+            restored = Industry.from_snapshot(
+                packed.snapshot(k), cfg.emission_factor, cfg.carbon_cap_kg,
+                config.energy_multipliers,
+            )
+            assert restored.snapshot() == factories[fid].snapshot()
+
+
+def test_multi_year_csv(tmp_path):
+    """run_audit_years restarts every year's totals, as split_years → run_audit_frame."""
+    from src.data_gen import generate_monthly_data
+    from src.runner import run_audit_frame, run_audit_years, split_years
+    from web_pipeline import clean_csv, clean_frame
+
+    raw_csv = tmp_path / "raw.csv"
+    cleaned_csv = tmp_path / "cleaned.csv"
+    generate_monthly_data(str(raw_csv), n_factories=30, years=2, seed=8)
+    clean_csv(str(raw_csv), str(cleaned_csv))
+    df, _ = clean_frame(str(raw_csv))
+    expected = {year: run_audit_frame(part, CONFIG_PATH) for year, part in split_years(df)}
+    assert list(expected) == [2026, 2027]
+
+    for engine, workers in (("closure", None), ("vectorized", None), ("vectorized", 2)):
+        audits = run_audit_years(str(cleaned_csv), CONFIG_PATH, engine=engine, workers=workers)
+        assert list(audits) == list(expected), engine
+        for year, (factories, records) in audits.items():
+            expected_factories, expected_records = expected[year]
+            assert records == expected_records, (engine, year)
+            assert list(factories) == list(expected_factories)
+            for fid, factory in factories.items():
+                assert factory.total_emissions == expected_factories[fid].total_emissions
+                assert factory.months_recorded == 12
+
+    with pytest.raises(ValueError, match="run_audit_years"):
+        run_audit(str(cleaned_csv), CONFIG_PATH)
@@ -0,0 +1,136 @@
+"""Carbon-Trace: CSV cleaning pipeline tests.
+
+Test Suite:
+  ✅ Chunked (out-of-core) cleaning writes the same rows as the in-memory path
+  ✅ Chunked cleaning produces an identical cleaning report
+  ✅ Multi-pass merges (more runs than MERGE_FAN_IN) give the same result
+  ✅ A year column keys rows by (factory_id, year, month) in both paths
+  ✅ pyarrow and pandas parsers give identical rows in the declared dtypes
+  ✅ Blank and NA factory_ids are the same factory ("") in both paths
+"""
+
+import csv
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Ensure project root is on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import web_pipeline
+from web_pipeline import clean_csv
+
+HEADER = [
+    "Factory ID", "sector", "Month", "monthly_production_tons",
+    "energy_used_mwh", "energy_source_type", "raw_material_weight_tons",
+]
+
+
+def _write_dirty_csv(
+    path: Path, n_rows: int, seed: int, with_year: bool = False, blank_ids: bool = False
+) -> None:
+    """Messy input: bad sectors, variants, non-numerics, negatives, duplicates."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER + (["Year"] if with_year else []))
+        for _ in range(n_rows):
+            year = [rng.choice(["2025", " 2026", "2026.0", "x"])] if with_year else []
+            factory_id = rng.choice(["FAC_", " fac_", "007_"]) + str(rng.randint(0, 60))
+            if blank_ids and rng.random() < 0.05:
+                factory_id = rng.choice(["", "  ", "NA", "nan"])
+            writer.writerow([
+                factory_id,
+                rng.choice(["steel", "Steel ", " TEXTILE", "Electronics", "Cement"]),
+                rng.choice(["1", "2", "7", "13", "0", "x", "5.5", ""]),
+                rng.choice(["100", "-5", "1e3", "abc", "12.25"]),
+                str(rng.uniform(-10, 1000)),
+                rng.choice(["Coal", "solar", "", "gas", "Natural Gas", "unknown"]),
+                rng.choice(["", "3", "1.5"]),
+                *year,
+            ])
+
+
+def test_chunked_matches_in_memory(tmp_path):
+    raw = tmp_path / "dirty.csv"
+    _write_dirty_csv(raw, n_rows=5000, seed=1)
+
+    _, expected_report = clean_csv(str(raw), str(tmp_path / "memory.csv"))
+    _, chunked_report = clean_csv(str(raw), str(tmp_path / "chunked.csv"), chunksize=333)
+
+    assert chunked_report == expected_report
+    assert (tmp_path / "chunked.csv").read_bytes() == (tmp_path / "memory.csv").read_bytes()
+    assert "duplicate" in " ".join(expected_report["actions"]), "fixture should contain duplicates"
+
+
+def test_chunked_multi_pass_merge(tmp_path, monkeypatch):
+    raw = tmp_path / "dirty.csv"
+    _write_dirty_csv(raw, n_rows=3000, seed=2)
+    monkeypatch.setattr(web_pipeline, "MERGE_FAN_IN", 3)
+
+    _, expected_report = clean_csv(str(raw), str(tmp_path / "memory.csv"))
+    _, chunked_report = clean_csv(str(raw), str(tmp_path / "chunked.csv"), chunksize=100)
+
+    assert chunked_report == expected_report
+    assert (tmp_path / "chunked.csv").read_bytes() == (tmp_path / "memory.csv").read_bytes()
+
+
+def test_year_column(tmp_path):
+    raw = tmp_path / "dirty.csv"
+    _write_dirty_csv(raw, n_rows=4000, seed=3, with_year=True)
+
+    df, expected_report = web_pipeline.clean_frame(str(raw))
+    _, chunked_report = clean_csv(str(raw), str(tmp_path / "chunked.csv"), chunksize=250)
+    _, memory_report = clean_csv(str(raw), str(tmp_path / "memory.csv"))
+
+    assert list(df.columns) == web_pipeline.REQUIRED_COLUMNS + ["year"]
+    assert expected_report["years_found"] == [2025, 2026]
+    assert chunked_report == memory_report == expected_report
+    assert (tmp_path / "chunked.csv").read_bytes() == (tmp_path / "memory.csv").read_bytes()
+
+    # The same factory-month in two years is two rows, not a duplicate
+    assert not df.duplicated(["factory_id", "year", "month"]).any()
+    assert df.duplicated(["factory_id", "month"]).any()
+
+
+def test_parsers_agree(tmp_path, monkeypatch):
+    if web_pipeline.pa is None:
+        pytest.skip("pyarrow not installed")
+    raw = tmp_path / "dirty.csv"
+    _write_dirty_csv(raw, n_rows=4000, seed=4, with_year=True)
+
+    arrow_df, arrow_report = web_pipeline.clean_frame(str(raw))
+    monkeypatch.setattr(web_pipeline, "pa", None)
+    pandas_df, pandas_report = web_pipeline.clean_frame(str(raw))
+
+    assert arrow_report == pandas_report
+    pd.testing.assert_frame_equal(arrow_df, pandas_df)
+    assert arrow_df["sector"].dtype == web_pipeline.SECTOR_DTYPE
+    assert arrow_df["energy_source_type"].dtype == web_pipeline.ENERGY_SOURCE_DTYPE
+    assert arrow_df["month"].dtype == "int8"
+    assert arrow_df["energy_used_mwh"].dtype == "float64"
+    # "solar" and blank sources were normalized via their category levels
+    assert set(arrow_df["energy_source_type"]) == {"coal", "renewable", "grid", "natural_gas"}
+
+
+@pytest.mark.parametrize("arrow", [True, False])
+def test_blank_ids(tmp_path, monkeypatch, arrow):
+    if arrow and web_pipeline.pa is None:
+        pytest.skip("pyarrow not installed")
+    if not arrow:
+        monkeypatch.setattr(web_pipeline, "pa", None)
+    raw = tmp_path / "dirty.csv"
+    _write_dirty_csv(raw, n_rows=6000, seed=5, blank_ids=True)
+
+    df, frame_report = web_pipeline.clean_frame(str(raw))
+    _, memory_report = clean_csv(str(raw), str(tmp_path / "memory.csv"))
+    _, chunked_report = clean_csv(str(raw), str(tmp_path / "chunked.csv"), chunksize=400)
+
+    assert chunked_report == memory_report == frame_report
+    assert (tmp_path / "chunked.csv").read_bytes() == (tmp_path / "memory.csv").read_bytes()
+    assert not df["factory_id"].isna().any()
+    assert (df["factory_id"] == "").any()
+    assert frame_report["factories_found"] == df["factory_id"].nunique()
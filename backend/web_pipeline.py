@@ -1,12 +1,34 @@
 """Carbon-Trace: CSV data cleaning and validation pipeline.
 
 Receives a raw uploaded CSV, validates schema, cleans bad rows,
-normalizes values, and writes a clean CSV ready for the audit engine.
+normalizes values, and hands a clean table to the audit engine — either
+in memory (`clean_frame`) or as a clean CSV on disk (`clean_csv`).
+
+An optional ``year`` column lets one file hold several calendar years:
+rows are then keyed by (factory_id, year, month) and the cleaned table
+keeps the column, so the audit can reset caps per year.
+
+Uploads are parsed against a declared schema (`RAW_TEXT_DTYPES`):
+``sector`` and ``energy_source_type`` are read straight into categories
+and normalized once per distinct value, not once per row. Whole files
+are parsed with pyarrow when it is installed (optional), else with
+pandas' C parser; both parse floats exactly like Python's ``float()``,
+so the cleaned rows do not depend on which one ran.
 """
 
+import csv
+import heapq
+import os
+import tempfile
 import pandas as pd
 from pathlib import Path
-from typing import Tuple
+from typing import IO, Callable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
 
 # ── Required columns and their expected types ──
 REQUIRED_COLUMNS = [
@@ -19,13 +41,138 @@ REQUIRED_COLUMNS = [
     "raw_material_weight_tons",
 ]
 
+# ── Optional calendar year (files without it are a single year) ──
+YEAR_COLUMN = "year"
+
 VALID_SECTORS = {"Steel", "Textile", "Electronics"}
 VALID_ENERGY_SOURCES = {"coal", "natural_gas", "grid", "renewable", "nuclear"}
 
+# ── Declared ingestion schema ──
+# Raw text columns are parsed as these dtypes; numeric columns are inferred
+# and coerced in step 5, since raw uploads may hold junk there
+RAW_TEXT_DTYPES = {
+    "factory_id": "str",
+    "sector": "category",
+    "energy_source_type": "category",
+}
+# Dtypes of the cleaned table (floats stay float64: emissions must match
+# the closure path bit for bit)
+SECTOR_DTYPE = pd.CategoricalDtype(sorted(VALID_SECTORS))
+ENERGY_SOURCE_DTYPE = pd.CategoricalDtype(sorted(VALID_ENERGY_SOURCES))
+MONTH_DTYPE = "int8"
+CLEANED_DTYPES = {
+    "sector": SECTOR_DTYPE,
+    "month": MONTH_DTYPE,
+    "energy_source_type": ENERGY_SOURCE_DTYPE,
+}
+
+# pandas' default NA strings, so both parsers read the same missing values.
+# Missing text is then cleaned alike on every path: a factory_id becomes ""
+# (step 2), a sector or energy source the level "nan" (steps 3–4)
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+]
+
+
+def normalize_column(name: str) -> str:
+    """Normalize a header name: strip, lowercase, spaces → underscores."""
+    return str(name).strip().lower().replace(" ", "_")
+
 
-def clean_csv(input_path: str, output_path: str) -> Tuple[str, dict]:
+def validate_columns(columns) -> None:
     """
-    Clean and validate an uploaded production CSV.
+    Check that normalized ``columns`` include every `REQUIRED_COLUMNS` entry.
+
+    Raises
+    ------
+    ValueError
+        If any required column is missing.
+    """
+    present = set(columns)
+    missing_cols = [c for c in REQUIRED_COLUMNS if c not in present]
+    if missing_cols:
+        raise ValueError(
+            f"Missing required columns: {missing_cols}. "
+            f"Expected: {REQUIRED_COLUMNS}"
+        )
+
+
+def validate_header(header_line: str) -> None:
+    """
+    Validate a raw CSV header line before the rest of the file is read.
+
+    Raises
+    ------
+    ValueError
+        If any required column is missing.
+    """
+    fields = next(csv.reader([header_line]), [])
+    validate_columns(normalize_column(c) for c in fields)
+
+
+def clean_csv(
+    input_path: str,
+    output_path: str,
+    chunksize: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Tuple[str, dict]:
+    """
+    Clean and validate an uploaded production CSV and write the result.
+
+    See `clean_frame` for the cleaning steps; this additionally writes the
+    cleaned rows to ``output_path``.
+
+    Parameters
+    ----------
+    input_path : str
+        Path to the raw uploaded CSV.
+    output_path : str
+        Path where the cleaned CSV will be written.
+    chunksize : int, optional
+        Clean out-of-core, ``chunksize`` rows at a time. Each chunk is
+        normalized and filtered, then spilled to disk as a sorted run; runs
+        are k-way merged to deduplicate and sort. Peak memory is bounded by
+        the chunk size, and the rows and report match the in-memory path.
+    progress : callable, optional
+        Called with the number of input rows read so far after each chunk
+        (once, with all rows, when cleaning in memory).
+
+    Returns
+    -------
+    tuple[str, dict]
+        (output_path, cleaning_report)
+        The report dict contains row counts and actions taken.
+
+    Raises
+    ------
+    ValueError
+        If required columns are missing or the file is empty.
+    """
+    if chunksize:
+        return output_path, _clean_csv_chunked(input_path, output_path, chunksize, progress)
+
+    df, report = clean_frame(input_path)
+    if progress is not None:
+        progress(report["original_rows"])
+    df.to_csv(output_path, index=False)
+    return output_path, report
+
+
+def output_columns(columns) -> List[str]:
+    """Columns of the cleaned table: `REQUIRED_COLUMNS`, plus ``year`` if present."""
+    return REQUIRED_COLUMNS + ([YEAR_COLUMN] if YEAR_COLUMN in set(columns) else [])
+
+
+def key_columns(columns) -> List[str]:
+    """Columns identifying one factory-month: factory_id, [year,] month."""
+    return ["factory_id"] + ([YEAR_COLUMN] if YEAR_COLUMN in set(columns) else []) + ["month"]
+
+
+def clean_frame(input_path: Union[str, IO[bytes]]) -> Tuple[pd.DataFrame, dict]:
+    """
+    Clean and validate an uploaded production CSV in memory.
 
     Steps:
         1. Read CSV and validate required columns exist
@@ -33,24 +180,27 @@ def clean_csv(input_path: str, output_path: str) -> Tuple[str, dict]:
         3. Normalize sector names (title-case)
         4. Normalize energy_source_type (lowercase)
         5. Coerce numeric columns; drop rows with NaN in critical fields
+           (including ``year``, when the file has that column)
         6. Clamp month to 1–12
         7. Drop negative production/energy values
-        8. Drop duplicate (factory_id, month) pairs — keep last
-        9. Sort by factory_id, month
-       10. Write cleaned CSV
+        8. Drop duplicate (factory_id, [year,] month) rows — keep last
+        9. Sort by factory_id, [year,] month
 
     Parameters
     ----------
-    input_path : str
-        Path to the raw uploaded CSV.
-    output_path : str
-        Path where the cleaned CSV will be written.
+    input_path : str or binary file object
+        Path to the raw uploaded CSV, or a seekable buffer holding it (e.g.
+        an archive member, see `api.archive`).
 
     Returns
     -------
-    tuple[str, dict]
-        (output_path, cleaning_report)
-        The report dict contains row counts and actions taken.
+    tuple[pandas.DataFrame, dict]
+        (cleaned_frame, cleaning_report)
+        The frame holds exactly `output_columns` (`REQUIRED_COLUMNS`, plus
+        an int ``year`` when the file has one): ``sector`` and
+        ``energy_source_type`` as `SECTOR_DTYPE` / `ENERGY_SOURCE_DTYPE`
+        categories, ``month`` as int8 and the quantities as float64, ready for
+        `src.runner.split_years` / `src.vectorized.audit_frame`.
 
     Raises
     ------
@@ -58,109 +208,353 @@ def clean_csv(input_path: str, output_path: str) -> Tuple[str, dict]:
         If required columns are missing or the file is empty.
     """
     # ── Step 1: Read and validate schema ──
-    df = pd.read_csv(input_path, encoding="utf-8")
+    df = _read_raw(input_path)
     original_rows = len(df)
 
     if original_rows == 0:
         raise ValueError("Uploaded CSV is empty — no rows found.")
 
     # Normalize column names: lowercase, strip whitespace
-    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+    df.columns = [normalize_column(c) for c in df.columns]
+    validate_columns(df.columns)
 
-    missing_cols = [c for c in REQUIRED_COLUMNS if c not in df.columns]
-    if missing_cols:
-        raise ValueError(
-            f"Missing required columns: {missing_cols}. "
-            f"Expected: {REQUIRED_COLUMNS}"
+    # ── Steps 2–7: Row-level normalization and filters ──
+    counts = _new_counts()
+    df = _clean_rows(df, counts)
+
+    # ── Step 8: Drop duplicate (factory_id, [year,] month) — keep last ──
+    keys = key_columns(df.columns)
+    before = len(df)
+    df = df.drop_duplicates(subset=keys, keep="last")
+    counts["duplicates"] = before - len(df)
+
+    # ── Step 9: Sort ──
+    df = df.sort_values(keys).reset_index(drop=True)
+
+    df = df[output_columns(df.columns)]
+
+    report = _build_report(
+        original_rows,
+        counts,
+        cleaned_rows=len(df),
+        factories_found=df["factory_id"].nunique(),
+        sectors_found=df["sector"].unique().tolist(),
+        years_found=df[YEAR_COLUMN].unique().tolist() if YEAR_COLUMN in df else None,
+    )
+    return df, report
+
+
+# ── Energy source variants → canonical names ──
+ENERGY_SOURCE_MAP = {
+    "coal": "coal",
+    "gas": "natural_gas",
+    "natural gas": "natural_gas",
+    "nat_gas": "natural_gas",
+    "grid": "grid",
+    "electrical grid": "grid",
+    "electricity": "grid",
+    "renewable": "renewable",
+    "solar": "renewable",
+    "wind": "renewable",
+    "hydro": "renewable",
+    "nuclear": "nuclear",
+    "nan": "grid",       # default unknown → grid
+    "none": "grid",
+    "": "grid",
+}
+
+_NUMERIC_COLUMNS = [
+    "month",
+    "monthly_production_tons",
+    "energy_used_mwh",
+    "raw_material_weight_tons",
+]
+
+
+def _text_dtypes(input_path: Union[str, IO[bytes]]) -> dict:
+    """
+    Map raw header names of the text columns to their `RAW_TEXT_DTYPES`.
+
+    Declaring them (instead of letting pandas infer per chunk) keeps IDs
+    like ``"007"`` intact and makes chunked and whole-file reads agree.
+    A buffer is rewound to where it was, ready for the full read.
+    """
+    start = None if isinstance(input_path, str) else input_path.tell()
+    header = pd.read_csv(input_path, nrows=0, encoding="utf-8").columns
+    if start is not None:
+        input_path.seek(start)
+    return {
+        raw: RAW_TEXT_DTYPES[normalize_column(raw)]
+        for raw in header if normalize_column(raw) in RAW_TEXT_DTYPES
+    }
+
+
+def _read_raw(input_path: Union[str, IO[bytes]]) -> pd.DataFrame:
+    """Parse a whole raw upload with the declared text dtypes (pyarrow if installed)."""
+    dtypes = _text_dtypes(input_path)
+    if pa is None:
+        return pd.read_csv(
+            input_path, encoding="utf-8", dtype=dtypes, float_precision="round_trip"
         )
 
-    report = {
-        "original_rows": original_rows,
-        "actions": [],
+    arrow_types = {
+        raw: pa.dictionary(pa.int32(), pa.string()) if dtype == "category" else pa.string()
+        for raw, dtype in dtypes.items()
     }
+    table = pa_csv.read_csv(
+        input_path,
+        convert_options=pa_csv.ConvertOptions(
+            column_types=arrow_types,
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+            timestamp_parsers=[],  # Dates in a numeric column are junk, not timestamps
+        ),
+    )
+    return table.to_pandas()
+
+
+def _normalize_levels(
+    values: pd.Series, normalize: Callable[[str], str], dtype: pd.CategoricalDtype
+) -> pd.Series:
+    """
+    Normalize a text column once per distinct value, into ``dtype``.
+
+    ``normalize`` is applied to each category level (missing values as
+    ``"nan"``, as ``astype(str)`` would give); rows are then recoded through
+    the level results. Results outside ``dtype``'s categories become NaN.
+    """
+    values = values.astype("category")
+    levels = [normalize(str(v)) for v in values.cat.categories] + [normalize("nan")]
+    level_codes = dtype.categories.get_indexer(levels)
+    # Code -1 (missing) picks the trailing "nan" level
+    codes = level_codes[values.cat.codes.to_numpy()]
+    return pd.Series(
+        pd.Categorical.from_codes(codes, dtype=dtype), index=values.index, name=values.name
+    )
+
+
+def _new_counts() -> dict:
+    return {"invalid_sectors": 0, "non_numeric": 0, "negative": 0, "duplicates": 0}
+
+
+def _clean_rows(df: pd.DataFrame, counts: dict) -> pd.DataFrame:
+    """
+    Apply cleaning steps 2–7 to a frame (or chunk) and tally dropped rows.
 
+    Every step here looks at one row at a time, so applying it per chunk
+    and summing ``counts`` gives the same result as one whole-file pass.
+    """
     # ── Step 2: Strip whitespace from string columns ──
-    for col in ["factory_id", "sector", "energy_source_type"]:
-        df[col] = df[col].astype(str).str.strip()
-
-    # ── Step 3: Normalize sector names ──
-    df["sector"] = df["sector"].str.title()
-    invalid_sectors = df[~df["sector"].isin(VALID_SECTORS)]
-    if len(invalid_sectors) > 0:
-        bad_count = len(invalid_sectors)
-        df = df[df["sector"].isin(VALID_SECTORS)]
-        report["actions"].append(f"Dropped {bad_count} rows with invalid sectors")
-
-    # ── Step 4: Normalize energy_source_type ──
-    df["energy_source_type"] = df["energy_source_type"].str.lower().str.strip()
-    # Map common variants
-    energy_map = {
-        "coal": "coal",
-        "gas": "natural_gas",
-        "natural gas": "natural_gas",
-        "nat_gas": "natural_gas",
-        "grid": "grid",
-        "electrical grid": "grid",
-        "electricity": "grid",
-        "renewable": "renewable",
-        "solar": "renewable",
-        "wind": "renewable",
-        "hydro": "renewable",
-        "nuclear": "nuclear",
-        "nan": "grid",       # default unknown → grid
-        "none": "grid",
-        "": "grid",
-    }
-    df["energy_source_type"] = df["energy_source_type"].map(energy_map).fillna("grid")
+    # A missing id is "", as in a cleaned CSV (and the closure path) —
+    # never NaN, which the audit would not count as a factory
+    df["factory_id"] = df["factory_id"].astype(str).str.strip().fillna("")
+
+    # ── Step 3: Normalize sector names (per category level) ──
+    df["sector"] = _normalize_levels(
+        df["sector"], lambda s: s.strip().title(), SECTOR_DTYPE
+    )
+    valid = df["sector"].notna()  # Not one of VALID_SECTORS
+    counts["invalid_sectors"] += int((~valid).sum())
+    df = df[valid]
+
+    # ── Step 4: Normalize energy_source_type (per category level) ──
+    # Map common variants; anything unknown counts as grid
+    df["energy_source_type"] = _normalize_levels(
+        df["energy_source_type"],
+        lambda s: ENERGY_SOURCE_MAP.get(s.strip().lower(), "grid"),
+        ENERGY_SOURCE_DTYPE,
+    )
 
     # ── Step 5: Coerce numeric columns ──
-    numeric_cols = [
-        "month",
-        "monthly_production_tons",
-        "energy_used_mwh",
-        "raw_material_weight_tons",
-    ]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+    has_year = YEAR_COLUMN in df.columns
+    for col in _NUMERIC_COLUMNS + ([YEAR_COLUMN] if has_year else []):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
 
     before = len(df)
-    df = df.dropna(subset=["monthly_production_tons", "energy_used_mwh", "month"])
-    dropped = before - len(df)
-    if dropped > 0:
-        report["actions"].append(f"Dropped {dropped} rows with non-numeric critical values")
+    critical = ["monthly_production_tons", "energy_used_mwh", "month"]
+    df = df.dropna(subset=critical + ([YEAR_COLUMN] if has_year else []))
+    counts["non_numeric"] += before - len(df)
+    if has_year:
+        df[YEAR_COLUMN] = df[YEAR_COLUMN].astype(int)
 
     # Fill missing raw_material_weight with 0
     df["raw_material_weight_tons"] = df["raw_material_weight_tons"].fillna(0.0)
 
     # ── Step 6: Clamp month to 1–12 ──
-    df["month"] = df["month"].astype(int).clip(1, 12)
+    df["month"] = df["month"].astype(int).clip(1, 12).astype(MONTH_DTYPE)
 
     # ── Step 7: Drop negative values ──
     before = len(df)
     df = df[(df["monthly_production_tons"] >= 0) & (df["energy_used_mwh"] >= 0)]
-    dropped = before - len(df)
-    if dropped > 0:
-        report["actions"].append(f"Dropped {dropped} rows with negative production/energy")
+    counts["negative"] += before - len(df)
 
-    # ── Step 8: Drop duplicate (factory_id, month) — keep last ──
-    before = len(df)
-    df = df.drop_duplicates(subset=["factory_id", "month"], keep="last")
-    dropped = before - len(df)
-    if dropped > 0:
-        report["actions"].append(f"Removed {dropped} duplicate (factory_id, month) rows")
+    return df
 
-    # ── Step 9: Sort ──
-    df = df.sort_values(["factory_id", "month"]).reset_index(drop=True)
 
-    # ── Step 10: Write cleaned CSV ──
-    df[REQUIRED_COLUMNS].to_csv(output_path, index=False)
+def _build_report(
+    original_rows: int,
+    counts: dict,
+    cleaned_rows: int,
+    factories_found: int,
+    sectors_found: list,
+    years_found: Optional[list] = None,
+) -> dict:
+    """Assemble the cleaning report from the tallies of each step."""
+    actions = []
+    if counts["invalid_sectors"] > 0:
+        actions.append(f"Dropped {counts['invalid_sectors']} rows with invalid sectors")
+    if counts["non_numeric"] > 0:
+        actions.append(f"Dropped {counts['non_numeric']} rows with non-numeric critical values")
+    if counts["negative"] > 0:
+        actions.append(f"Dropped {counts['negative']} rows with negative production/energy")
+    if counts["duplicates"] > 0:
+        key = "(factory_id, year, month)" if years_found is not None else "(factory_id, month)"
+        actions.append(f"Removed {counts['duplicates']} duplicate {key} rows")
+    if not actions:
+        actions.append("No issues found — CSV was already clean")
 
-    report["cleaned_rows"] = len(df)
-    report["rows_removed"] = original_rows - len(df)
-    report["factories_found"] = df["factory_id"].nunique()
-    report["sectors_found"] = sorted(df["sector"].unique().tolist())
+    report = {
+        "original_rows": original_rows,
+        "actions": actions,
+        "cleaned_rows": cleaned_rows,
+        "rows_removed": original_rows - cleaned_rows,
+        "factories_found": factories_found,
+        "sectors_found": sorted(sectors_found),
+    }
+    if years_found is not None:
+        report["years_found"] = sorted(int(y) for y in years_found)
+    return report
 
-    if not report["actions"]:
-        report["actions"].append("No issues found — CSV was already clean")
 
-    return output_path, report
+# ── Out-of-core cleaning ──
+
+# Maximum number of sorted runs merged at once (bounds open file handles)
+MERGE_FAN_IN = 64
+
+
+def _clean_csv_chunked(
+    input_path: str,
+    output_path: str,
+    chunksize: int,
+    progress: Optional[Callable[[int], None]] = None,
+) -> dict:
+    """Chunked equivalent of `clean_frame` + ``to_csv`` (see `clean_csv`)."""
+    dtypes = _text_dtypes(input_path)
+    counts = _new_counts()
+    original_rows = 0
+    columns: List[str] = REQUIRED_COLUMNS
+
+    with tempfile.TemporaryDirectory(
+        prefix="clean_runs_", dir=os.path.dirname(os.path.abspath(output_path))
+    ) as spill_dir:
+        runs: List[str] = []
+        reader = pd.read_csv(
+            input_path,
+            encoding="utf-8",
+            dtype=dtypes,
+            float_precision="round_trip",
+            chunksize=chunksize,
+        )
+        for chunk in reader:
+            original_rows += len(chunk)
+            chunk.columns = [normalize_column(c) for c in chunk.columns]
+            validate_columns(chunk.columns)
+
+            columns = output_columns(chunk.columns)
+            chunk = _clean_rows(chunk, counts)
+            if progress is not None:
+                progress(original_rows)
+            if chunk.empty:
+                continue
+
+            # Sorted run keyed by (factory_id, [year,] month, original row
+            # number); the row number lets the merge keep the *last* duplicate
+            run = chunk[columns].assign(_seq=chunk.index)
+            run = run.sort_values(key_columns(columns) + ["_seq"], kind="mergesort")
+            path = os.path.join(spill_dir, f"run_{len(runs):06d}.csv")
+            run.to_csv(path, index=False)
+            runs.append(path)
+
+        if original_rows == 0:
+            raise ValueError("Uploaded CSV is empty — no rows found.")
+
+        # Reduce to at most MERGE_FAN_IN runs before the final pass
+        while len(runs) > MERGE_FAN_IN:
+            merged: List[str] = []
+            for i in range(0, len(runs), MERGE_FAN_IN):
+                path = os.path.join(spill_dir, f"merge_{len(runs)}_{i:06d}.csv")
+                _merge_runs(runs[i:i + MERGE_FAN_IN], path, columns, final=False)
+                merged.append(path)
+            runs = merged
+
+        stats = _merge_runs(runs, output_path, columns, final=True)
+
+    counts["duplicates"] = stats["duplicates"]
+    return _build_report(
+        original_rows,
+        counts,
+        cleaned_rows=stats["rows"],
+        factories_found=stats["factories"],
+        sectors_found=list(stats["sectors"]),
+        years_found=list(stats["years"]) if YEAR_COLUMN in columns else None,
+    )
+
+
+def _read_run(
+    path: str, has_year: bool
+) -> Iterator[Tuple[Tuple[str, int, int, int], List[str]]]:
+    """Yield ((factory_id, year, month, seq), row) from a sorted run file."""
+    year_at = len(REQUIRED_COLUMNS)
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)  # header
+        for row in reader:
+            year = int(row[year_at]) if has_year else 0
+            yield (row[0], year, int(row[2]), int(row[-1])), row
+
+
+def _merge_runs(paths: List[str], output_path: str, columns: List[str], final: bool) -> dict:
+    """
+    K-way merge sorted runs of ``columns`` into ``output_path``.
+
+    Intermediate passes keep every row (and the ``_seq`` column). The final
+    pass keeps only the last row of each (factory_id, [year,] month) group
+    and drops ``_seq``, producing the cleaned CSV.
+    """
+    stats = {"rows": 0, "duplicates": 0, "factories": 0, "sectors": set(), "years": set()}
+    has_year = YEAR_COLUMN in columns
+    merged = heapq.merge(*(_read_run(p, has_year) for p in paths), key=lambda item: item[0])
+
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")  # Match DataFrame.to_csv
+        if not final:
+            writer.writerow(columns + ["_seq"])
+            for _, row in merged:
+                writer.writerow(row)
+            return stats
+
+        writer.writerow(columns)
+        pending: Optional[List[str]] = None
+        pending_key = None
+        last_factory = None
+
+        def flush(row: List[str]) -> None:
+            nonlocal last_factory
+            writer.writerow(row[:-1])
+            stats["rows"] += 1
+            stats["sectors"].add(row[1])
+            if row[0] != last_factory:
+                stats["factories"] += 1
+                last_factory = row[0]
+
+        for (fid, year, month, _), row in merged:
+            if pending is not None and (fid, year, month) == pending_key:
+                stats["duplicates"] += 1  # Superseded by a later row
+            elif pending is not None:
+                flush(pending)
+            pending, pending_key = row, (fid, year, month)
+            stats["years"].add(year)
+        if pending is not None:
+            flush(pending)
+
+    return stats
@@ -1,4 +1,4 @@
-import React, { useEffect } from "react";
+import React, { useCallback, useEffect, useState } from "react";
 import { useLocation, useNavigate } from "react-router-dom";
 import {
   BarChart,
@@ -57,11 +57,45 @@ const COLORS = [
   "#ec4899", // Pink
 ];
 const BASE_URL = "http://localhost:8000";
+const FACTORY_PAGE_SIZE = 100;
 
 const DashboardPage = () => {
   const location = useLocation();
   const navigate = useNavigate();
   const auditData = location.state?.auditData;
+  const [factories, setFactories] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [factoriesTotal, setFactoriesTotal] = useState(0);
+  const [loadingFactories, setLoadingFactories] = useState(false);
+
+  // Per-factory rows are paged from the API instead of sent with the upload
+  const loadFactories = useCallback(
+    async (cursor = null) => {
+      if (!auditData?.factories_url) return;
+      setLoadingFactories(true);
+      try {
+        const params = new URLSearchParams({ limit: FACTORY_PAGE_SIZE });
+        if (cursor) params.set("cursor", cursor);
+        const res = await fetch(
+          `${BASE_URL}${auditData.factories_url}?${params}`,
+        );
+        if (!res.ok) throw new Error(`Failed to load factories (${res.status})`);
+        const page = await res.json();
+        setFactories((prev) => (cursor ? [...prev, ...page.items] : page.items));
+        setNextCursor(page.next_cursor);
+        setFactoriesTotal(page.total);
+      } catch (err) {
+        console.error(err);
+      } finally {
+        setLoadingFactories(false);
+      }
+    },
+    [auditData],
+  );
+
+  useEffect(() => {
+    loadFactories();
+  }, [loadFactories]);
 
   useEffect(() => {
     if (!auditData) {
@@ -89,8 +123,7 @@ const DashboardPage = () => {
 
   if (!auditData) return null;
 
-  const { summary, sector_breakdown, violators, factories, files, job_id } =
-    auditData;
+  const { summary, sector_breakdown, violators, files, job_id } = auditData;
 
   // Prepare data for charts
   const sectorData = Object.entries(sector_breakdown).map(([name, data]) => ({
@@ -374,6 +407,21 @@ const DashboardPage = () => {
                     </TableBody>
                   </Table>
                 </div>
+                <div className="flex items-center justify-between px-6 py-4 border-t border-border/10">
+                  <p className="text-muted-foreground text-sm">
+                    Showing {factories.length.toLocaleString()} of{" "}
+                    {factoriesTotal.toLocaleString()} factories
+                  </p>
+                  {nextCursor && (
+                    <button
+                      onClick={() => loadFactories(nextCursor)}
+                      disabled={loadingFactories}
+                      className="flex items-center gap-2 px-4 py-2 rounded-xl bg-secondary/80 border border-border/50 hover:bg-secondary transition-all duration-200 text-secondary-foreground text-sm font-medium shadow-sm hover:shadow-md disabled:opacity-50"
+                    >
+                      {loadingFactories ? "Loading..." : "Load more"}
+                    </button>
+                  )}
+                </div>
               </TabsContent>
 
               <TabsContent value="violators" className="m-0">